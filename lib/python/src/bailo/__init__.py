@@ -13,13 +13,18 @@ import logging
 __version__ = "3.0.0"
 
 
-from bailo.core.agent import Agent, PkiAgent, TokenAgent
+from bailo.core.agent import Agent, AsyncAgent, PkiAgent, TokenAgent
+from bailo.core.async_client import AsyncClient
+from bailo.core.cache import DownloadCache
 from bailo.core.client import Client
 from bailo.core.enums import EntryKind, ModelVisibility, Role, SchemaKind
+from bailo.core.ratelimit import RateLimiter
 from bailo.helper.access_request import AccessRequest
+from bailo.helper.async_helper import AsyncAccessRequest, AsyncDatacard, AsyncModel, AsyncRelease, AsyncSchema
 from bailo.helper.datacard import Datacard
 from bailo.helper.model import Experiment, Model
 from bailo.helper.release import Release
 from bailo.helper.schema import Schema
+from bailo.helper.watcher import ReleaseWatcher
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
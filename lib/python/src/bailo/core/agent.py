@@ -1,16 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import getpass
+import json
 import logging
 import os
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from json import JSONDecodeError
+from typing import Any, Callable
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+try:
+    import httpx
+
+    HTTPX = True
+except ImportError:
+    HTTPX = False
+
 # isort: split
 
-from bailo.core.exceptions import BailoException, ResponseException
+from bailo.core.exceptions import BailoException, PresignedUrlExpired, ResponseException
+from bailo.core.ratelimit import Priority, RateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -19,22 +35,101 @@ class Agent:
     """Base API Agent for talking with Bailo.
 
     Wraps each request in an exception handler that maps API errors to Python Bailo errors, among status codes less than 400.
+    Requests are sent through a pooled, keep-alive session so that repeated calls reuse warm (already TLS negotiated)
+    connections. The session is thread-safe to share between workers and is created lazily on first use.
+
+    An optional `RateLimiter` caps the bandwidth of file transfers sent through the agent. Other requests are queued
+    for it ahead of transfer chunks, so that they aren't starved by bulk transfers.
+
+    >>> with Agent() as agent:
+    ...     client = Client("https://bailo.com", agent)
     """
 
     def __init__(
         self,
         verify: str | bool = True,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        max_retries: int = 0,
+        rate_limiter: RateLimiter | None = None,
     ):
         """Initiate a standard agent.
 
         :param verify: Path to certificate authority file, or bool for SSL verification.
+        :param pool_connections: Number of per-host connection pools to cache, defaults to 10
+        :param pool_maxsize: Maximum number of keep-alive connections kept per host, defaults to 10
+        :param pool_block: Block when the per-host pool is exhausted instead of opening extra connections, defaults to False
+        :param max_retries: Number of retries for failed connections (not failed responses), defaults to 0
+        :param rate_limiter: Token bucket shared by the file transfers sent through the agent, defaults to None
         """
         self.verify = verify
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter
+
+        self._session: requests.Session | None = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """The pooled session used for all requests, created on first access."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=self.max_retries,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.verify = self.verify
+
+        return session
+
+    def close(self) -> None:
+        """Close the pooled session and any open connections.
+
+        The agent can still be used afterwards, in which case a new session is created.
+        """
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_session"] = None
+        del state["_session_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._session_lock = threading.Lock()
 
     def __request(self, method, *args, **kwargs):
         kwargs["verify"] = self.verify
 
-        res = requests.request(method, *args, **kwargs)
+        if self.rate_limiter is not None:
+            # Transfer bodies are throttled as they're sent, so only in-memory request bodies are counted here
+            self.rate_limiter.acquire(_body_size(kwargs), Priority.INTERACTIVE)
+
+        res = self.session.request(method, *args, **kwargs)
 
         # Check response for a valid range
         if res.status_code < 400:
@@ -47,6 +142,32 @@ class Agent:
             # No response given
             raise ResponseException(f"{res.status_code} Cannot {method} to {res.request.url}")
 
+    def presigned(self, method: str, url: str, **kwargs):
+        """Send a request to a presigned URL, such as a multipart upload chunk.
+
+        Presigned URLs carry their own authorisation, so the agent's credentials are not attached, but the request is
+        still sent through the agent's connection pool.
+
+        :param method: HTTP method
+        :param url: Presigned URL
+        :param **kwargs: Kwargs passed to `requests.Request`, plus optional `timeout` & `stream`
+        :raises PresignedUrlExpired: If the URL is rejected (403 Forbidden), as its signature has expired
+        :raises ResponseException: If the response has an error status code
+        :return: Response object
+        """
+        send_kwargs = {key: kwargs.pop(key) for key in ("timeout", "stream") if key in kwargs}
+        prepared = requests.Request(method, url, **kwargs).prepare()
+
+        res = self.session.send(prepared, verify=self.verify, **send_kwargs)
+        if res.status_code < 400:
+            return res
+
+        # Drop the query string so that signatures aren't leaked into logs
+        message = f"{res.status_code} Cannot {method} to {url.split('?')[0]}"
+        if res.status_code == 403:
+            raise PresignedUrlExpired(message)
+        raise ResponseException(message)
+
     def get(self, *args, **kwargs):
         return self.__request("GET", *args, **kwargs)
 
@@ -66,6 +187,14 @@ class Agent:
         return self.__request("PUT", *args, **kwargs)
 
 
+def _body_size(kwargs: dict[str, Any]) -> int:
+    if kwargs.get("json") is not None:
+        return len(json.dumps(kwargs["json"]))
+    if isinstance(kwargs.get("data"), (bytes, str)):
+        return len(kwargs["data"])
+    return 0
+
+
 class PkiAgent(Agent):
     def __init__(self, cert: str, key: str, auth: str, **kwargs):
         """Initiate an agent for PKI authentication.
@@ -80,20 +209,12 @@ class PkiAgent(Agent):
         self.cert = cert
         self.key = key
 
-    def get(self, *args, **kwargs):
-        return super().get(*args, cert=(self.cert, self.key), **kwargs)
-
-    def post(self, *args, **kwargs):
-        return super().post(*args, cert=(self.cert, self.key), **kwargs)
-
-    def put(self, *args, **kwargs):
-        return super().put(*args, cert=(self.cert, self.key), **kwargs)
-
-    def patch(self, *args, **kwargs):
-        return super().patch(*args, cert=(self.cert, self.key), **kwargs)
+    def _create_session(self) -> requests.Session:
+        session = super()._create_session()
+        # Presented on each new connection only, pooled connections keep their negotiated TLS session.
+        session.cert = (self.cert, self.key)
 
-    def delete(self, *args, **kwargs):
-        return super().delete(*args, cert=(self.cert, self.key), **kwargs)
+        return session
 
 
 class TokenAgent(Agent):
@@ -135,17 +256,178 @@ class TokenAgent(Agent):
         self.secret_key = secret_key
         self.basic = HTTPBasicAuth(access_key, secret_key)
 
-    def get(self, *args, **kwargs):
-        return super().get(*args, auth=self.basic, **kwargs)
+    def _create_session(self) -> requests.Session:
+        session = super()._create_session()
+        session.auth = self.basic
 
-    def post(self, *args, **kwargs):
-        return super().post(*args, auth=self.basic, **kwargs)
+        return session
 
-    def put(self, *args, **kwargs):
-        return super().put(*args, auth=self.basic, **kwargs)
 
-    def patch(self, *args, **kwargs):
-        return super().patch(*args, auth=self.basic, **kwargs)
+class AsyncAgent:
+    """Asyncio agent for talking with Bailo.
 
-    def delete(self, *args, **kwargs):
-        return super().delete(*args, auth=self.basic, **kwargs)
+    Requests are sent natively from the event loop with an `httpx.AsyncClient`, using the wrapped agent's credentials
+    and certificate settings, so that a single event loop can keep many requests in flight without a thread for each.
+    Requests beyond `max_concurrency` open connections wait for one to be free.
+
+    Streamed file transfers, and the blocking helper classes behind the async helpers, are not natively async: they
+    are run on bounded worker pools (`max_concurrency` threads for helper methods and `max_transfers` threads for
+    transfers) sharing the wrapped agent's pooled session.
+
+    >>> async with AsyncAgent(TokenAgent(access_key, secret_key)) as agent:
+    ...     client = AsyncClient("https://bailo.com", agent)
+
+    :raises ImportError: If httpx isn't installed
+    """
+
+    def __init__(
+        self,
+        agent: Agent | None = None,
+        max_concurrency: int = 64,
+        max_transfers: int = 8,
+    ):
+        """Initiate an asyncio agent.
+
+        :param agent: Agent whose credentials are used to send requests, and which runs blocking transfers & helper
+            methods, defaults to an `Agent` with a pool sized to the concurrency limits
+        :param max_concurrency: Maximum number of connections (and blocking helper methods) in use at once, defaults to 64
+        :param max_transfers: Maximum number of file transfers in flight at once, defaults to 8
+        """
+        if not HTTPX:
+            raise ImportError("Optional httpx dependencies (needed for this class) are not installed.")
+
+        if agent is None:
+            agent = Agent(pool_maxsize=max_concurrency + max_transfers)
+
+        self.agent = agent
+        self.max_concurrency = max_concurrency
+        self.max_transfers = max_transfers
+
+        self._client: httpx.AsyncClient | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._transfer_executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled async HTTP client used for native requests, created on first access."""
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> httpx.AsyncClient:
+        verify = self.agent.verify
+        if isinstance(verify, str) or isinstance(self.agent, PkiAgent):
+            # httpx takes certificate paths through an SSL context
+            context = ssl.create_default_context(cafile=verify if isinstance(verify, str) else None)
+            if isinstance(self.agent, PkiAgent):
+                context.load_cert_chain(self.agent.cert, self.agent.key)
+            verify = context
+
+        auth = None
+        if isinstance(self.agent, TokenAgent):
+            auth = httpx.BasicAuth(self.agent.access_key, self.agent.secret_key)
+
+        return httpx.AsyncClient(
+            auth=auth,
+            verify=verify,
+            # Requests sent through `Agent` have no timeout, and requests queued for a connection shouldn't time out
+            timeout=httpx.Timeout(None),
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+        )
+
+    def _get_executor(self, transfer: bool) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if transfer:
+                if self._transfer_executor is None:
+                    self._transfer_executor = ThreadPoolExecutor(self.max_transfers, "bailo-transfer")
+                return self._transfer_executor
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_concurrency, "bailo")
+            return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, transfer: bool = False, **kwargs) -> Any:
+        """Run a blocking callable on one of the agent's worker pools.
+
+        :param func: Callable to run
+        :param transfer: Use the transfer pool rather than the helper pool, defaults to False
+        :return: The callable's return value
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(transfer), functools.partial(func, *args, **kwargs))
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request natively, mapping API errors to Python Bailo errors as `Agent` does.
+
+        :param method: HTTP method
+        :param url: URL of the request
+        :param **kwargs: Kwargs passed to `httpx.AsyncClient.request`
+        :raises BailoException: If the response has an error status code, with the error message issued by bailo
+        :raises ResponseException: If the response has an error status code, but no error message
+        :return: Response object
+        """
+        if kwargs.get("params") is not None:
+            # Dropped (rather than sent empty) to match requests
+            kwargs["params"] = {key: value for key, value in kwargs["params"].items() if value is not None}
+
+        if self.agent.rate_limiter is not None and _body_size(kwargs):
+            await self.run(self.agent.rate_limiter.acquire, _body_size(kwargs), Priority.INTERACTIVE)
+
+        res = await self.client.request(method, url, **kwargs)
+
+        # Check response for a valid range
+        if res.status_code < 400:
+            return res
+
+        try:
+            # Give the error message issued by bailo
+            raise BailoException(res.json()["error"]["message"])
+        except JSONDecodeError:
+            # No response given
+            raise ResponseException(f"{res.status_code} Cannot {method} to {res.request.url}")
+
+    async def get(self, *args, **kwargs):
+        return await self.request("GET", *args, **kwargs)
+
+    async def post(self, *args, **kwargs):
+        return await self.request("POST", *args, **kwargs)
+
+    async def patch(self, *args, **kwargs):
+        return await self.request("PATCH", *args, **kwargs)
+
+    async def delete(self, *args, **kwargs):
+        return await self.request("DELETE", *args, **kwargs)
+
+    async def put(self, *args, **kwargs):
+        return await self.request("PUT", *args, **kwargs)
+
+    def close(self) -> None:
+        """Shut down the worker pools and close the wrapped agent.
+
+        The native `httpx` client can only be closed from an event loop, so is dropped here without closing its open
+        connections (they're closed once it's garbage collected). Only `aclose` closes it, so prefer that from within an
+        event loop.
+        """
+        with self._executor_lock:
+            for executor in (self._executor, self._transfer_executor):
+                if executor is not None:
+                    executor.shutdown(wait=True)
+            self._executor = None
+            self._transfer_executor = None
+
+        self._client = None
+        self.agent.close()
+
+    async def aclose(self) -> None:
+        """Close the native client, shut down the worker pools and close the wrapped agent without blocking the event
+        loop."""
+        if self._client is not None:
+            await self._client.aclose()
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,247 @@
+"""Streaming zip archives of directories.
+
+`ZipStream` generates a zip of a directory as an iterable of byte chunks, so that it can be used directly as an upload
+body without writing an intermediate archive to disk. Each file is stored or deflated depending on whether it is
+already compressed, and the archive is generated on a background thread so that compression overlaps the upload.
+
+`extract_zip` unpacks an archive into a directory from any seekable file object, such as a `RangeFile` reading the
+archive from Bailo, so that only the central directory and the selected members are read.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import shutil
+import threading
+import zipfile
+import zlib
+from typing import IO, Any, Callable, Iterator
+
+# isort: split
+
+from bailo.core.utils import safe_join
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1024**2
+# Maximum number of generated chunks buffered ahead of the consumer.
+QUEUE_SIZE = 16
+# Bytes sampled from the start of a file to estimate how compressible it is.
+SAMPLE_SIZE = 64 * 1024
+# Files which deflate to more than this fraction of their size are stored instead.
+MIN_COMPRESSION_RATIO = 0.9
+# Extensions of formats which are already compressed, so are always stored.
+COMPRESSED_EXTENSIONS = {
+    ".7z",
+    ".bz2",
+    ".gz",
+    ".jpeg",
+    ".jpg",
+    ".lz4",
+    ".mp3",
+    ".mp4",
+    ".npz",
+    ".png",
+    ".rar",
+    ".tgz",
+    ".webp",
+    ".xz",
+    ".zip",
+    ".zst",
+}
+
+_DONE = object()
+
+
+class _ChunkSink:
+    """Unseekable file object collecting the bytes written by `zipfile`."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> list[bytes]:
+        chunks, self._chunks = self._chunks, []
+        # Coalesce the small header writes into the data they precede
+        return [b"".join(chunks)] if chunks else []
+
+
+def compression_for(path: str) -> int:
+    """Choose whether to store or deflate a file.
+
+    Files with the extension of an already compressed format are stored, as are files whose first block doesn't
+    compress well.
+
+    :param path: Path of the file
+    :return: `zipfile.ZIP_STORED` or `zipfile.ZIP_DEFLATED`
+    """
+    if os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+
+    with open(path, "rb") as f:
+        sample = f.read(SAMPLE_SIZE)
+
+    if sample and len(zlib.compress(sample, 1)) > len(sample) * MIN_COMPRESSION_RATIO:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+class ZipStream:
+    """Zip archive of a directory, generated as it is read.
+
+    >>> client.simple_upload(model_id, "weights.zip", ZipStream("weights"))
+
+    :param directory: Directory to archive, with entries named relative to it
+    :param threaded: Generate the archive on a background thread, defaults to True
+    """
+
+    def __init__(self, directory: str, threaded: bool = True) -> None:
+        self.directory = directory
+        self.threaded = threaded
+
+        self.dirs: list[tuple[str, str]] = []
+        self.files: list[tuple[str, str, int]] = []
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in dirs:
+                path = os.path.join(root, name)
+                self.dirs.append((path, os.path.relpath(path, directory).replace(os.sep, "/") + "/"))
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                self.files.append((path, os.path.relpath(path, directory).replace(os.sep, "/"), os.path.getsize(path)))
+
+    @property
+    def size(self) -> int:
+        """Total uncompressed size of the archived files in bytes."""
+        return sum(size for _, _, size in self.files)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.stream()
+
+    def stream(self, callback: Callable[[int], Any] | None = None) -> Iterator[bytes]:
+        """Generate the archive.
+
+        :param callback: Called with the number of uncompressed bytes read as the archive is generated, defaults to None
+        :return: Iterator of archive chunks
+        """
+        if not self.threaded:
+            return self._generate(callback)
+        return self._generate_threaded(callback)
+
+    def _generate(self, callback: Callable[[int], Any] | None = None) -> Iterator[bytes]:
+        sink = _ChunkSink()
+
+        # zipfile writes data descriptors after each entry when its file object is unseekable
+        with zipfile.ZipFile(sink, "w", allowZip64=True) as zf:  # type: ignore[reportArgumentType]
+            for path, arcname in self.dirs:
+                zf.writestr(zipfile.ZipInfo.from_file(path, arcname), b"")
+            yield from sink.drain()
+
+            for path, arcname, _ in self.files:
+                zinfo = zipfile.ZipInfo.from_file(path, arcname)
+                zinfo.compress_type = compression_for(path)
+
+                with open(path, "rb") as src, zf.open(zinfo, "w") as dest:
+                    while block := src.read(BLOCK_SIZE):
+                        dest.write(block)
+                        if callback is not None:
+                            callback(len(block))
+                        yield from sink.drain()
+                yield from sink.drain()
+
+        yield from sink.drain()
+        logger.info("Streamed zip of %s (%d files).", self.directory, len(self.files))
+
+    def _generate_threaded(self, callback: Callable[[int], Any] | None = None) -> Iterator[bytes]:
+        chunks: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce() -> None:
+            try:
+                for chunk in self._generate(callback):
+                    if not put(chunk):
+                        return
+                put(_DONE)
+            except BaseException as ex:
+                put(ex)
+
+        producer = threading.Thread(target=produce, name="bailo-zip", daemon=True)
+        producer.start()
+
+        try:
+            while (item := chunks.get()) is not _DONE:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+
+
+class _CountingWriter:
+    """File object wrapper reporting the number of bytes written to a callback."""
+
+    def __init__(self, f: IO[bytes], callback: Callable[[int], Any]) -> None:
+        self._f = f
+        self._callback = callback
+
+    def write(self, data: bytes) -> int:
+        written = self._f.write(data)
+        self._callback(len(data))
+        return written
+
+
+def extract_zip(
+    file: IO[bytes],
+    path: str,
+    select: Callable[[str], bool] | None = None,
+    callback: Callable[[int], Any] | None = None,
+) -> list[str]:
+    """Extract the members of a zip archive into a directory.
+
+    Members are extracted in the order they're stored in the archive, so that reads of the archive run forwards.
+
+    :param file: Seekable file object of the archive
+    :param path: Local directory to extract the members into
+    :param select: Callable given each member's name, returning whether to extract it, defaults to extracting all members
+    :param callback: Callable given the number of bytes written after each write, defaults to None
+    :raises BailoException: If a member's name would resolve outside of the directory
+    :return: The local paths of the extracted files
+    """
+    extracted = []
+    os.makedirs(path, exist_ok=True)
+
+    with zipfile.ZipFile(file) as zf:
+        for info in sorted(zf.infolist(), key=lambda info: info.header_offset):
+            if select is not None and not select(info.filename):
+                continue
+
+            local_path = safe_join(path, info.filename.rstrip("/"))
+            if info.is_dir():
+                os.makedirs(local_path, exist_ok=True)
+                continue
+
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            with zf.open(info) as src, open(local_path, "wb") as dst:
+                shutil.copyfileobj(src, dst if callback is None else _CountingWriter(dst, callback), BLOCK_SIZE)
+            extracted.append(local_path)
+            logger.debug("Extracted %s to %s.", info.filename, local_path)
+
+    return extracted
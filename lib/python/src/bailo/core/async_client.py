@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import functools
+import inspect
+from typing import Any, Callable
+
+from requests import Response
+
+# isort: split
+
+from bailo.core.agent import Agent, AsyncAgent
+from bailo.core.client import Client
+
+# Endpoints which stream file contents, and so are run (blocking) on the agent's transfer pool. Download bodies are read
+# into memory there too, so that the responses returned never block the event loop.
+TRANSFER_ENDPOINTS = {"get_download_file", "get_download_by_filename", "simple_upload", "put_multi_upload_chunk"}
+
+
+class _DeferredRequest:
+    """Request recorded by a `_RecordingAgent`, standing in for its response."""
+
+    def __init__(self, method: str, url: str, kwargs: dict[str, Any]) -> None:
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.decode = False
+
+    def json(self) -> _DeferredRequest:
+        self.decode = True
+        return self
+
+
+class _RecordingAgent:
+    """Stand-in agent which records the request a `Client` endpoint builds, so that it can be sent natively."""
+
+    def get(self, url: str, **kwargs) -> _DeferredRequest:
+        return _DeferredRequest("GET", url, kwargs)
+
+    def post(self, url: str, **kwargs) -> _DeferredRequest:
+        return _DeferredRequest("POST", url, kwargs)
+
+    def patch(self, url: str, **kwargs) -> _DeferredRequest:
+        return _DeferredRequest("PATCH", url, kwargs)
+
+    def delete(self, url: str, **kwargs) -> _DeferredRequest:
+        return _DeferredRequest("DELETE", url, kwargs)
+
+    def put(self, url: str, **kwargs) -> _DeferredRequest:
+        return _DeferredRequest("PUT", url, kwargs)
+
+
+class AsyncClient:
+    """Create an asyncio Client object that can be used to talk to the website.
+
+    Every `Client` endpoint is available as a coroutine with the same signature. Metadata endpoints are sent natively
+    by the `AsyncAgent`, while the endpoints streaming file contents (see `TRANSFER_ENDPOINTS`) run on its bounded
+    transfer pool of worker threads. Download endpoints return their response with the body already read into memory
+    on that pool, so use the async helpers (e.g. `AsyncRelease.download`) to stream large files to disk instead.
+
+    >>> async with AsyncClient("https://bailo.com") as client:
+    ...     models = await asyncio.gather(*(client.get_model(model_id) for model_id in model_ids))
+
+    :param url: Url of bailo website
+    :param agent: An async agent (or agent, which will be wrapped) to handle requests
+    """
+
+    def __init__(self, url: str, agent: AsyncAgent | Agent | None = None):
+        if agent is None:
+            agent = AsyncAgent()
+        elif isinstance(agent, Agent):
+            agent = AsyncAgent(agent)
+
+        self.agent = agent
+        # Blocking client sharing the agent's pooled session, used by the async helper classes.
+        self.client = Client(url, agent.agent)
+        self.url = self.client.url
+        # Builds each endpoint's request without sending it.
+        self._recorder = Client(url, _RecordingAgent())
+
+    def close(self) -> None:
+        """Shut down the worker pools and close the agent's pooled connections, except the native client's (only closed
+        by `aclose`, so prefer that in an event loop)."""
+        self.agent.close()
+
+    async def aclose(self) -> None:
+        """Close the agent's native client, shut down its worker pools and close its pooled connections without blocking
+        the event loop."""
+        await self.agent.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def get_all_releases_if_changed(self, model_id: str, etag: str | None = None) -> tuple[str | None, Any]:
+        """
+        Get all releases for a model, unless they are unchanged since an earlier request.
+
+        :param model_id: Unique model ID
+        :param etag: ETag of an earlier response, sent as If-None-Match, defaults to None
+        :return: ETag of the response, and JSON response object (or None if unchanged)
+        """
+        res = await self.agent.get(
+            f"{self.url}/v2/model/{model_id}/releases",
+            headers=None if etag is None else {"If-None-Match": etag},
+        )
+        if res.status_code == 304:
+            return etag, None
+        return res.headers.get("ETag"), res.json()
+
+
+def _async_endpoint(name: str, func: Callable[..., Any]):
+    @functools.wraps(func)
+    async def endpoint(self: AsyncClient, *args, **kwargs):
+        request = func(self._recorder, *args, **kwargs)
+        res = await self.agent.request(request.method, request.url, **request.kwargs)
+        return res.json() if request.decode else res
+
+    return endpoint
+
+
+def _transfer_endpoint(name: str, func: Callable[..., Any]):
+    def call(client: Client, *args, **kwargs):
+        res = getattr(client, name)(*args, **kwargs)
+        if isinstance(res, Response):
+            # Loads a streamed body, so that reading the response afterwards doesn't block
+            _ = res.content
+        return res
+
+    @functools.wraps(func)
+    async def endpoint(self: AsyncClient, *args, **kwargs):
+        return await self.agent.run(call, self.client, *args, transfer=True, **kwargs)
+
+    return endpoint
+
+
+for _name, _func in inspect.getmembers(Client, inspect.isfunction):
+    if not _name.startswith("_") and not hasattr(AsyncClient, _name):
+        _wrap = _transfer_endpoint if _name in TRANSFER_ENDPOINTS else _async_endpoint
+        setattr(AsyncClient, _name, _wrap(_name, _func))
@@ -0,0 +1,320 @@
+"""Content addressed local cache of downloaded files.
+
+Files are stored once per content hash under `blobs/`, with `refs/<model_id>/<file_id>` pointing at the blob for each
+Bailo file as stored on the server, and `refs/<model_id>/<file_id>.decoded` at its decoded (decompressed, or
+reconstructed from a delta) contents. Cache hits are materialised at their target path with a reflink where the
+filesystem supports them, falling back to a copy, so on filesystems without reflinks (e.g. ext4) a cache hit still
+costs a full copy of the file. Files are never hardlinked into or out of the cache, so writing to a downloaded file
+can't change the cached blob or any other copy of it. The cache can be shared between processes, with updates
+serialised by a lock file (held only to rename copies into place, never while copying), and optionally capped in size
+with least recently used blobs evicted first.
+"""
+
+from __future__ import annotations
+
+import errno
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from typing import BinaryIO
+
+try:
+    import fcntl
+
+    FCNTL = True
+except ImportError:
+    FCNTL = False
+
+# isort: split
+
+from bailo.core.digest import sha256_file
+from bailo.core.utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("BAILO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bailo"))
+# ioctl request to clone a file's extents (copy-on-write), supported by btrfs, XFS and others.
+FICLONE = 0x40049409
+# Suffix of the refs to files' decoded contents.
+DECODED_SUFFIX = ".decoded"
+# Prefix of the temporary files blobs & refs are written to before being renamed into place.
+TEMP_PREFIX = ".bailo-"
+
+
+def clone_or_copy(src: str, dst: str) -> str:
+    """Materialise an independent copy of a file at a new path, without copying its data where possible.
+
+    Tries a reflink (a copy-on-write clone, so the files can diverge safely), then falls back to a copy.
+
+    :param src: Path of the existing file
+    :param dst: Path to materialise the file at (replaced if it exists)
+    :return: The method used, either "reflink" or "copy"
+    """
+    tmp_path, method = _clone_to_temp(src, os.path.dirname(os.path.abspath(dst)))
+    _replace(tmp_path, dst)
+    return method
+
+
+def _clone_to_temp(src: str, directory: str) -> tuple[str, str]:
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=TEMP_PREFIX, suffix=".tmp")
+    os.close(fd)
+    os.remove(tmp_path)
+
+    try:
+        method = _reflink(src, tmp_path)
+        if method is None:
+            shutil.copyfile(src, tmp_path)
+            method = "copy"
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return tmp_path, method
+
+
+def _replace(tmp_path: str, dst: str) -> None:
+    try:
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _reflink(src: str, dst: str) -> str | None:
+    if not FCNTL:
+        return None
+
+    with open(src, "rb") as src_file:
+        with open(dst, "wb") as dst_file:
+            try:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+                return "reflink"
+            except OSError:
+                pass
+
+    os.remove(dst)
+    return None
+
+
+class FileLock:
+    """Inter-process (and inter-thread) exclusive lock backed by a lock file.
+
+    :param path: Path of the lock file
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file: BinaryIO | None = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._file = open(self.path, "ab")  # type: ignore[reportAttributeAccessIssue]
+        if FCNTL:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)  # type: ignore[reportOptionalMemberAccess]
+        return self
+
+    def __exit__(self, *exc_info):
+        if FCNTL:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)  # type: ignore[reportOptionalMemberAccess]
+        self._file.close()  # type: ignore[reportOptionalMemberAccess]
+        self._file = None
+        self._thread_lock.release()
+
+
+class DownloadCache:
+    """Content addressed local cache of downloaded files, shared across releases and processes.
+
+    >>> cache = DownloadCache(max_size=50 * 1024**3)
+    >>> release.download("weights.pth", cache=cache)
+
+    :param directory: Cache directory, defaults to `BAILO_CACHE_DIR` or `~/.cache/bailo`
+    :param max_size: Maximum total size of cached files in bytes, or None for no limit, defaults to None
+    """
+
+    def __init__(self, directory: str | None = None, max_size: int | None = None) -> None:
+        if directory is None:
+            directory = CACHE_DIR
+
+        self.directory = directory
+        self.max_size = max_size
+
+        self.blobs_dir = os.path.join(directory, "blobs")
+        self.refs_dir = os.path.join(directory, "refs")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+
+        self._lock = FileLock(os.path.join(directory, ".lock"))
+
+    def blob_path(self, digest: str) -> str:
+        """Return the path of the blob with a given content hash.
+
+        :param digest: SHA-256 hex digest
+        :return: Path of the blob
+        """
+        return os.path.join(self.blobs_dir, digest)
+
+    def ref_path(self, model_id: str, file_id: str, decoded: bool = False) -> str:
+        """Return the path of the ref for a Bailo file.
+
+        :param model_id: A unique model ID
+        :param file_id: A unique file ID
+        :param decoded: Ref of the file's decoded contents, rather than its contents as stored, defaults to False
+        :return: Path of the ref
+        """
+        return os.path.join(self.refs_dir, model_id, file_id + DECODED_SUFFIX if decoded else file_id)
+
+    def get(self, model_id: str, file_id: str, decoded: bool = False) -> str | None:
+        """Look up the cached blob for a Bailo file, marking it as recently used.
+
+        :param model_id: A unique model ID
+        :param file_id: A unique file ID
+        :param decoded: Look up the file's decoded contents, rather than its contents as stored, defaults to False
+        :return: Path of the blob, or None if the file isn't cached
+        """
+        digest = _read_ref(self.ref_path(model_id, file_id, decoded))
+        if digest is None:
+            return None
+
+        blob_path = self.blob_path(digest)
+        try:
+            # Blobs are immutable, so their modification time is used as the last access time for eviction
+            os.utime(blob_path)
+        except FileNotFoundError:
+            return None
+
+        return blob_path
+
+    def materialise(self, model_id: str, file_id: str, path: str, decoded: bool = False) -> bool:
+        """Materialise a cached Bailo file at a path.
+
+        The file is reflinked where the filesystem supports it, otherwise it's a full copy of the file. The copy is
+        made without holding the cache lock, so other processes aren't blocked while it's written.
+
+        :param model_id: A unique model ID
+        :param file_id: A unique file ID
+        :param path: Path to write the file to
+        :param decoded: Look up the file's decoded contents, rather than its contents as stored, defaults to False
+        :return: True if the file was cached, otherwise False
+        """
+        with self._lock:
+            blob_path = self.get(model_id, file_id, decoded)
+        if blob_path is None:
+            return False
+
+        try:
+            tmp_path, method = _clone_to_temp(blob_path, os.path.dirname(os.path.abspath(path)))
+        except FileNotFoundError:
+            # Evicted since it was looked up (once opened, a blob can be copied in full even if it's evicted)
+            return False
+        _replace(tmp_path, path)
+
+        logger.info("File %s of %s materialised from cache at %s (%s).", file_id, model_id, path, method)
+        return True
+
+    def add(self, model_id: str, file_id: str, path: str, digest: str | None = None, decoded: bool = False) -> str:
+        """Add a downloaded file to the cache.
+
+        :param model_id: A unique model ID
+        :param file_id: A unique file ID
+        :param path: Path of the downloaded file
+        :param digest: SHA-256 hex digest of the file, computed if not given, defaults to None
+        :param decoded: The file holds the Bailo file's decoded contents, rather than its contents as stored, defaults to
+            False
+        :return: Path of the blob
+        """
+        if digest is None:
+            digest = sha256_file(path)
+
+        blob_path = self.blob_path(digest)
+        ref_path = self.ref_path(model_id, file_id, decoded)
+
+        # Copied next to the blob before taking the lock, so only the rename into place is serialised
+        tmp_path = None
+        if not os.path.exists(blob_path):
+            tmp_path, _ = _clone_to_temp(path, self.blobs_dir)
+
+        with self._lock:
+            if tmp_path is not None:
+                if os.path.exists(blob_path):
+                    # Added by another process in the meantime
+                    os.remove(tmp_path)
+                else:
+                    _replace(tmp_path, blob_path)
+
+            os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+            atomic_write_json(ref_path, {"digest": digest})
+
+            self._evict(keep=blob_path)
+
+        logger.info("File %s of %s added to cache.", file_id, model_id)
+        return blob_path
+
+    def size(self) -> int:
+        """Return the total size of the cached blobs in bytes."""
+        return sum(entry.stat().st_size for entry in self._blobs())
+
+    def evict(self) -> None:
+        """Remove least recently used blobs until the cache fits within its maximum size."""
+        with self._lock:
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove every cached file."""
+        with self._lock:
+            for directory in (self.blobs_dir, self.refs_dir):
+                shutil.rmtree(directory, ignore_errors=True)
+                os.makedirs(directory, exist_ok=True)
+
+    def _evict(self, keep: str | None = None) -> None:
+        if self.max_size is None:
+            return
+
+        entries = sorted(self._blobs(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+
+        for entry in entries:
+            if total <= self.max_size:
+                break
+            if entry.path == keep:
+                continue
+            try:
+                os.remove(entry.path)
+            except OSError as ex:
+                if ex.errno != errno.ENOENT:
+                    raise
+            # DirEntry caches its stat result, so the size is still available after removal
+            total -= entry.stat().st_size
+            logger.info("Evicted blob %s from cache.", entry.name)
+
+        # Refs to evicted blobs are treated as misses, so are removed lazily here
+        for model_dir in os.scandir(self.refs_dir):
+            for ref in os.scandir(model_dir.path):
+                if ref.name.startswith(TEMP_PREFIX):
+                    # A ref being written
+                    continue
+                digest = _read_ref(ref.path)
+                if digest is None or not os.path.exists(self.blob_path(digest)):
+                    os.remove(ref.path)
+
+    def _blobs(self) -> list[os.DirEntry]:
+        # Blobs being copied into the cache aren't counted until they're renamed into place
+        return [
+            entry for entry in os.scandir(self.blobs_dir) if entry.is_file() and not entry.name.startswith(TEMP_PREFIX)
+        ]
+
+
+def _read_ref(ref_path: str) -> str | None:
+    try:
+        with open(ref_path) as f:
+            return json.load(f)["digest"]
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Ignoring corrupt cache ref %s.", ref_path)
+        return None
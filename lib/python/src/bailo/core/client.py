@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from io import BytesIO
-from typing import Any
+from typing import Any, Iterable
+from urllib.parse import quote
 
 from bailo.core.agent import Agent, TokenAgent
 from bailo.core.enums import EntryKind, ModelVisibility, SchemaKind
-from bailo.core.utils import filter_none
+from bailo.core.utils import filter_none, range_header
 
 
 class Client:
@@ -19,6 +20,16 @@ class Client:
         self.url = url.rstrip("/") + "/api"
         self.agent = agent
 
+    def close(self) -> None:
+        """Close the agent's pooled connections."""
+        self.agent.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def post_model(
         self,
         name: str,
@@ -284,6 +295,22 @@ class Client:
             f"{self.url}/v2/model/{model_id}/releases",
         ).json()
 
+    def get_all_releases_if_changed(self, model_id: str, etag: str | None = None) -> tuple[str | None, Any]:
+        """
+        Get all releases for a model, unless they are unchanged since an earlier request.
+
+        :param model_id: Unique model ID
+        :param etag: ETag of an earlier response, sent as If-None-Match, defaults to None
+        :return: ETag of the response, and JSON response object (or None if unchanged)
+        """
+        res = self.agent.get(
+            f"{self.url}/v2/model/{model_id}/releases",
+            headers=None if etag is None else {"If-None-Match": etag},
+        )
+        if res.status_code == 304:
+            return etag, None
+        return res.headers.get("ETag"), res.json()
+
     def get_release(self, model_id: str, release_version: str):
         """
         Get a specific model release.
@@ -330,22 +357,26 @@ class Client:
         self,
         model_id: str,
         file_id: str,
+        byte_range: tuple[int, int] | None = None,
     ):
         """Download a specific file by it's id.
 
         :param model_id: Unique model ID
         :param file_id: Unique file ID
+        :param byte_range: Inclusive start and end byte offsets to request, defaults to None
         :return: The unique file ID
         """
         if isinstance(self.agent, TokenAgent):
             return self.agent.get(
                 f"{self.url}/v2/token/model/{model_id}/file/{file_id}/download",
+                headers=range_header(byte_range),
                 stream=True,
                 timeout=10_000,
             )
         else:
             return self.agent.get(
                 f"{self.url}/v2/model/{model_id}/file/{file_id}/download",
+                headers=range_header(byte_range),
                 stream=True,
                 timeout=10_000,
             )
@@ -355,45 +386,120 @@ class Client:
         model_id: str,
         semver: str,
         filename: str,
+        byte_range: tuple[int, int] | None = None,
     ):
         """Download a specific file.
 
         :param model_id: Unique model ID
         :param semver: Semver of the release
         :param filename: The filename trying to download from
+        :param byte_range: Inclusive start and end byte offsets to request, defaults to None
         :return: The filename
         """
         if isinstance(self.agent, TokenAgent):
             return self.agent.get(
-                f"{self.url}/v2/token/model/{model_id}/release/{semver}/file/{filename}/download",
+                f"{self.url}/v2/token/model/{model_id}/release/{semver}/file/{quote(filename, safe='')}/download",
+                headers=range_header(byte_range),
                 stream=True,
                 timeout=10_000,
             )
         else:
             return self.agent.get(
-                f"{self.url}/v2/model/{model_id}/release/{semver}/file/{filename}/download",
+                f"{self.url}/v2/model/{model_id}/release/{semver}/file/{quote(filename, safe='')}/download",
+                headers=range_header(byte_range),
                 stream=True,
                 timeout=10_000,
             )
 
-    def simple_upload(self, model_id: str, name: str, buffer: BytesIO):
+    def simple_upload(
+        self,
+        model_id: str,
+        name: str,
+        buffer: BytesIO | Iterable[bytes],
+        tags: list[str] | None = None,
+    ):
         """Create a simple file upload.
 
         :param model_id: Unique model ID
         :param name: File name
+        :param buffer: File object, or iterable of chunks (sent with chunked transfer encoding), to upload
+        :param tags: File tags, defaults to None
         :return: JSON response object
         """
         return self.agent.post(
             f"{self.url}/v2/model/{model_id}/files/upload/simple",
-            params={"name": name},
+            params={"name": name, "tags": tags},
             data=buffer,
             stream=True,
             timeout=10_000,
         )
 
-    # def start_multi_upload(): TBC
+    def start_multi_upload(self, model_id: str, name: str, size: int, mime: str | None = None):
+        """Start a multipart file upload.
 
-    # def finish_multi_upload(): TBC
+        :param model_id: Unique model ID
+        :param name: File name
+        :param size: Total size of the file in bytes
+        :param mime: Mime type of the file, defaults to None
+        :return: JSON response object, containing the file ID and presigned chunk URLs with byte ranges
+        """
+        filtered_json = filter_none({"name": name, "mime": mime, "size": size})
+        return self.agent.post(
+            f"{self.url}/v2/model/{model_id}/files/upload/multipart/start",
+            json=filtered_json,
+        ).json()
+
+    def put_multi_upload_chunk(self, presigned_url: str, data: Any):
+        """Upload a single chunk of a multipart file upload.
+
+        :param presigned_url: Presigned URL of the chunk, as returned by `start_multi_upload`
+        :param data: Chunk contents
+        :return: The ETag of the uploaded chunk
+        """
+        res = self.agent.presigned("PUT", presigned_url, data=data, timeout=10_000)
+        return res.headers.get("ETag")
+
+    def finish_multi_upload(self, model_id: str, file_id: str, parts: list[dict[str, Any]]):
+        """Finish a multipart file upload.
+
+        :param model_id: Unique model ID
+        :param file_id: Unique file ID, as returned by `start_multi_upload`
+        :param parts: Uploaded parts, each with an `ETag` and `PartNumber`
+        :return: JSON response object
+        """
+        return self.agent.post(
+            f"{self.url}/v2/model/{model_id}/files/upload/multipart/finish",
+            json={"fileId": file_id, "parts": parts},
+        ).json()
+
+    def patch_file(
+        self,
+        model_id: str,
+        file_id: str,
+        name: str | None = None,
+        tags: list[str] | None = None,
+        metadata: dict[str, Any] | None = None,
+    ):
+        """Update the name, tags or metadata of a specific file.
+
+        :param model_id: Unique model ID
+        :param file_id: Unique file ID
+        :param name: File name, defaults to None
+        :param tags: File tags, defaults to None
+        :param metadata: File metadata, defaults to None
+        :return: JSON response object
+        """
+        filtered_json = filter_none(
+            {
+                "name": name,
+                "tags": tags,
+                "metadata": metadata,
+            }
+        )
+        return self.agent.patch(
+            f"{self.url}/v2/model/{model_id}/file/{file_id}",
+            json=filtered_json,
+        ).json()
 
     def delete_file(
         self,
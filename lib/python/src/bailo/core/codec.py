@@ -0,0 +1,104 @@
+"""Client-side compression of uploaded files.
+
+Compressed files are sent as a single zstd frame, compressed on the fly on several threads, and tagged with their codec
+(`bailo-codec:zstd`) so that downloads can recognise them and decompress them as they're streamed to disk. Requires
+the optional `zstandard` dependency (`pip install bailo[zstd]`).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+try:
+    import zstandard
+
+    ZSTD = True
+except ImportError:
+    ZSTD = False
+
+# isort: split
+
+from bailo.core.exceptions import BailoException
+
+CODEC_TAG_PREFIX = "bailo-codec:"
+ZSTD_CODEC = "zstd"
+# zstd compression level, trading compression ratio for speed.
+ZSTD_LEVEL = 3
+
+
+def codec_tag(codec: str) -> str:
+    """Return the file tag recording the codec a file was compressed with.
+
+    :param codec: Codec name
+    :return: File tag
+    """
+    return f"{CODEC_TAG_PREFIX}{codec}"
+
+
+def tagged_codec(tags: list[str]) -> str | None:
+    """Return the codec recorded in a file's tags.
+
+    :param tags: File tags
+    :return: Codec name, or None if the file isn't compressed
+    """
+    for tag in tags:
+        if tag.startswith(CODEC_TAG_PREFIX):
+            return tag[len(CODEC_TAG_PREFIX) :]
+    return None
+
+
+def check_codec(codec: str) -> None:
+    """Check that a codec is supported, and its optional dependencies are installed.
+
+    :param codec: Codec name
+    :raises BailoException: If the codec isn't supported
+    :raises ImportError: If the codec's optional dependencies aren't installed
+    """
+    if codec != ZSTD_CODEC:
+        raise BailoException(f"Unsupported codec {codec}.")
+    if not ZSTD:
+        raise ImportError("Optional zstandard dependencies (needed for compression) are not installed.")
+
+
+def compress_chunks(
+    chunks: Iterable[bytes | memoryview], codec: str = ZSTD_CODEC, level: int = ZSTD_LEVEL, threads: int = -1
+) -> Iterator[bytes]:
+    """Compress a stream of chunks into a single frame.
+
+    :param chunks: Iterable of bytes-like chunks
+    :param codec: Codec name, defaults to "zstd"
+    :param level: Compression level, defaults to 3
+    :param threads: Number of compression threads, or -1 for one per CPU, defaults to -1
+    :raises BailoException: If the codec isn't supported
+    :raises ImportError: If the codec's optional dependencies aren't installed
+    :return: Iterator of compressed chunks
+    """
+    check_codec(codec)
+    compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+    return _compress(compressor.compressobj(), chunks)
+
+
+def _compress(compressor, chunks: Iterable[bytes | memoryview]) -> Iterator[bytes]:
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+def decompress_chunks(chunks: Iterable[bytes], codec: str = ZSTD_CODEC) -> Iterator[bytes]:
+    """Decompress a stream of compressed chunks.
+
+    :param chunks: Iterable of compressed chunks
+    :param codec: Codec name, defaults to "zstd"
+    :raises BailoException: If the codec isn't supported
+    :raises ImportError: If the codec's optional dependencies aren't installed
+    :return: Iterator of decompressed chunks
+    """
+    check_codec(codec)
+    return _decompress(zstandard.ZstdDecompressor().decompressobj(), chunks)
+
+
+def _decompress(decompressor, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    for chunk in chunks:
+        if decompressed := decompressor.decompress(chunk):
+            yield decompressed
@@ -0,0 +1,201 @@
+"""Block-level deltas between files.
+
+A delta encodes a file as runs of blocks copied from a base file (e.g. the parent checkpoint, from an earlier release
+of the same model) and literal blocks which differ from it. Blocks are matched at aligned offsets by their SHA-256
+digest, which suits checkpoints whose tensors are updated in place.
+
+A delta is serialised as `DELTA_MAGIC`, the length of its JSON manifest and the manifest itself, followed by the
+literal blocks in file order, so that the file can be reconstructed as the delta is streamed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import struct
+from typing import Any, BinaryIO, Iterable, Iterator
+
+# isort: split
+
+from bailo.core.exceptions import BailoException
+
+# Tag of files uploaded as a delta.
+DELTA_TAG = "bailo-delta"
+DELTA_MAGIC = b"BAILODELTA\x01"
+DELTA_BLOCK_SIZE = 4 * 1024**2
+COPY_BLOCK_SIZE = 1024**2
+
+_HEADER_LENGTH = struct.Struct(">Q")
+
+
+def block_index(path: str, block_size: int = DELTA_BLOCK_SIZE) -> dict[bytes, int]:
+    """Index the blocks of a base file by their digest.
+
+    :param path: Path of the base file
+    :param block_size: Size of the blocks in bytes, defaults to 4MiB
+    :return: Offset of the first block with each SHA-256 digest
+    """
+    index: dict[bytes, int] = {}
+    with open(path, "rb") as f:
+        offset = 0
+        while block := f.read(block_size):
+            index.setdefault(hashlib.sha256(block).digest(), offset)
+            offset += len(block)
+    return index
+
+
+def compute_delta(
+    path: str, base_path: str, block_size: int = DELTA_BLOCK_SIZE, base: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """Compute the manifest of a file's delta against a base file.
+
+    The manifest's `ops` are, in file order, either `["base", offset, length]` to copy a run of the base file, or
+    `["data", length]` for literal data carried in the delta.
+
+    :param path: Path of the file
+    :param base_path: Path of the base file
+    :param block_size: Size of the blocks compared in bytes, defaults to 4MiB
+    :param base: Details of the base file to record in the manifest (e.g. its file ID & digest), defaults to None
+    :return: Delta manifest
+    """
+    index = block_index(base_path, block_size)
+    ops: list[list[Any]] = []
+    sha256 = hashlib.sha256()
+    size = 0
+
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            sha256.update(block)
+            base_offset = index.get(hashlib.sha256(block).digest())
+            if base_offset is None:
+                _append_op(ops, ["data", len(block)])
+            else:
+                _append_op(ops, ["base", base_offset, len(block)])
+            size += len(block)
+
+    return {"base": base or {}, "blockSize": block_size, "size": size, "digest": sha256.hexdigest(), "ops": ops}
+
+
+def _append_op(ops: list[list[Any]], op: list[Any]) -> None:
+    # Coalesce runs of literal data, and runs of contiguous base blocks
+    if ops and ops[-1][0] == op[0]:
+        last = ops[-1]
+        if op[0] == "data":
+            last[1] += op[1]
+            return
+        if last[1] + last[2] == op[1]:
+            last[2] += op[2]
+            return
+    ops.append(op)
+
+
+def literal_size(manifest: dict[str, Any]) -> int:
+    """Return the number of bytes of literal data in a delta.
+
+    :param manifest: Delta manifest
+    :return: Size in bytes
+    """
+    return sum(op[1] for op in manifest["ops"] if op[0] == "data")
+
+
+def delta_chunks(path: str, manifest: dict[str, Any], block_size: int = COPY_BLOCK_SIZE) -> Iterator[bytes]:
+    """Serialise a file's delta.
+
+    :param path: Path of the file
+    :param manifest: Delta manifest, as returned by `compute_delta`
+    :param block_size: Maximum size of the chunks yielded, defaults to 1MiB
+    :raises BailoException: If the file is shorter than when the delta was computed
+    :return: Iterator of the header then the literal data
+    """
+    header = json.dumps(manifest).encode()
+    yield DELTA_MAGIC + _HEADER_LENGTH.pack(len(header)) + header
+
+    offset = 0
+    with open(path, "rb") as f:
+        for op in manifest["ops"]:
+            length = op[-1]
+            if op[0] == "data":
+                f.seek(offset)
+                remaining = length
+                while remaining:
+                    block = f.read(min(block_size, remaining))
+                    if not block:
+                        raise BailoException(f"{path} changed while its delta was being uploaded.")
+                    remaining -= len(block)
+                    yield block
+            offset += length
+
+
+class DeltaReader:
+    """Reconstruct a file from its streamed delta and a local copy of the base file.
+
+    The header is read on construction, so the manifest (and so the base file needed) is known before the literal data
+    is read.
+
+    :param chunks: Iterable of the serialised delta's chunks, e.g. a download response's content
+    :raises BailoException: If the stream isn't a delta
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+        if self._read(len(DELTA_MAGIC)) != DELTA_MAGIC:
+            raise BailoException("File is not a delta.")
+        (length,) = _HEADER_LENGTH.unpack(self._read(_HEADER_LENGTH.size))
+        self.manifest: dict[str, Any] = json.loads(self._read(length))
+
+    def apply(self, base_path: str, out: BinaryIO) -> str:
+        """Write the reconstructed file.
+
+        :param base_path: Path of the base file
+        :param out: File object to write the reconstructed file to
+        :raises BailoException: If the delta or base file is truncated, or the result doesn't match the manifest digest
+        :return: SHA-256 hex digest of the reconstructed file
+        """
+        sha256 = hashlib.sha256()
+
+        with open(base_path, "rb") as base:
+            for op in self.manifest["ops"]:
+                if op[0] == "base":
+                    blocks = self._read_base(base, op[1], op[2])
+                else:
+                    blocks = self._iter_exact(op[1])
+
+                for block in blocks:
+                    out.write(block)
+                    sha256.update(block)
+
+        digest = sha256.hexdigest()
+        if digest != self.manifest["digest"]:
+            raise BailoException(
+                f"Reconstructed file failed verification (expected SHA-256 {self.manifest['digest']}, got {digest})."
+            )
+        return digest
+
+    @staticmethod
+    def _read_base(base: BinaryIO, offset: int, length: int) -> Iterator[bytes]:
+        base.seek(offset)
+        while length:
+            block = base.read(min(COPY_BLOCK_SIZE, length))
+            if not block:
+                raise BailoException("Base file is shorter than the delta expects.")
+            length -= len(block)
+            yield block
+
+    def _next_chunk(self) -> bytes:
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        raise BailoException("Delta ended early.")
+
+    def _iter_exact(self, length: int) -> Iterator[bytes]:
+        while length:
+            if not self._buffer:
+                self._buffer = self._next_chunk()
+            block, self._buffer = self._buffer[:length], self._buffer[length:]
+            length -= len(block)
+            yield block
+
+    def _read(self, length: int) -> bytes:
+        return b"".join(self._iter_exact(length))
@@ -0,0 +1,179 @@
+"""Content digests of uploaded files.
+
+Uploaded files are tagged with their SHA-256 digest (`sha256:<hex digest>`), computed as the data is sent, so that
+downloads can be verified and later uploads of identical content to the same model can reuse the existing file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import mmap
+import threading
+from typing import Any, BinaryIO, Union
+
+# isort: split
+
+from bailo.core.client import Client
+
+DIGEST_TAG_PREFIX = "sha256:"
+HASH_BLOCK_SIZE = 8 * 1024**2
+
+
+def digest_tag(digest: str) -> str:
+    """Return the file tag recording a SHA-256 digest.
+
+    :param digest: SHA-256 hex digest
+    :return: File tag
+    """
+    return f"{DIGEST_TAG_PREFIX}{digest}"
+
+
+def tagged_digest(tags: list[str]) -> str | None:
+    """Return the SHA-256 digest recorded in a file's tags.
+
+    :param tags: File tags
+    :return: SHA-256 hex digest, or None if no digest is recorded
+    """
+    for tag in tags:
+        if tag.startswith(DIGEST_TAG_PREFIX):
+            return tag[len(DIGEST_TAG_PREFIX) :]
+    return None
+
+
+def sha256_file(path: str) -> str:
+    """Compute the SHA-256 digest of a file.
+
+    :param path: Path of the file
+    :return: Hex digest
+    """
+    with open(path, "rb") as f:
+        return sha256_data(f)
+
+
+def sha256_data(data: BinaryIO | Union[bytes, bytearray, memoryview]) -> str:
+    """Compute the SHA-256 digest of a bytes-like object, or the rest of a seekable file object.
+
+    Files are memory mapped where possible. The file position is left unchanged.
+
+    :param data: Bytes-like object, or seekable file object
+    :return: Hex digest
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        # hashlib releases the GIL while hashing large buffers
+        return hashlib.sha256(data).hexdigest()
+
+    if isinstance(data, io.BytesIO):
+        with data.getbuffer() as buffer:
+            return hashlib.sha256(buffer[data.tell() :]).hexdigest()
+
+    position = data.tell()
+    try:
+        with mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(memoryview(mapped)[position:]).hexdigest()
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation, BufferError):
+        pass
+
+    digest = hashlib.sha256()
+    try:
+        while block := data.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    finally:
+        data.seek(position)
+    return digest.hexdigest()
+
+
+class OrderedHasher:
+    """SHA-256 of data which arrives out of order, such as concurrently transferred chunks.
+
+    Each block is hashed as soon as every block before it has arrived. Blocks which arrive early are held until then,
+    so blocks should be added in roughly ascending order to bound memory use.
+    """
+
+    def __init__(self) -> None:
+        self._digest = hashlib.sha256()
+        self._lock = threading.Lock()
+        self._pending: dict[int, bytes | memoryview] = {}
+        self.offset = 0
+
+    def add(self, offset: int, data: bytes | memoryview) -> None:
+        """Add a block of data.
+
+        :param offset: Offset of the block
+        :param data: Contents of the block
+        """
+        with self._lock:
+            if offset < self.offset:
+                # Already hashed, e.g. a retried chunk
+                return
+            self._pending[offset] = data
+            while self.offset in self._pending:
+                block = self._pending.pop(self.offset)
+                self._digest.update(block)
+                self.offset += len(block)
+
+    def hexdigest(self) -> str:
+        """Return the digest of the data hashed so far.
+
+        :return: Hex digest
+        """
+        with self._lock:
+            return self._digest.hexdigest()
+
+
+class FileIndex:
+    """Index of a model's files by content digest, to find files which don't need uploading again.
+
+    :param files: File objects, as returned by `Client.get_files`
+    """
+
+    def __init__(self, files: list[dict[str, Any]]) -> None:
+        self._files: dict[tuple[str, str, int | None], str] = {}
+        self._candidates: set[tuple[str, int | None]] = set()
+
+        for file in files:
+            digest = tagged_digest(file.get("tags") or [])
+            # Incomplete (e.g. abandoned multipart) uploads can't be reused
+            if digest is not None and file.get("complete", True):
+                self.add(digest, file["name"], file.get("size"), file["id"])  # type: ignore[reportArgumentType]
+
+    @classmethod
+    def for_model(cls, client: Client, model_id: str) -> FileIndex:
+        """Index the files already uploaded to a model.
+
+        :param client: A client object used to interact with Bailo
+        :param model_id: A unique model ID
+        :return: A file index
+        """
+        return cls(client.get_files(model_id)["files"])
+
+    def has_candidate(self, name: str, size: int) -> bool:
+        """Check whether there's an existing file with the same name and size, which is worth hashing the contents to
+        compare against.
+
+        :param name: File name
+        :param size: Size of the contents in bytes
+        :return: True if there's at least one candidate file
+        """
+        return (name, size) in self._candidates
+
+    def find(self, digest: str, name: str, size: int) -> str | None:
+        """Find an existing file with the same contents and name.
+
+        :param digest: SHA-256 hex digest of the contents
+        :param name: File name
+        :param size: Size of the contents in bytes
+        :return: The unique file ID of the existing file, or None if there isn't one
+        """
+        return self._files.get((digest, name, size))
+
+    def add(self, digest: str, name: str, size: int, file_id: str) -> None:
+        """Record a newly uploaded file.
+
+        :param digest: SHA-256 hex digest of the contents
+        :param name: File name
+        :param size: Size of the contents in bytes
+        :param file_id: The unique file ID
+        """
+        self._files[(digest, name, size)] = file_id
+        self._candidates.add((name, size))
@@ -0,0 +1,804 @@
+"""Parallel, resumable range request downloads.
+
+Files are split into byte ranges which are fetched concurrently over the agent's pooled connections and written
+straight into place in a preallocated file. The range size adapts to the measured throughput, so that each request is
+long enough to amortise its latency. Servers which don't support range requests are read in a single stream.
+
+Downloads are written to a `.partial` file alongside a record of the completed ranges, so that an interrupted download
+can be continued by requesting only the missing bytes. The partial file is renamed into place once complete. Reads
+of the response bodies can be throttled with a `RateLimiter`.
+
+The SHA-256 digest of the file is computed during the download (inline for streams, and from the page cache as the
+contiguous prefix of the file grows for range downloads), and can be verified before the file is moved into place.
+
+`BufferDownload` instead reads a file straight into a preallocated in-memory buffer, with no file on disk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
+
+from requests import Response
+
+# isort: split
+
+from bailo.core.exceptions import BailoException, RangesNotSupported, ResponseException
+from bailo.core.ratelimit import RateLimiter
+from bailo.core.utils import DEFAULT_CONCURRENCY, atomic_write_json
+
+# Files of at least this size are downloaded with range requests, where supported.
+RANGE_THRESHOLD = 64 * 1024**2
+MIN_CHUNK_SIZE = 8 * 1024**2
+MAX_CHUNK_SIZE = 256 * 1024**2
+# Range sizes are adapted so that each request takes roughly this long.
+TARGET_CHUNK_SECONDS = 2.0
+STREAM_BLOCK_SIZE = 1024**2
+MAX_RANGE_RETRIES = 3
+RETRY_BACKOFF = 0.5
+PARTIAL_SUFFIX = ".partial"
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[["tuple[int, int] | None"], Response]
+
+
+class PositionalWriter:
+    """Thread-safe writes at absolute offsets of a file.
+
+    Uses `os.pwrite` where available, so concurrent writers don't share a file position. Otherwise writes are
+    serialised behind a lock.
+
+    :param f: Writable file object
+    """
+
+    def __init__(self, f: BinaryIO) -> None:
+        self.f = f
+        self._lock = threading.Lock()
+        self._fd = f.fileno() if hasattr(os, "pwrite") else None
+
+    def write_at(self, offset: int, data: bytes | memoryview) -> None:
+        """Write data at the given offset.
+
+        :param offset: Offset to write at
+        :param data: Data to write
+        """
+        if self._fd is not None:
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(self._fd, view, offset)
+                view = view[written:]
+                offset += written
+            return
+
+        with self._lock:
+            self.f.seek(offset)
+            self.f.write(data)
+            # Written data must be visible to other readers of the file, e.g. to hash it
+            self.f.flush()
+
+
+def supports_ranges(res: Response) -> bool:
+    """Whether a response advertises support for byte range requests.
+
+    :param res: Response object
+    :return: True if byte ranges are supported
+    """
+    return (
+        res.headers.get("Accept-Ranges", "").lower() == "bytes"
+        and "content-length" in res.headers
+        and not _content_encoded(res)
+    )
+
+
+class RangeFile(io.RawIOBase):
+    """Seekable, read only file object over a remote file, reading each read's bytes with a range request.
+
+    Wrap it in an `io.BufferedReader` with a large `buffer_size`, so that small reads are served from one larger
+    range request (e.g. when `zipfile` reads an archive).
+
+    :param fetch: Callable sending the download request, given an inclusive byte range
+    :param size: Size of the file in bytes
+    :param limiter: Rate limiter to throttle the reads with, defaults to None
+    """
+
+    def __init__(self, fetch: Fetch, size: int, limiter: RateLimiter | None = None) -> None:
+        super().__init__()
+        self.fetch = fetch
+        self.size = size
+        self.limiter = limiter
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer: Any) -> int:
+        end = min(self._position + len(buffer), self.size)
+        if self._position >= end:
+            return 0
+
+        res = self.fetch((self._position, end - 1))
+        try:
+            if res.status_code != 206:
+                raise RangesNotSupported()
+            data = res.content
+        finally:
+            res.close()
+        if len(data) != end - self._position:
+            raise ResponseException(f"Range request returned {len(data)} of {end - self._position} bytes")
+
+        if self.limiter is not None:
+            self.limiter.acquire(len(data))
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class PartialDownload:
+    """Sidecar record of the completed byte ranges of a download in progress.
+
+    The record is stored next to the `.partial` file, and is only trusted if the server's response still has the same
+    size and validators (`ETag` and `Last-Modified`, where given).
+
+    :param path: Final path of the file being downloaded
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.partial_path = path + PARTIAL_SUFFIX
+        self.record_path = self.partial_path + ".json"
+        self._lock = threading.Lock()
+
+        self.size: int | None = None
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self.ranges: list[list[int]] = []
+
+        try:
+            with open(self.record_path) as f:
+                record = json.load(f)
+            self.size = record["size"]
+            self.etag = record["etag"]
+            self.last_modified = record["lastModified"]
+            self.ranges = record["ranges"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError):
+            logger.warning("Ignoring corrupt partial download record %s.", self.record_path)
+
+    def matches(self, res: Response) -> bool:
+        """Whether the partial download can be resumed from a response.
+
+        The partial file of a range download is preallocated to the full size, while that of an interrupted single
+        stream is only as long as the data written, so it's enough for the file to hold every recorded range.
+
+        :param res: Response to a download request for the file
+        :return: True if the size and validators match and the partial file is intact
+        """
+        return (
+            bool(self.ranges)
+            and self.size == _content_length(res)
+            and self.etag == res.headers.get("ETag")
+            and self.last_modified == res.headers.get("Last-Modified")
+            and os.path.isfile(self.partial_path)
+            and max(end for _, end in self.ranges) <= os.path.getsize(self.partial_path) <= self.size  # type: ignore[reportOperatorIssue]
+        )
+
+    def reset(self, res: Response) -> None:
+        """Start a new partial download record from a response.
+
+        :param res: Response to a download request for the file
+        """
+        with self._lock:
+            self.size = _content_length(res)
+            self.etag = res.headers.get("ETag")
+            self.last_modified = res.headers.get("Last-Modified")
+            self.ranges = []
+            self._save()
+
+    def add_range(self, start: int, end: int) -> None:
+        """Record a completed range, merging it with any adjacent ranges.
+
+        :param start: First byte offset
+        :param end: Offset after the last byte
+        """
+        with self._lock:
+            self.ranges = _merge_range(self.ranges, start, end)
+            self._save()
+
+    def missing(self) -> list[tuple[int, int]]:
+        """Return the ranges which have not been downloaded.
+
+        :return: List of (start, exclusive end) ranges
+        """
+        missing = []
+        offset = 0
+        for start, end in sorted(self.ranges):
+            if start > offset:
+                missing.append((offset, start))
+            offset = max(offset, end)
+        if self.size is not None and offset < self.size:
+            missing.append((offset, self.size))
+        return missing
+
+    @property
+    def completed(self) -> int:
+        """Number of bytes downloaded."""
+        return sum(end - start for start, end in self.ranges)
+
+    def finish(self) -> None:
+        """Validate the partial file and atomically move it into place.
+
+        :raises BailoException: If the partial file is incomplete
+        """
+        actual_size = os.path.getsize(self.partial_path)
+        if self.size is not None and (actual_size != self.size or self.missing()):
+            raise BailoException(f"Download of {self.path} is incomplete ({actual_size} of {self.size} bytes).")
+
+        os.replace(self.partial_path, self.path)
+        self.discard_record()
+
+    def discard_record(self) -> None:
+        """Remove the record of the partial download."""
+        try:
+            os.remove(self.record_path)
+        except FileNotFoundError:
+            pass
+
+    def _save(self) -> None:
+        record = {"size": self.size, "etag": self.etag, "lastModified": self.last_modified, "ranges": self.ranges}
+        atomic_write_json(self.record_path, record)
+
+
+def _content_length(res: Response) -> int | None:
+    # The Content-Length of a content encoded (e.g. gzip) response is its encoded size, not the file's
+    if "content-length" not in res.headers or _content_encoded(res):
+        return None
+    return int(res.headers["content-length"])
+
+
+def _content_encoded(res: Response) -> bool:
+    return res.headers.get("Content-Encoding", "identity").lower() != "identity"
+
+
+def _merge_range(ranges: list[list[int]], start: int, end: int) -> list[list[int]]:
+    merged: list[list[int]] = []
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
+
+
+def _complement(pending: list[tuple[int, int]], size: int) -> list[list[int]]:
+    completed: list[list[int]] = []
+    offset = 0
+    for start, end in sorted(pending):
+        if start > offset:
+            completed.append([offset, start])
+        offset = max(offset, end)
+    if offset < size:
+        completed.append([offset, size])
+    return completed
+
+
+class RangeDownload:
+    """Download a file over several pooled connections using HTTP range requests.
+
+    :param fetch: Callable sending the download request, given an optional inclusive byte range
+    :param path: Local path to write the file to
+    :param concurrency: Number of ranges fetched at once, defaults to 8
+    :param callback: Called with the number of bytes written as the download progresses, defaults to None
+    :param range_threshold: Minimum size in bytes for a range download, defaults to 64MiB
+    :param resume: Download via a `.partial` file which a later download can continue from, defaults to True
+    :param expected_digest: SHA-256 hex digest to verify the file against, defaults to None
+    :param limiter: Rate limiter to throttle the download with, defaults to None
+    :param decode: Callable decoding the stream of response chunks (e.g. decompressing it) before it's written, in
+        which case the file is downloaded in a single stream and the digest is of the encoded data, defaults to None
+    """
+
+    def __init__(
+        self,
+        fetch: Fetch,
+        path: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        callback: Callable[[int], Any] | None = None,
+        range_threshold: int = RANGE_THRESHOLD,
+        resume: bool = True,
+        expected_digest: str | None = None,
+        limiter: RateLimiter | None = None,
+        decode: Callable[[Iterable[bytes]], Iterable[bytes]] | None = None,
+    ) -> None:
+        self.fetch = fetch
+        self.path = path
+        self.concurrency = concurrency
+        self.callback = callback
+        self.range_threshold = range_threshold
+        self.resume = resume
+        self.expected_digest = expected_digest
+        self.limiter = limiter
+        self.decode = decode
+
+        self.chunk_size = MIN_CHUNK_SIZE
+        self.partial: PartialDownload | None = None
+        # SHA-256 hex digest of the downloaded file
+        self.digest: str | None = None
+        self._pending: list[tuple[int, int]] = []
+        self._lock = threading.Lock()
+
+        self._hash_lock = threading.Lock()
+        self._hash_file: BinaryIO | None = None
+        self._hashed = 0
+        self._sha256 = hashlib.sha256()
+        self._completed: list[list[int]] = []
+        # Whether the download is written to a `.partial` file (without a record to resume from) then moved into place
+        self._staged = False
+
+    @property
+    def target_path(self) -> str:
+        """Path the download is written to before being moved into place."""
+        if self.partial is not None:
+            return self.partial.partial_path
+        if self._staged:
+            return self.path + PARTIAL_SUFFIX
+        return self.path
+
+    def download(self, res: Response | None = None) -> Response:
+        """Download the file to disk, continuing any matching partial download.
+
+        :param res: The (streamed) response to the initial download request, defaults to None
+        :return: The initial response object
+        """
+        if res is None:
+            res = self.fetch(None)
+
+        if self.decode is not None or not self.resume:
+            # Downloads which can't be resumed are still written to a `.partial` file and moved into place, so an
+            # interrupted download never looks complete, and the file at path (which may be linked to other copies) is
+            # never truncated
+            self._staged = True
+            try:
+                return self._download(res)
+            except BaseException:
+                self._discard_staged()
+                raise
+
+        return self._download(res)
+
+    def _download(self, res: Response) -> Response:
+        if self.decode is not None:
+            # Decoded offsets don't line up with the ranges received, so encoded files can't be fetched in ranges or
+            # resumed
+            self.download_stream(res)
+            self._finish()
+            return res
+
+        size = _content_length(res)
+        ranged = size is not None and supports_ranges(res)
+
+        resumed = False
+        if self.resume:
+            self.partial = PartialDownload(self.path)
+            resumed = ranged and self.partial.matches(res)
+            if resumed:
+                logger.info("Resuming download of %s from %d of %d bytes.", self.path, self.partial.completed, size)
+                self._progress(self.partial.completed)
+            else:
+                self.partial.reset(res)
+
+        if resumed or (ranged and self.concurrency > 1 and size >= self.range_threshold):  # type: ignore[reportOperatorIssue]
+            # Drop the full body stream, the ranges are fetched on separate connections
+            res.close()
+            try:
+                pending = self.partial.missing() if resumed else [(0, size)]  # type: ignore[reportOptionalMemberAccess]
+                self.download_ranges(size, pending)  # type: ignore[reportArgumentType]
+                self._finish()
+                return res
+            except RangesNotSupported:
+                logger.info("Server ignored range request for %s, falling back to a single stream.", self.path)
+                res = self.fetch(None)
+                if self.partial is not None:
+                    self.partial.reset(res)
+
+        self.download_stream(res)
+        self._finish()
+
+        return res
+
+    def download_stream(self, res: Response) -> None:
+        """Write a response body to disk in a single stream.
+
+        :param res: Streamed response object
+        """
+        offset = 0
+        recorded = 0
+        sha256 = hashlib.sha256()
+
+        def received() -> Iterator[bytes]:
+            for data in self._iter_content(res):
+                sha256.update(data)
+                self._progress(len(data))
+                yield data
+
+        blocks = received() if self.decode is None else self.decode(received())
+
+        with open(self.target_path, "wb") as f:
+            try:
+                for data in blocks:
+                    f.write(data)
+                    offset += len(data)
+
+                    if self.partial is not None and offset - recorded >= MIN_CHUNK_SIZE:
+                        f.flush()
+                        self.partial.add_range(recorded, offset)
+                        recorded = offset
+            finally:
+                # Recorded even if the stream is interrupted, so a rerun resumes from the end of the data written
+                if self.partial is not None and offset > recorded:
+                    f.flush()
+                    self.partial.add_range(recorded, offset)
+
+        self.digest = sha256.hexdigest()
+
+    def download_ranges(self, size: int, pending: list[tuple[int, int]]) -> None:
+        """Fetch the given ranges of the file concurrently, writing them into place in a preallocated file.
+
+        :param size: Size of the file in bytes
+        :param pending: (start, exclusive end) ranges to fetch
+        :raises RangesNotSupported: If the server ignores a range request
+        :raises BailoException: If any range fails to download after retrying
+        """
+        self._pending = sorted(pending, reverse=True)
+        self._completed = _complement(pending, size)
+        self._hashed = 0
+        self._sha256 = hashlib.sha256()
+
+        # A partial file (preallocated, or the prefix written by an interrupted stream) is extended in place
+        mode = "r+b" if os.path.isfile(self.target_path) else "wb"
+        with open(self.target_path, mode) as f:
+            f.truncate(size)
+            writer = PositionalWriter(f)
+
+            self._hash_file = open(self.target_path, "rb")  # type: ignore[reportAttributeAccessIssue]
+            try:
+                with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bailo-download") as executor:
+                    futures = [executor.submit(self._worker, writer) for _ in range(self.concurrency)]
+                    errors = []
+                    for future in futures:
+                        try:
+                            future.result()
+                        except (BailoException, ResponseException, OSError) as ex:
+                            errors.append(str(ex))
+
+                if errors:
+                    raise BailoException(f"Download of {self.path} failed ({'; '.join(errors)}).")
+
+                self._advance_digest(blocking=True)
+            finally:
+                self._hash_file.close()  # type: ignore[reportOptionalMemberAccess]
+                self._hash_file = None
+
+        if self._hashed == size:
+            self.digest = self._sha256.hexdigest()
+
+    def next_range(self) -> tuple[int, int] | None:
+        """Claim the next range to fetch, sized by the current chunk size.
+
+        :return: Inclusive byte range, or None if all pending ranges have been claimed
+        """
+        with self._lock:
+            if not self._pending:
+                return None
+            start, end = self._pending.pop()
+            if end - start > self.chunk_size:
+                self._pending.append((start + self.chunk_size, end))
+                end = start + self.chunk_size
+            return start, end - 1
+
+    def report(self, nbytes: int, seconds: float) -> None:
+        """Adapt the chunk size to a measured range throughput.
+
+        :param nbytes: Bytes fetched
+        :param seconds: Time taken to fetch them
+        """
+        if seconds <= 0:
+            return
+
+        target = int(nbytes / seconds * TARGET_CHUNK_SECONDS)
+        with self._lock:
+            self.chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, target))
+
+    def fetch_range(self, writer: PositionalWriter, byte_range: tuple[int, int]) -> None:
+        """Fetch a single range into place, retrying with backoff on failure.
+
+        :param writer: Writer for the destination file
+        :param byte_range: Inclusive byte range to fetch
+        """
+        start, end = byte_range
+
+        for attempt in range(MAX_RANGE_RETRIES + 1):
+            try:
+                started = time.monotonic()
+                res = self.fetch((start, end))
+                if res.status_code != 206:
+                    res.close()
+                    raise RangesNotSupported()
+
+                for data in self._iter_content(res):
+                    writer.write_at(start, data)
+                    start += len(data)
+                    self._progress(len(data))
+
+                if start != end + 1:
+                    raise ResponseException(f"Range of {self.path} ended early at byte {start} of {end + 1}")
+
+                if self.partial is not None:
+                    self.partial.add_range(byte_range[0], end + 1)
+                self._complete_range(byte_range[0], end + 1)
+
+                self.report(end + 1 - byte_range[0], time.monotonic() - started)
+                return
+            except (ResponseException, OSError) as ex:
+                if attempt == MAX_RANGE_RETRIES:
+                    raise
+                logger.warning("Range %d-%d of %s failed (%s), retrying...", start, end, self.path, ex)
+                time.sleep(RETRY_BACKOFF * 2**attempt)
+
+    def _finish(self) -> None:
+        if self.expected_digest is not None and self.digest != self.expected_digest:
+            # Never move corrupt data into place, or leave it to be resumed from
+            os.remove(self.target_path)
+            if self.partial is not None:
+                self.partial.discard_record()
+            raise BailoException(
+                f"Download of {self.path} failed verification (expected SHA-256 {self.expected_digest}, got {self.digest})."
+            )
+
+        if self.partial is not None:
+            self.partial.finish()
+        elif self._staged:
+            os.replace(self.target_path, self.path)
+
+    def _discard_staged(self) -> None:
+        try:
+            os.remove(self.target_path)
+        except FileNotFoundError:
+            pass
+
+    def _complete_range(self, start: int, end: int) -> None:
+        with self._lock:
+            self._completed = _merge_range(self._completed, start, end)
+        self._advance_digest()
+
+    def _advance_digest(self, blocking: bool = False) -> None:
+        # Hash the contiguous prefix of the file written so far. Its pages were just written, so are read back from
+        # the page cache rather than the disk. Only one thread hashes at a time, others carry on downloading.
+        if self._hash_file is None or not self._hash_lock.acquire(blocking=blocking):
+            return
+
+        try:
+            while True:
+                with self._lock:
+                    prefix = self._completed[0][1] if self._completed and self._completed[0][0] == 0 else 0
+                if self._hashed >= prefix:
+                    return
+
+                self._hash_file.seek(self._hashed)
+                while self._hashed < prefix:
+                    block = self._hash_file.read(min(STREAM_BLOCK_SIZE, prefix - self._hashed))
+                    if not block:
+                        return
+                    self._sha256.update(block)
+                    self._hashed += len(block)
+        finally:
+            self._hash_lock.release()
+
+    def _iter_content(self, res: Response) -> Iterator[bytes]:
+        chunks = res.iter_content(STREAM_BLOCK_SIZE)
+        if self.limiter is None:
+            return chunks
+        # Reading slower applies TCP backpressure, throttling the sender
+        return self.limiter.throttle(chunks)
+
+    def _worker(self, writer: PositionalWriter) -> None:
+        while (byte_range := self.next_range()) is not None:
+            self.fetch_range(writer, byte_range)
+
+    def _progress(self, nbytes: int) -> None:
+        if self.callback is not None:
+            with self._lock:
+                self.callback(nbytes)
+
+
+class BufferDownload:
+    """Download a file into a preallocated buffer in memory, optionally over several connections with range requests.
+
+    The buffer is sized from the response's `Content-Length`, and response bodies are read straight into slices of it.
+
+    :param fetch: Callable sending the download request, given an optional inclusive byte range
+    :param concurrency: Number of ranges fetched at once, defaults to 8
+    :param callback: Called with the number of bytes read as the download progresses, defaults to None
+    :param range_threshold: Minimum size in bytes for a range download, defaults to 64MiB
+    :param expected_digest: SHA-256 hex digest to verify the data against, defaults to None
+    :param limiter: Rate limiter to throttle the download with, defaults to None
+    :param decode: Callable decoding the stream of response chunks (e.g. decompressing it), in which case the decoded
+        size isn't known up front so the buffer is grown as the data is decoded, defaults to None
+    """
+
+    def __init__(
+        self,
+        fetch: Fetch,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        callback: Callable[[int], Any] | None = None,
+        range_threshold: int = RANGE_THRESHOLD,
+        expected_digest: str | None = None,
+        limiter: RateLimiter | None = None,
+        decode: Callable[[Iterable[bytes]], Iterable[bytes]] | None = None,
+    ) -> None:
+        self.fetch = fetch
+        self.concurrency = concurrency
+        self.callback = callback
+        self.range_threshold = range_threshold
+        self.expected_digest = expected_digest
+        self.limiter = limiter
+        self.decode = decode
+
+        # SHA-256 hex digest of the downloaded (encoded) data
+        self.digest: str | None = None
+        self._lock = threading.Lock()
+
+    def download(self, res: Response | None = None) -> memoryview:
+        """Download the file into memory.
+
+        :param res: The (streamed) response to the initial download request, defaults to None
+        :raises BailoException: If the download fails, or the data doesn't match the expected digest
+        :raises ResponseException: If the response ends before its `Content-Length`
+        :return: View of the buffer holding the file
+        """
+        if res is None:
+            res = self.fetch(None)
+
+        size = _content_length(res)
+        if self.decode is not None or size is None:
+            view = self.download_decoded(res)
+        else:
+            buffer = memoryview(bytearray(size))
+            sha256 = None
+            if supports_ranges(res) and self.concurrency > 1 and size >= self.range_threshold:
+                # Drop the full body stream, the ranges are fetched on separate connections
+                res.close()
+                try:
+                    self.download_ranges(buffer)
+                except RangesNotSupported:
+                    logger.info("Server ignored range request, falling back to a single stream.")
+                    res = self.fetch(None)
+                    sha256 = hashlib.sha256()
+                    self._read_into(res, buffer, sha256)
+            else:
+                sha256 = hashlib.sha256()
+                self._read_into(res, buffer, sha256)
+
+            # Ranges arrive out of order, so are hashed once complete (from memory)
+            self.digest = (sha256 or hashlib.sha256(buffer)).hexdigest()
+            view = buffer
+
+        if self.expected_digest is not None and self.digest != self.expected_digest:
+            raise BailoException(
+                f"Download failed verification (expected SHA-256 {self.expected_digest}, got {self.digest})."
+            )
+        return view
+
+    def download_decoded(self, res: Response) -> memoryview:
+        """Read and decode a response body of unknown decoded size into a growing buffer.
+
+        :param res: Streamed response object
+        :return: View of the buffer holding the decoded data
+        """
+        buffer = bytearray()
+        sha256 = hashlib.sha256()
+
+        def received() -> Iterator[bytes]:
+            chunks = res.iter_content(STREAM_BLOCK_SIZE)
+            for data in chunks if self.limiter is None else self.limiter.throttle(chunks):
+                sha256.update(data)
+                self._progress(len(data))
+                yield data
+
+        for data in received() if self.decode is None else self.decode(received()):
+            buffer += data
+
+        self.digest = sha256.hexdigest()
+        return memoryview(buffer)
+
+    def download_ranges(self, buffer: memoryview) -> None:
+        """Fetch the file in ranges concurrently, reading each into its slice of the buffer.
+
+        :param buffer: Buffer the size of the file
+        :raises RangesNotSupported: If the server ignores a range request
+        :raises BailoException: If any range fails to download after retrying
+        """
+        size = len(buffer)
+        chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, -(-size // self.concurrency)))
+        ranges = [(start, min(start + chunk_size, size) - 1) for start in range(0, size, chunk_size)]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bailo-download") as executor:
+            futures = [executor.submit(self.fetch_range, buffer, byte_range) for byte_range in ranges]
+            errors = []
+            for future in futures:
+                try:
+                    future.result()
+                except (BailoException, ResponseException, OSError) as ex:
+                    errors.append(str(ex))
+
+        if errors:
+            raise BailoException(f"Download failed ({'; '.join(errors)}).")
+
+    def fetch_range(self, buffer: memoryview, byte_range: tuple[int, int]) -> None:
+        """Fetch a single range into its slice of the buffer, retrying with backoff on failure.
+
+        :param buffer: Buffer the size of the file
+        :param byte_range: Inclusive byte range to fetch
+        """
+        start, end = byte_range
+
+        for attempt in range(MAX_RANGE_RETRIES + 1):
+            try:
+                res = self.fetch((start, end))
+                if res.status_code != 206:
+                    res.close()
+                    raise RangesNotSupported()
+                self._read_into(res, buffer[start : end + 1])
+                return
+            except (ResponseException, OSError) as ex:
+                if attempt == MAX_RANGE_RETRIES:
+                    raise
+                logger.warning("Range %d-%d failed (%s), retrying...", start, end, ex)
+                time.sleep(RETRY_BACKOFF * 2**attempt)
+
+    def _read_into(self, res: Response, buffer: memoryview, sha256: Any = None) -> None:
+        # Reads the raw stream, without content decoding: content encoded responses have no usable Content-Length, so
+        # are read by `download_decoded` instead
+        offset = 0
+        try:
+            while offset < len(buffer):
+                view = buffer[offset : offset + STREAM_BLOCK_SIZE]
+                if self.limiter is not None:
+                    self.limiter.acquire(len(view))
+                nbytes = res.raw.readinto(view)
+                if not nbytes:
+                    raise ResponseException(f"Response ended early at byte {offset} of {len(buffer)}")
+                if sha256 is not None:
+                    sha256.update(view[:nbytes])
+                offset += nbytes
+                self._progress(nbytes)
+        finally:
+            res.close()
+
+    def _progress(self, nbytes: int) -> None:
+        if self.callback is not None:
+            with self._lock:
+                self.callback(nbytes)
@@ -7,3 +7,11 @@ class BailoException(Exception):
 
 class ResponseException(Exception):
     """Exception used if an endpoint gave no response."""
+
+
+class PresignedUrlExpired(ResponseException):
+    """Exception used if a presigned URL is rejected, as its signature has expired."""
+
+
+class RangesNotSupported(Exception):
+    """Exception used if a server ignores a range request, answering with the whole file."""
@@ -0,0 +1,111 @@
+"""Bandwidth shaping for file transfers.
+
+A `RateLimiter` is a token bucket shared between all of an agent's transfer workers, capping their combined upload &
+download rate in bytes per second. Callers queue for tokens by `Priority`, so that interactive requests (such as
+metadata calls) are served ahead of any queued bulk transfer chunks.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from enum import IntEnum
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T", bytes, memoryview)
+
+
+class Priority(IntEnum):
+    """Priority class of rate limited traffic. Lower values are served first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of bytes transferred, shared between threads.
+
+    Tokens accrue at `rate` per second, up to `burst`. Requests larger than `burst` are granted in `burst` sized
+    pieces, so a large transfer chunk can't hold up higher priority traffic for longer than one piece.
+
+    >>> agent = Agent(rate_limiter=RateLimiter(50 * 1024**2))
+
+    :param rate: Maximum sustained rate in bytes per second
+    :param burst: Maximum number of bytes granted at once after an idle period, defaults to one second's worth
+    """
+
+    def __init__(self, rate: float, burst: int | None = None) -> None:
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        self._waiters: list[tuple[int, int]] = []
+        self._counter = itertools.count()
+
+    def __getstate__(self):
+        return {"rate": self.rate, "burst": self.burst}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def acquire(self, nbytes: int, priority: Priority = Priority.BULK) -> None:
+        """Block until `nbytes` may be transferred.
+
+        :param nbytes: Number of bytes to transfer
+        :param priority: Priority class of the transfer, defaults to Priority.BULK
+        """
+        while nbytes > 0:
+            amount = min(nbytes, self.burst)
+            self._acquire(amount, priority)
+            nbytes -= amount
+
+    def throttle(self, chunks: Iterable[T], priority: Priority = Priority.BULK) -> Iterator[T]:
+        """Rate limit an iterable of chunks, acquiring the size of each chunk before it is yielded.
+
+        :param chunks: Iterable of bytes-like chunks
+        :param priority: Priority class of the transfer, defaults to Priority.BULK
+        :return: Iterator of the same chunks
+        """
+        for chunk in chunks:
+            self.acquire(len(chunk), priority)
+            yield chunk
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _acquire(self, amount: int, priority: Priority) -> None:
+        ticket = (int(priority), next(self._counter))
+
+        with self._condition:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] != ticket:
+                        # Wait for the callers ahead in the queue to be served
+                        self._condition.wait()
+                    elif self._tokens < amount:
+                        self._condition.wait((amount - self._tokens) / self.rate)
+                    else:
+                        break
+            except BaseException:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+                raise
+
+            heapq.heappop(self._waiters)
+            self._tokens -= amount
+            self._condition.notify_all()
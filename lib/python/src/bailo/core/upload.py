@@ -0,0 +1,633 @@
+"""Parallel, resumable multipart uploads.
+
+Large files are uploaded in chunks to the presigned URLs returned by `Client.start_multi_upload`. Chunks are read with
+positional reads and uploaded concurrently from a worker pool, with each failed chunk retried independently.
+Acknowledged chunks can be recorded in an `UploadJournal`, so that an interrupted upload of the same file can be
+resumed without re-sending them. If the journal's presigned URLs have expired by then, the upload is started again
+with fresh ones.
+
+Single request uploads send an `UploadBody`, which hands out slices of a buffer or memory mapped file without copying.
+Every upload computes the SHA-256 digest of the data as it is sent, and is throttled by the agent's `RateLimiter` if
+it has one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Union
+
+# isort: split
+
+from bailo.core.client import Client
+from bailo.core.digest import OrderedHasher
+from bailo.core.exceptions import BailoException, PresignedUrlExpired, ResponseException
+from bailo.core.ratelimit import RateLimiter
+from bailo.core.utils import DEFAULT_CONCURRENCY, atomic_write_json
+
+# Files of at least this size are uploaded with a multipart upload.
+MULTIPART_THRESHOLD = 1024**3
+MAX_CHUNK_RETRIES = 3
+RETRY_BACKOFF = 0.5
+# Bytes sampled from each end of a file to fingerprint it.
+FINGERPRINT_SIZE = 1024**2
+UPLOAD_JOURNAL_DIR = os.environ.get(
+    "BAILO_UPLOAD_JOURNAL_DIR", os.path.join(os.path.expanduser("~"), ".bailo", "uploads")
+)
+# Size of the slices an UploadBody is sent in.
+BODY_BLOCK_SIZE = 8 * 1024**2
+# Bytes sent between progress callbacks from an UploadBody.
+PROGRESS_INTERVAL = 64 * 1024**2
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkReader:
+    """Thread-safe random access reads from a seekable file object.
+
+    Uses `os.pread` where the file object is backed by a file descriptor, so concurrent reads don't share a file
+    position. Otherwise reads are serialised behind a lock. Bytes-like objects are sliced directly.
+
+    :param data: Seekable file object, or bytes-like object
+    """
+
+    def __init__(self, data: BinaryIO | Buffer) -> None:
+        self.data = data
+        self._lock = threading.Lock()
+
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            self._buffer: memoryview | None = memoryview(data).cast("B")
+            self._fd = None
+            return
+        self._buffer = None
+
+        try:
+            self._fd: int | None = data.fileno() if hasattr(os, "pread") else None
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            self._fd = None
+
+    def read(self, start: int, end: int) -> bytes:
+        """Read the bytes in the range [start, end).
+
+        :param start: First byte offset
+        :param end: Offset after the last byte
+        :return: The bytes read
+        """
+        if self._buffer is not None:
+            return bytes(self._buffer[start:end])
+
+        if self._fd is not None:
+            chunks = []
+            while start < end:
+                chunk = os.pread(self._fd, end - start, start)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                start += len(chunk)
+            return b"".join(chunks)
+
+        with self._lock:
+            position = self.data.tell()
+            self.data.seek(start)
+            chunk = self.data.read(end - start)
+            self.data.seek(position)
+        return chunk
+
+
+class UploadBody:
+    """Request body over a bytes-like object, sent in `memoryview` slices without copying.
+
+    Has a length, so is sent with a `Content-Length` rather than chunked transfer encoding, and can be iterated again
+    if the request is retried. Progress is reported in coarse batches rather than per slice, and the SHA-256 digest of
+    the slices is available as `digest` once they've all been sent.
+
+    :param buffer: Bytes-like object to send
+    :param callback: Called with the number of bytes sent, at most every `progress_interval` bytes, defaults to None
+    :param block_size: Size of the slices sent, defaults to 8MiB
+    :param progress_interval: Minimum number of bytes sent between callbacks, defaults to 64MiB
+    :param limiter: Rate limiter to throttle the slices with, defaults to None
+    """
+
+    def __init__(
+        self,
+        buffer: Buffer | mmap.mmap,
+        callback: Callable[[int], Any] | None = None,
+        block_size: int = BODY_BLOCK_SIZE,
+        progress_interval: int = PROGRESS_INTERVAL,
+        limiter: RateLimiter | None = None,
+    ) -> None:
+        self.callback = callback
+        # Throttled bodies are sent in slices no larger than the limiter's burst, to keep the rate smooth
+        self.block_size = block_size if limiter is None else max(1, min(block_size, limiter.burst))
+        self.progress_interval = progress_interval
+        self.limiter = limiter
+
+        self._view = memoryview(buffer).cast("B")
+        self._mmap: mmap.mmap | None = None
+        self.digest: str | None = None
+
+    @classmethod
+    def from_file(cls, data: BinaryIO, callback: Callable[[int], Any] | None = None, **kwargs) -> UploadBody | None:
+        """Memory map the rest of a file, from its current position.
+
+        :param data: File object, backed by a file descriptor
+        :param callback: Called with the number of bytes sent, defaults to None
+        :return: An upload body, or None if the file can't be memory mapped (so should be read instead)
+        """
+        try:
+            fd = data.fileno()
+            position = data.tell()
+            if os.fstat(fd).st_size <= position:
+                return cls(b"", callback, **kwargs)
+            mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return None
+
+        body = cls(mapped, callback, **kwargs)
+        body._view = body._view[position:]
+        body._mmap = mapped
+        return body
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def __iter__(self) -> Iterator[memoryview]:
+        digest = hashlib.sha256()
+        pending = 0
+        for start in range(0, len(self._view), self.block_size):
+            block = self._view[start : start + self.block_size]
+            digest.update(block)
+            if self.limiter is not None:
+                self.limiter.acquire(len(block))
+            yield block
+
+            pending += len(block)
+            if self.callback is not None and pending >= self.progress_interval:
+                self.callback(pending)
+                pending = 0
+
+        if self.callback is not None and pending:
+            self.callback(pending)
+        self.digest = digest.hexdigest()
+
+    def close(self) -> None:
+        """Release the buffer, and unmap the file if memory mapped."""
+        self._view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Slices still held elsewhere keep the mapping alive until they're garbage collected
+                logger.debug("Upload body mapping still in use, leaving it to be unmapped on collection.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def stream_chunks(
+    source: BinaryIO | memoryview | Iterable[bytes],
+    callback: Callable[[int], Any] | None = None,
+    block_size: int = BODY_BLOCK_SIZE,
+    digest: Any | None = None,
+    limiter: RateLimiter | None = None,
+) -> Iterator[bytes]:
+    """Read an unseekable file object or iterable of bytes as a stream of chunks, holding one chunk in memory at a time.
+
+    :param source: File object (e.g. a pipe or socket), `memoryview` or iterable (e.g. a generator) of bytes
+    :param callback: Called with the size of each chunk as it's read, defaults to None
+    :param block_size: Size of the chunks read from file objects or sliced from views, defaults to 8MiB
+    :param digest: `hashlib` hash object updated with each chunk, defaults to None
+    :param limiter: Rate limiter to throttle the chunks with, defaults to None
+    :return: Iterator of chunks
+    """
+    if hasattr(source, "read"):
+        chunks: Iterable[bytes] = iter(lambda: source.read(block_size), b"")  # type: ignore[reportAttributeAccessIssue]
+    elif isinstance(source, memoryview):
+        chunks = (source[start : start + block_size] for start in range(0, len(source), block_size))  # type: ignore[reportAssignmentType]
+    else:
+        chunks = source  # type: ignore[reportAssignmentType]
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if digest is not None:
+            digest.update(chunk)
+        if limiter is not None:
+            limiter.acquire(len(chunk))
+        if callback is not None:
+            callback(len(chunk))
+        yield chunk
+
+
+class HashingReader:
+    """File object wrapper which hashes and reports the progress of the data read from it.
+
+    :param data: Readable file object
+    :param callback: Called with the number of bytes of each read, defaults to None
+    :param limiter: Rate limiter to throttle the reads with, defaults to None
+    """
+
+    def __init__(
+        self, data: BinaryIO, callback: Callable[[int], Any] | None = None, limiter: RateLimiter | None = None
+    ) -> None:
+        self.data = data
+        self.callback = callback
+        self.limiter = limiter
+        self._digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.data.read(size)
+        self._digest.update(chunk)
+        if self.limiter is not None:
+            self.limiter.acquire(len(chunk))
+        if self.callback is not None:
+            self.callback(len(chunk))
+        return chunk
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 hex digest of the data read so far."""
+        return self._digest.hexdigest()
+
+    def __getattr__(self, name: str):
+        return getattr(self.data, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # The wrapped file is left open, for its owner to close
+        pass
+
+
+def upload_body(
+    data: BinaryIO | Buffer, callback: Callable[[int], Any] | None = None, limiter: RateLimiter | None = None
+) -> UploadBody | HashingReader:
+    """Wrap the rest of a buffer or seekable file as the body of a simple upload.
+
+    Buffers and memory mapped files are sent in slices without copying, falling back to reading file objects which
+    can't be mapped. Either way the SHA-256 digest of the data is available as `digest` once it's been sent.
+
+    :param data: Bytes-like or file object, from its current position
+    :param callback: Called with the number of bytes sent, defaults to None
+    :param limiter: Rate limiter to throttle the body with, defaults to None
+    :return: A context manager for the body
+    """
+    if isinstance(data, memoryview):
+        return UploadBody(data, callback, limiter=limiter)
+    if isinstance(data, io.BytesIO):
+        return UploadBody(data.getbuffer()[data.tell() :], callback, limiter=limiter)
+
+    body = UploadBody.from_file(data, callback, limiter=limiter)  # type: ignore[reportArgumentType]
+    return HashingReader(data, callback, limiter) if body is None else body  # type: ignore[reportArgumentType]
+
+
+def file_fingerprint(path: str) -> str:
+    """Fingerprint a file from its size, modification time and the contents of its first and last blocks.
+
+    Cheap enough to compute before every upload, while catching files that are rewritten in place.
+
+    :param path: Path of the file
+    :return: Hex digest fingerprint
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SIZE))
+        if stat.st_size > FINGERPRINT_SIZE:
+            f.seek(max(FINGERPRINT_SIZE, stat.st_size - FINGERPRINT_SIZE))
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+class UploadJournal:
+    """On-disk record of the acknowledged chunks of a multipart upload.
+
+    :param path: Path of the journal file
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+        self.file_id: str | None = None
+        self.chunks: list[dict[str, Any]] = []
+        self.parts: dict[int, str] = {}
+
+        try:
+            with open(path) as f:
+                record = json.load(f)
+            self.file_id = record["fileId"]
+            self.chunks = record["chunks"]
+            self.parts = {int(part_number): etag for part_number, etag in record["parts"].items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError):
+            logger.warning("Ignoring corrupt upload journal %s.", path)
+
+    @classmethod
+    def for_file(
+        cls,
+        path: str,
+        model_id: str,
+        version: str,
+        name: str,
+        directory: str | None = None,
+    ) -> UploadJournal:
+        """Return the journal for uploading a file to a release.
+
+        The journal is keyed by the release, the upload name and the file's identity (path, size, modification time
+        and a fingerprint of its contents), so a changed file never resumes a stale upload.
+
+        :param path: Path of the file being uploaded
+        :param model_id: A unique model ID
+        :param version: Version of the release being uploaded to
+        :param name: Name the file is uploaded as
+        :param directory: Directory to store journals in, defaults to UPLOAD_JOURNAL_DIR
+        :return: An upload journal
+        """
+        if directory is None:
+            directory = UPLOAD_JOURNAL_DIR
+
+        stat = os.stat(path)
+        identity = [
+            model_id,
+            version,
+            name,
+            os.path.abspath(path),
+            stat.st_size,
+            stat.st_mtime_ns,
+            file_fingerprint(path),
+        ]
+        key = hashlib.sha256(json.dumps(identity).encode()).hexdigest()
+
+        return cls(os.path.join(directory, f"{key}.json"))
+
+    @property
+    def started(self) -> bool:
+        """Whether a multipart upload has already been started for this journal."""
+        return self.file_id is not None
+
+    def begin(self, file_id: str, chunks: list[dict[str, Any]]) -> None:
+        """Record a newly started multipart upload.
+
+        :param file_id: Unique file ID of the upload
+        :param chunks: Presigned chunks of the upload
+        """
+        with self._lock:
+            self.file_id = file_id
+            self.chunks = chunks
+            self.parts = {}
+            self._save()
+
+    def add_part(self, part_number: int, etag: str) -> None:
+        """Record an acknowledged chunk.
+
+        :param part_number: One-indexed part number of the chunk
+        :param etag: ETag of the uploaded chunk
+        """
+        with self._lock:
+            self.parts[part_number] = etag
+            self._save()
+
+    def complete(self) -> None:
+        """Remove the journal once its upload has finished."""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write_json(self.path, {"fileId": self.file_id, "chunks": self.chunks, "parts": self.parts})
+
+
+class MultipartUpload:
+    """Upload a file to Bailo in concurrently uploaded chunks.
+
+    :param client: A client object used to interact with Bailo
+    :param model_id: A unique model ID
+    :param name: File name
+    :param data: Seekable file object to upload, positioned at the start of the content to upload, or bytes-like object
+    :param size: Number of bytes to upload
+    :param concurrency: Number of chunks uploaded at once, defaults to 8
+    :param callback: Called with the number of bytes uploaded as each chunk completes, defaults to None
+    :param journal: Journal to resume from and record acknowledged chunks in, defaults to None
+
+    Chunks are throttled by the client's agent's `RateLimiter`, if it has one.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        model_id: str,
+        name: str,
+        data: BinaryIO | Buffer,
+        size: int,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        callback: Callable[[int], Any] | None = None,
+        journal: UploadJournal | None = None,
+    ) -> None:
+        self.client = client
+        self.model_id = model_id
+        self.name = name
+        self.size = size
+        self.concurrency = concurrency
+        self.callback = callback
+        self.journal = journal
+        self.limiter: RateLimiter | None = getattr(client.agent, "rate_limiter", None)
+
+        self._offset = 0 if isinstance(data, (bytes, bytearray, memoryview)) else data.tell()
+        self._reader = ChunkReader(data)
+        self._callback_lock = threading.Lock()
+        # Bytes reported to the callback, so progress can be wound back if the upload restarts
+        self._progress = 0
+        self._hasher = OrderedHasher()
+        # SHA-256 hex digest of the uploaded data, computed from the chunks as they're read
+        self.digest: str | None = None
+
+    def start(self) -> tuple[str, list[dict[str, Any]]]:
+        """Start the multipart upload on Bailo.
+
+        :return: The new file ID and the presigned chunks to upload
+        """
+        res = self.client.start_multi_upload(self.model_id, self.name, self.size)
+        logger.info(
+            "Multipart upload of %s started with %d chunks (file ID %s).",
+            self.name,
+            len(res["chunks"]),
+            res["fileId"],
+        )
+
+        return res["fileId"], res["chunks"]
+
+    def upload(self) -> str:
+        """Start (or resume), upload all chunks of, and finish the multipart upload.
+
+        :return: The unique file ID of the file uploaded
+        """
+        if self.journal is not None and self.journal.started:
+            file_id, chunks, skip = self.journal.file_id, self.journal.chunks, self.journal.parts
+            logger.info(
+                "Resuming multipart upload of %s, %d of %d chunks already uploaded.", self.name, len(skip), len(chunks)
+            )
+
+            resumed_chunks = [chunks[part_number - 1] for part_number in skip]
+            self._report(sum(chunk["endByte"] - chunk["startByte"] for chunk in resumed_chunks))
+
+            try:
+                parts = self.upload_chunks(chunks, skip=skip)
+            except PresignedUrlExpired:
+                # Chunk URLs are only signed for a limited time, and can't be renewed for an existing upload
+                logger.warning(
+                    "Presigned URLs of %s have expired, starting its upload again with fresh URLs.", self.name
+                )
+                self._abandon(file_id)
+                file_id, parts = self._start_and_upload()
+        else:
+            file_id, parts = self._start_and_upload()
+        if self._hasher.offset == self.size:
+            self.digest = self._hasher.hexdigest()
+        file_id = self.finish(file_id, parts)  # type: ignore[reportArgumentType]
+
+        if self.journal is not None:
+            self.journal.complete()
+
+        return file_id
+
+    def _start_and_upload(self) -> tuple[str, list[dict[str, Any]]]:
+        file_id, chunks = self.start()
+        if self.journal is not None:
+            self.journal.begin(file_id, chunks)
+
+        return file_id, self.upload_chunks(chunks)
+
+    def _abandon(self, file_id: str) -> None:
+        # The abandoned upload's file would otherwise be left orphaned on the model
+        try:
+            self.client.delete_file(self.model_id, file_id)
+            logger.info("Deleted abandoned upload %s of %s.", file_id, self.name)
+        except (BailoException, ResponseException, OSError) as ex:
+            logger.warning("Failed to delete abandoned upload %s of %s: %s", file_id, self.name, ex)
+
+        # Every chunk is read and sent again, so the digest and progress start from scratch
+        self._hasher = OrderedHasher()
+        self._report(-self._progress)
+
+    def _report(self, nbytes: int) -> None:
+        with self._callback_lock:
+            self._progress += nbytes
+            if self.callback is not None and nbytes:
+                self.callback(nbytes)
+
+    def upload_chunks(self, chunks: list[dict[str, Any]], skip: dict[int, str] | None = None) -> list[dict[str, Any]]:
+        """Upload the given presigned chunks concurrently.
+
+        :param chunks: Presigned chunks, each with a `presignedUrl`, `startByte` and (exclusive) `endByte`
+        :param skip: ETags of chunks which have already been uploaded, keyed by part number, defaults to None
+        :raises PresignedUrlExpired: If any chunk's presigned URL has expired
+        :raises BailoException: If any chunk fails to upload after retrying
+        :return: Uploaded parts, each with an `ETag` and `PartNumber`
+        """
+        etags = dict(skip or {})
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bailo-upload") as executor:
+            futures = {}
+            hashes = {}
+            # Chunks are submitted in order, so that the digest can be computed as they're read
+            for part_number, chunk in enumerate(chunks, 1):
+                if part_number in etags:
+                    hashes[part_number] = executor.submit(self.hash_chunk, chunk)
+                else:
+                    futures[part_number] = executor.submit(self.upload_chunk, part_number, chunk)
+
+            errors = []
+            expired = []
+            for part_number, future in hashes.items():
+                try:
+                    future.result()
+                except OSError as ex:
+                    errors.append(f"reading part {part_number}: {ex}")
+            for part_number, future in futures.items():
+                try:
+                    etags[part_number] = future.result()
+                except PresignedUrlExpired as ex:
+                    expired.append(f"part {part_number}: {ex}")
+                except (BailoException, ResponseException, OSError) as ex:
+                    errors.append(f"part {part_number}: {ex}")
+
+        if expired:
+            raise PresignedUrlExpired(f"Multipart upload of {self.name} failed ({'; '.join(expired + errors)}).")
+        if errors:
+            raise BailoException(f"Multipart upload of {self.name} failed ({'; '.join(errors)}).")
+
+        return [{"ETag": etags[part_number], "PartNumber": part_number} for part_number in sorted(etags)]
+
+    def upload_chunk(self, part_number: int, chunk: dict[str, Any]) -> str:
+        """Upload a single chunk, retrying with backoff on failure.
+
+        :param part_number: One-indexed part number of the chunk
+        :param chunk: Presigned chunk, with a `presignedUrl`, `startByte` and (exclusive) `endByte`
+        :return: The ETag of the uploaded chunk
+        """
+        start, end = chunk["startByte"], chunk["endByte"]
+        data = self._reader.read(self._offset + start, self._offset + end)
+        self._hasher.add(start, data)
+
+        # Throttled chunks are sent as a (sized) body of slices, each acquired from the rate limiter as it's sent
+        body = data if self.limiter is None else UploadBody(data, limiter=self.limiter)
+
+        for attempt in range(MAX_CHUNK_RETRIES + 1):
+            try:
+                etag = self.client.put_multi_upload_chunk(chunk["presignedUrl"], body)
+                break
+            except PresignedUrlExpired:
+                # Retrying an expired URL can't succeed
+                raise
+            except (ResponseException, OSError) as ex:
+                if attempt == MAX_CHUNK_RETRIES:
+                    raise
+                logger.warning("Part %d of %s failed (%s), retrying...", part_number, self.name, ex)
+                time.sleep(RETRY_BACKOFF * 2**attempt)
+
+        if self.journal is not None:
+            self.journal.add_part(part_number, etag)
+
+        self._report(len(data))
+
+        return etag
+
+    def hash_chunk(self, chunk: dict[str, Any]) -> None:
+        """Read a chunk which has already been uploaded, to include it in the digest.
+
+        :param chunk: Presigned chunk, with a `startByte` and (exclusive) `endByte`
+        """
+        start, end = chunk["startByte"], chunk["endByte"]
+        self._hasher.add(start, self._reader.read(self._offset + start, self._offset + end))
+
+    def finish(self, file_id: str, parts: list[dict[str, Any]]) -> str:
+        """Finish the multipart upload on Bailo.
+
+        :param file_id: Unique file ID, as returned by `start`
+        :param parts: Uploaded parts, each with an `ETag` and `PartNumber`
+        :return: The unique file ID of the file uploaded
+        """
+        self.client.finish_multi_upload(self.model_id, file_id, parts)
+        logger.info("Multipart upload of %s finished (file ID %s).", self.name, file_id)
+
+        return file_id
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import json
 import os
+import tempfile
 from typing import Any
 
+from bailo.core.exceptions import BailoException
+
 NO_COLOR = "NO_COLOR" in os.environ
+# Default number of concurrent workers for file transfers.
+DEFAULT_CONCURRENCY = 8
 
 
 def filter_none(json: dict[str, Any]) -> dict[str, Any]:
@@ -16,6 +22,61 @@ def filter_none(json: dict[str, Any]) -> dict[str, Any]:
     return res
 
 
+def range_header(byte_range: tuple[int, int] | None) -> dict[str, str] | None:
+    """Build the headers for an HTTP range request.
+
+    :param byte_range: Inclusive start and end byte offsets, or None for the whole resource
+    :return: Headers dictionary, or None if no range is given
+    """
+    if byte_range is None:
+        return None
+    start, end = byte_range
+    return {"Range": f"bytes={start}-{end}"}
+
+
+def safe_join(directory: str, name: str) -> str:
+    """Join a release file name, which may contain `/` separated directories, onto a local directory.
+
+    :param directory: Local directory
+    :param name: Release file name
+    :raises BailoException: If the name is absolute, or would resolve outside of the directory
+    :return: The local path of the file
+    """
+    parts = name.split("/")
+    if name.startswith("/") or os.path.isabs(name) or any(part in ("", ".", "..") for part in parts):
+        raise BailoException(f"Refusing to write file {name!r} outside of {directory}.")
+
+    path = os.path.join(directory, *parts)
+    root = os.path.realpath(directory)
+    if os.path.commonpath([root, os.path.realpath(path)]) != root:
+        raise BailoException(f"Refusing to write file {name!r} outside of {directory}.")
+
+    return path
+
+
+def atomic_write_json(path: str, obj: Any, indent: int | None = None) -> None:
+    """Write an object as JSON, so that readers (and an interrupted write) never see a truncated file.
+
+    The JSON is written to a temporary file in the same directory, flushed to disk, then renamed over the path.
+
+    :param path: Path of the JSON file
+    :param obj: JSON serialisable object
+    :param indent: Indentation of the JSON, defaults to None (compact)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".bailo-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(obj, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 class NestedDict(dict):
     def __getitem__(self, keytuple):
         # if key is not a tuple then access as normal
@@ -37,3 +98,15 @@ class NestedDict(dict):
                 d = d.setdefault(key, {})
             else:
                 d[key] = item
+
+
+def is_seekable(data: Any) -> bool:
+    """Return whether a file object supports random access, so its size can be found and its chunks read out of order.
+
+    :param data: File object, or other upload source
+    :return: True if the object is seekable
+    """
+    try:
+        return bool(data.seekable())
+    except (AttributeError, OSError, ValueError):
+        return False
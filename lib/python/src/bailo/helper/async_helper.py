@@ -0,0 +1,165 @@
+"""Asyncio equivalents of the helper classes.
+
+Each async helper wraps its blocking counterpart: methods become coroutines which run the blocking method on the
+`AsyncClient`'s bounded worker pools, and attributes are read from and written to the wrapped object. The helpers are
+therefore a thread-backed facade, with at most `AsyncAgent.max_concurrency` helper methods (and
+`AsyncAgent.max_transfers` file transfers) running at once; use the `AsyncClient` endpoints, which are sent natively,
+for large numbers of concurrent metadata calls.
+
+Models built lazily (e.g. by `search`) are hydrated on the worker pool before they're returned, so reading their
+attributes never blocks the event loop.
+
+>>> async with AsyncClient("https://bailo.com") as client:
+...     model = await AsyncModel.from_id(client, "yolov4")
+...     release = await model.get_latest_release()
+...     await release.download_all(path="weights")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Any
+
+# isort: split
+
+from bailo.core.async_client import AsyncClient
+from bailo.helper.access_request import AccessRequest
+from bailo.helper.datacard import Datacard
+from bailo.helper.model import Model
+from bailo.helper.release import Release
+from bailo.helper.schema import Schema
+
+# Methods which transfer file contents, and so are run on the agent's transfer pool.
+TRANSFER_METHODS = {"download", "download_all", "upload"}
+
+
+def _async_constructor(wrapped_cls: type, name: str):
+    func = getattr(wrapped_cls, name)
+
+    @functools.wraps(func)
+    async def constructor(cls, client: AsyncClient, *args, **kwargs):
+        res = await client.agent.run(func, client.client, *args, **kwargs)
+        return await _hydrate_and_wrap(client, res)
+
+    return classmethod(constructor)
+
+
+class AsyncHelper:
+    """Base class for async helpers, proxying a blocking helper object.
+
+    :param client: An async client object used to interact with Bailo
+    :param wrapped: The blocking helper object
+    """
+
+    _wrapped_cls: type = object
+    _constructors: tuple[str, ...] = ()
+
+    def __init__(self, client: AsyncClient, wrapped: Any) -> None:
+        object.__setattr__(self, "client", client)
+        object.__setattr__(self, "wrapped", wrapped)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls._constructors:
+            setattr(cls, name, _async_constructor(cls._wrapped_cls, name))
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.wrapped, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            res = await self.client.agent.run(attr, *args, transfer=name in TRANSFER_METHODS, **kwargs)
+            return await _hydrate_and_wrap(self.client, res)
+
+        return method
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.wrapped, name, value)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AsyncHelper):
+            other = other.wrapped
+        return self.wrapped == other
+
+    def __lt__(self, other):
+        if isinstance(other, AsyncHelper):
+            other = other.wrapped
+        return self.wrapped < other
+
+    def __gt__(self, other):
+        if isinstance(other, AsyncHelper):
+            other = other.wrapped
+        return self.wrapped > other
+
+    def __hash__(self) -> int:
+        return hash(self.wrapped)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({str(self.wrapped)})"
+
+    def __str__(self) -> str:
+        return str(self.wrapped)
+
+
+class AsyncModel(AsyncHelper):
+    """Asyncio equivalent of `Model`."""
+
+    _wrapped_cls = Model
+    _constructors = ("create", "from_id", "search", "from_mlflow")
+
+
+class AsyncDatacard(AsyncHelper):
+    """Asyncio equivalent of `Datacard`."""
+
+    _wrapped_cls = Datacard
+    _constructors = ("create", "from_id")
+
+
+class AsyncRelease(AsyncHelper):
+    """Asyncio equivalent of `Release`."""
+
+    _wrapped_cls = Release
+    _constructors = ("create", "from_version")
+
+
+class AsyncAccessRequest(AsyncHelper):
+    """Asyncio equivalent of `AccessRequest`."""
+
+    _wrapped_cls = AccessRequest
+    _constructors = ("create", "from_id")
+
+
+class AsyncSchema(AsyncHelper):
+    """Asyncio equivalent of `Schema`."""
+
+    _wrapped_cls = Schema
+    _constructors = ("create", "from_id", "get_all_schema_ids")
+
+
+ASYNC_HELPERS: dict[type, type[AsyncHelper]] = {
+    Model: AsyncModel,
+    Datacard: AsyncDatacard,
+    Release: AsyncRelease,
+    AccessRequest: AsyncAccessRequest,
+    Schema: AsyncSchema,
+}
+
+
+def _wrap(client: AsyncClient, res: Any) -> Any:
+    if isinstance(res, list):
+        return [_wrap(client, item) for item in res]
+
+    helper = ASYNC_HELPERS.get(type(res))
+    if helper is None:
+        return res
+    return helper(client, res)
+
+
+async def _hydrate_and_wrap(client: AsyncClient, res: Any) -> Any:
+    # Lazy attributes are fetched on first access, which would block the event loop, so fetch them up front
+    lazy = [item for item in (res if isinstance(res, list) else [res]) if not getattr(item, "_hydrated", True)]
+    await asyncio.gather(*(client.agent.run(item._hydrate) for item in lazy))
+    return _wrap(client, res)
@@ -91,8 +91,11 @@ class Entry:
     def get_card_latest(self) -> None:
         """Get the latest card from Bailo."""
         res = self.client.get_model(model_id=self.id)
-        if "card" in res["model"]:
-            self.__unpack_card(res["model"]["card"])
+        self._unpack_latest_card(res["model"])
+
+    def _unpack_latest_card(self, res):
+        if "card" in res:
+            self.__unpack_card(res["card"])
             logger.info("Latest card for ID %s successfully retrieved.", self.id)
         else:
             warnings.warn(
@@ -129,6 +132,8 @@ class Entry:
 
     def _update_card(self, card: dict[str, Any] | None = None) -> None:
         if card is None:
+            # Lazily built entries fetch their card first, rather than sending an empty one
+            self._hydrate()
             card = self._card
 
         res = self.client.put_model_card(model_id=self.id, metadata=card)
@@ -136,6 +141,10 @@ class Entry:
 
         logger.info("Card for %s successfully updated on server.", self.id)
 
+    def _hydrate(self) -> None:
+        # Entries are fully loaded when built, subclasses built lazily (e.g. from search results) override this
+        pass
+
     def _unpack(self, res):
         self.id = res["id"]
         self.name = res["name"]
@@ -0,0 +1,350 @@
+"""fsspec filesystem backed by Bailo releases.
+
+Exposes the files of each release as `bailo://<model_id>/<semver>/<filename>`, so that libraries built on fsspec
+(pandas, torch, safetensors, etc.) can read files straight from Bailo. Files are opened for seekable random access,
+fetching only the blocks read with HTTP range requests. Fetched blocks are kept in a least recently used cache, and
+sequential reads fetch several blocks ahead in a single request. Requires the optional `fsspec` dependency
+(`pip install bailo[fsspec]`).
+
+>>> fs = BailoFileSystem(client)
+>>> with fs.open("bailo://yolo-abc123/1.0.0/model.safetensors") as f:
+...     header_size = int.from_bytes(f.read(8), "little")
+"""
+
+from __future__ import annotations
+
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, BinaryIO, Callable
+
+from requests import Response
+
+try:
+    from fsspec.caching import BaseCache
+    from fsspec.spec import AbstractBufferedFile, AbstractFileSystem
+
+    FSSPEC = True
+except ImportError:
+    FSSPEC = False
+    BaseCache = AbstractBufferedFile = AbstractFileSystem = object  # type: ignore[reportAssignmentType]
+
+# isort: split
+
+from bailo.core.client import Client
+from bailo.core.download import STREAM_BLOCK_SIZE
+from bailo.core.exceptions import BailoException, ResponseException
+
+logger = logging.getLogger(__name__)
+
+# Error message the Bailo API rejects range requests with.
+RANGES_NOT_SUPPORTED = "Ranges are not supported"
+
+DEFAULT_BLOCK_SIZE = 4 * 1024**2
+# Number of blocks kept in each open file's cache.
+DEFAULT_CACHE_BLOCKS = 32
+# Number of blocks fetched ahead of a sequential read.
+DEFAULT_READAHEAD_BLOCKS = 4
+
+
+class LRUBlockCache(BaseCache):  # type: ignore[reportGeneralTypeIssues]
+    """Least recently used cache of a file's blocks, with read-ahead for sequential access.
+
+    A miss fetches the missing blocks of the read in a single range request, extended by `readahead` blocks when the
+    read continues on from the previous one.
+
+    :param blocksize: Size of the blocks in bytes
+    :param fetcher: Callable fetching the (start, exclusive end) byte range of the file
+    :param size: Size of the file in bytes
+    :param maxblocks: Maximum number of blocks cached, defaults to 32
+    :param readahead: Number of blocks fetched ahead of sequential reads, defaults to 4
+    """
+
+    name = "bailo-lru"
+
+    def __init__(
+        self,
+        blocksize: int,
+        fetcher: Callable[[int, int], bytes],
+        size: int,
+        maxblocks: int = DEFAULT_CACHE_BLOCKS,
+        readahead: int = DEFAULT_READAHEAD_BLOCKS,
+    ) -> None:
+        super().__init__(blocksize, fetcher, size)  # type: ignore[reportCallIssue]
+        self.blocksize = blocksize
+        self.fetcher = fetcher
+        self.size = size
+        self.maxblocks = max(1, maxblocks)
+        self.readahead = readahead
+
+        self.hits = 0
+        self.misses = 0
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._last_block: int | None = None
+        self._lock = threading.Lock()
+
+    def _fetch(self, start: int | None, stop: int | None) -> bytes:
+        start = 0 if start is None else start
+        stop = self.size if stop is None else min(stop, self.size)
+        if start >= stop:
+            return b""
+
+        first, last = start // self.blocksize, (stop - 1) // self.blocksize
+        with self._lock:
+            blocks = [self._block(i, last) for i in range(first, last + 1)]
+            self._last_block = last
+
+        offset = start - first * self.blocksize
+        return b"".join(blocks)[offset : offset + stop - start]
+
+    def _block(self, i: int, last: int) -> bytes:
+        block = self._blocks.get(i)
+        if block is not None:
+            self.hits += 1
+            self._blocks.move_to_end(i)
+            return block
+
+        self.misses += 1
+        # Fetch the rest of the read in one request, and read ahead if the access is sequential
+        end = i
+        while end < last and end + 1 not in self._blocks:
+            end += 1
+        if self._last_block is not None and i in (self._last_block, self._last_block + 1):
+            end += self.readahead
+        end = min(end, (self.size - 1) // self.blocksize)
+
+        data = self.fetcher(i * self.blocksize, min((end + 1) * self.blocksize, self.size))
+        for j in range(i, end + 1):
+            self._blocks[j] = data[(j - i) * self.blocksize : (j - i + 1) * self.blocksize]
+            self._blocks.move_to_end(j)
+        while len(self._blocks) > self.maxblocks:
+            self._blocks.popitem(last=False)
+
+        return self._blocks.get(i, data[: self.blocksize])
+
+
+class BailoFile(AbstractBufferedFile):  # type: ignore[reportGeneralTypeIssues]
+    """Read only, seekable file in a Bailo release, read with range requests through an `LRUBlockCache`.
+
+    If the server doesn't support range requests, the whole file is downloaded once to a temporary file on the first
+    read, and reads are served from that.
+    """
+
+    def __init__(
+        self,
+        fs: BailoFileSystem,
+        path: str,
+        size: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        cache_blocks: int = DEFAULT_CACHE_BLOCKS,
+        readahead: int = DEFAULT_READAHEAD_BLOCKS,
+        **kwargs,
+    ) -> None:
+        super().__init__(fs, path, mode="rb", block_size=block_size, cache_type="none", size=size, **kwargs)  # type: ignore[reportCallIssue]
+        self.model_id, self.semver, self.filename = fs.split_path(path)
+        self.cache = LRUBlockCache(block_size, self._fetch_range, size, cache_blocks, readahead)
+        self._local: BinaryIO | None = None
+        self._local_lock = threading.Lock()
+
+    def _fetch_range(self, start: int, end: int) -> bytes:
+        res = None
+        if self._local is None and self.fs.ranges is not False:
+            logger.debug("Fetching bytes %d-%d of %s.", start, end, self.path)
+            try:
+                res = self._download((start, end - 1))
+            except BailoException as ex:
+                # Only an explicit rejection means ranges aren't supported, other errors may be transient
+                if RANGES_NOT_SUPPORTED not in str(ex):
+                    raise
+                logger.debug("Range request for %s was rejected (%s).", self.path, ex)
+
+            if res is not None and res.status_code == 206:
+                self.fs.ranges = True
+                try:
+                    data = res.content
+                finally:
+                    res.close()
+                if len(data) != end - start:
+                    raise ResponseException(
+                        f"Range request for {self.path} returned {len(data)} of {end - start} bytes"
+                    )
+                return data
+
+        with self._local_lock:
+            if self._local is None:
+                self.fs.ranges = False
+                self._local = self._download_whole(res)
+            elif res is not None:
+                res.close()
+
+            self._local.seek(start)
+            return self._local.read(end - start)
+
+    def _download(self, byte_range: tuple[int, int] | None = None) -> Response:
+        return self.fs.client.get_download_by_filename(self.model_id, self.semver, self.filename, byte_range)
+
+    def _download_whole(self, res: Response | None = None) -> BinaryIO:
+        # Download the whole file once (reusing a response which ignored the range), so reads don't refetch it
+        logger.info("Server doesn't support range requests, downloading %s to a temporary file.", self.path)
+        if res is None:
+            res = self._download()
+
+        local = tempfile.TemporaryFile()
+        try:
+            for chunk in res.iter_content(STREAM_BLOCK_SIZE):
+                local.write(chunk)
+        except BaseException:
+            local.close()
+            raise
+        finally:
+            res.close()
+        return local  # type: ignore[reportReturnType]
+
+    def close(self) -> None:
+        super().close()
+        with self._local_lock:
+            if self._local is not None:
+                self._local.close()
+                self._local = None
+
+
+class BailoFileSystem(AbstractFileSystem):  # type: ignore[reportGeneralTypeIssues]
+    """Read only fsspec filesystem of the files in Bailo releases, at `bailo://<model_id>/<semver>/<filename>`.
+
+    Listing the root lists models, listing a model lists its releases, and listing a release lists its files (with
+    file names containing `/` shown as directories).
+
+    :param client: A client object used to interact with Bailo, defaults to a new client for url
+    :param url: Url of bailo website, if no client is given, defaults to None
+    :param block_size: Size of the blocks files are fetched & cached in, defaults to 4MiB
+    :param cache_blocks: Number of blocks cached per open file, defaults to 32
+    :param readahead: Number of blocks fetched ahead of sequential reads, defaults to 4
+    :raises ImportError: If fsspec isn't installed
+
+    ..note:: Files uploaded with compression or as deltas are read as stored (compressed, or the delta)
+    """
+
+    protocol = "bailo"
+    root_marker = ""
+
+    def __init__(
+        self,
+        client: Client | None = None,
+        url: str | None = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        cache_blocks: int = DEFAULT_CACHE_BLOCKS,
+        readahead: int = DEFAULT_READAHEAD_BLOCKS,
+        **kwargs,
+    ) -> None:
+        if not FSSPEC:
+            raise ImportError("Optional fsspec dependencies (needed for this class) are not installed.")
+        if client is None:
+            if url is None:
+                raise ValueError("Either a client or url must be given.")
+            client = Client(url)
+
+        super().__init__(**kwargs)  # type: ignore[reportCallIssue]
+        self.client = client
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.readahead = readahead
+        # Whether the server supports range requests, once known
+        self.ranges: bool | None = None
+
+    @classmethod
+    def _strip_protocol(cls, path: str) -> str:
+        if path.startswith("bailo://"):
+            path = path[len("bailo://") :]
+        return path.strip("/")
+
+    def split_path(self, path: str) -> tuple[str, str, str]:
+        """Split a path into its model ID, release semver and file name.
+
+        :param path: Path of a file
+        :raises FileNotFoundError: If the path isn't of a file in a release
+        :return: Model ID, semver and file name
+        """
+        parts = self._strip_protocol(path).split("/", 2)
+        if len(parts) < 3 or not all(parts):
+            raise FileNotFoundError(path)
+        return parts[0], parts[1], parts[2]
+
+    def ls(self, path: str, detail: bool = True, **kwargs) -> list[Any]:
+        path = self._strip_protocol(path)
+        parts = path.split("/", 2) if path else []
+
+        if not parts:
+            models = self.client.get_models()["models"]
+            entries = [{"name": model["id"], "size": 0, "type": "directory"} for model in models]
+        elif len(parts) == 1:
+            releases = self.client.get_all_releases(parts[0])["releases"]
+            entries = [
+                {"name": f"{parts[0]}/{release['semver']}", "size": 0, "type": "directory"} for release in releases
+            ]
+        else:
+            entries = self._ls_release(parts[0], parts[1], parts[2] if len(parts) == 3 else "")
+
+        if detail:
+            return entries
+        return [entry["name"] for entry in entries]
+
+    def _release_files(self, model_id: str, semver: str) -> list[dict[str, Any]]:
+        key = f"{model_id}/{semver}"
+        if key not in self.dircache:
+            files = self.client.get_release(model_id, semver)["release"]["files"]
+            self.dircache[key] = [
+                {
+                    "name": f"{key}/{file['name']}",
+                    "size": file.get("size", 0),
+                    "type": "file",
+                    "id": file.get("id"),
+                    "tags": file.get("tags") or [],
+                }
+                for file in files
+            ]
+        return self.dircache[key]
+
+    def _ls_release(self, model_id: str, semver: str, prefix: str) -> list[dict[str, Any]]:
+        base = f"{model_id}/{semver}/{prefix}".rstrip("/")
+        entries: dict[str, dict[str, Any]] = {}
+
+        for file in self._release_files(model_id, semver):
+            if file["name"] == base:
+                # Listing a file gives the file itself
+                return [file]
+            if not file["name"].startswith(base + "/"):
+                continue
+            child, _, rest = file["name"][len(base) + 1 :].partition("/")
+            name = f"{base}/{child}"
+            entries[name] = {"name": name, "size": 0, "type": "directory"} if rest else file
+
+        if prefix and not entries:
+            raise FileNotFoundError(f"bailo://{base}")
+        return list(entries.values())
+
+    def _open(self, path: str, mode: str = "rb", block_size: int | None = None, **kwargs) -> BailoFile:
+        if mode != "rb":
+            raise NotImplementedError("The Bailo filesystem is read only.")
+
+        info = self.info(path)
+        if info["type"] != "file":
+            raise IsADirectoryError(path)
+
+        return BailoFile(
+            self,
+            self._strip_protocol(path),
+            info["size"],
+            block_size=block_size or self.block_size,
+            cache_blocks=self.cache_blocks,
+            readahead=self.readahead,
+            **kwargs,
+        )
+
+    def cat_file(self, path: str, start: int | None = None, end: int | None = None, **kwargs) -> bytes:
+        with self._open(path) as f:
+            size = f.size
+            start = 0 if start is None else (start if start >= 0 else max(0, size + start))
+            end = size if end is None else (end if end >= 0 else max(0, size + end))
+            f.seek(start)
+            return f.read(max(0, end - start))
@@ -5,6 +5,7 @@ import os
 import shutil
 import tempfile
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from semantic_version import Version
@@ -14,7 +15,7 @@ from semantic_version import Version
 from bailo.core.client import Client
 from bailo.core.enums import EntryKind, MinimalSchema, ModelVisibility
 from bailo.core.exceptions import BailoException
-from bailo.core.utils import NestedDict
+from bailo.core.utils import DEFAULT_CONCURRENCY, NestedDict
 from bailo.helper.entry import Entry
 from bailo.helper.release import Release
 
@@ -50,6 +51,11 @@ class Model(Entry):
         state: str | None = None,
         visibility: ModelVisibility | None = None,
     ) -> None:
+        # Models built from search results are hydrated with their full details on first access
+        self._hydrated = True
+        # Lazy attributes assigned before hydrating, which take precedence over the fetched details
+        self._assigned: set[str] = set()
+
         super().__init__(
             client=client,
             id=model_id,
@@ -144,33 +150,42 @@ class Model(Entry):
         libraries: list[str] | None = None,
         filters: list[str] | None = None,
         search: str = "",
+        prefetch: bool = False,
+        concurrency: int = DEFAULT_CONCURRENCY,
     ) -> list[Model]:
         """Return a list of model objects from Bailo, based on search parameters.
 
+        Models are built from the search results with a single request. Their remaining details (visibility,
+        organisation, state and model card) are fetched when first accessed, or up front if prefetch is set.
+
         :param client: A client object used to interact with Bailo
         :param task: Model task (e.g. image classification), defaults to None
         :param libraries: Model library (e.g. TensorFlow), defaults to None
         :param filters: Custom filters, defaults to None
         :param search: String to be located in model cards, defaults to ""
+        :param prefetch: Fetch the full details of every model concurrently before returning, defaults to False
+        :param concurrency: Number of models fetched at once when prefetching, defaults to 8
         :return: List of model objects
         """
         res = client.get_models(task=task, libraries=libraries, filters=filters, search=search)
         models = []
 
         for model in res["models"]:
-            res_model = client.get_model(model_id=model["id"])["model"]
             model_obj = cls(
                 client=client,
                 model_id=model["id"],
                 name=model["name"],
                 description=model["description"],
-                organisation=res.get("organisation"),
-                state=res.get("state"),
             )
-            model_obj._unpack(res_model)
-            model_obj.get_card_latest()
+            model_obj._hydrated = False
             models.append(model_obj)
 
+        if prefetch and models:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bailo-search") as executor:
+                list(executor.map(Model._hydrate, models))
+
+        logger.info("Search returned %d models.", len(models))
+
         return models
 
     @classmethod
@@ -323,10 +338,7 @@ class Model(Entry):
         :return: List of Release objects
         """
         res = self.client.get_all_releases(model_id=self.model_id)
-        releases = []
-
-        for release in res["releases"]:
-            releases.append(self.get_release(version=release["semver"]))
+        releases = [Release.from_payload(self.client, self.model_id, release) for release in res["releases"]]
 
         logger.info("Successfully retrieved all releases for model %s.", self.model_id)
 
@@ -345,18 +357,22 @@ class Model(Entry):
 
         :return: Release object
         """
-        releases = self.get_releases()
-        if not releases:
+        res = self.client.get_all_releases(model_id=self.model_id)
+        if not res["releases"]:
             raise BailoException("This model has no releases.")
 
-        latest_release = max(releases)
+        # Parse each version once, rather than on every comparison
+        keyed = [(Version.coerce(release["semver"]), release) for release in res["releases"]]
+        _, latest = max(keyed, key=lambda item: item[0])
+        latest_release = Release.from_payload(self.client, self.model_id, latest)
+
         logger.info(
             "latest_release (%s) for %s retrieved successfully.",
             str(latest_release.version),
             self.model_id,
         )
 
-        return max(releases)
+        return latest_release
 
     def get_images(self):
         """Get all model image references for the model.
@@ -376,29 +392,87 @@ class Model(Entry):
         """
         raise NotImplementedError
 
+    def _hydrate(self) -> None:
+        if self._hydrated:
+            return
+
+        self._hydrated = True
+        assigned = {attr: getattr(self, attr) for attr in self._assigned}
+        try:
+            res = self.client.get_model(model_id=self.model_id)["model"]
+            self._unpack(res)
+            self.organisation = res.get("organisation")
+            self.state = res.get("state")
+            self._unpack_latest_card(res)
+        except BaseException:
+            self._hydrated = False
+            raise
+        finally:
+            for attr, value in assigned.items():
+                setattr(self, attr, value)
+        self._assigned.clear()
+
+        logger.info("Model %s successfully hydrated from server.", self.model_id)
+
+    def _assign(self, attr: str, value: Any) -> None:
+        # Setting a lazy attribute doesn't fetch the model, but the value is kept when it's later hydrated
+        setattr(self, attr, value)
+        if not self._hydrated:
+            self._assigned.add(attr)
+
+    @property
+    def visibility(self):
+        self._hydrate()
+        return self._visibility
+
+    @visibility.setter
+    def visibility(self, value):
+        self._assign("_visibility", value)
+
+    @property
+    def organisation(self):
+        self._hydrate()
+        return self._organisation
+
+    @organisation.setter
+    def organisation(self, value):
+        self._assign("_organisation", value)
+
+    @property
+    def state(self):
+        self._hydrate()
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        self._assign("_state", value)
+
     @property
     def model_card(self):
+        self._hydrate()
         return self._card
 
     @model_card.setter
     def model_card(self, value):
-        self._card = value
+        self._assign("_card", value)
 
     @property
     def model_card_version(self):
+        self._hydrate()
         return self._card_version
 
     @model_card_version.setter
     def model_card_version(self, value):
-        self._card_version = value
+        self._assign("_card_version", value)
 
     @property
     def model_card_schema(self):
+        self._hydrate()
         return self._card_schema
 
     @model_card_schema.setter
     def model_card_schema(self, value):
-        self._card_schema = value
+        self._assign("_card_schema", value)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({str(self)})"
@@ -636,8 +710,7 @@ class Experiment:
                 str(release_new_version),
                 self.model.model_id,
             )
-            for artifact in artifacts:
-                release_new.upload(path=artifact)
+            release_new.upload_many(artifacts)
             self.published = True
 
             if os.path.exists(self.temp_dir) and os.path.isdir(self.temp_dir):
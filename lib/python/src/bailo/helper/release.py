@@ -1,26 +1,73 @@
 from __future__ import annotations
 
+import contextlib
 import fnmatch
+import functools
+import hashlib
+import json
 import logging
 import os
-import shutil
-from io import BytesIO
-from typing import Any
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from io import BufferedReader, BytesIO
+from typing import Any, Callable, Iterable, Iterator
 
+from requests import Response
 from semantic_version import Version
 from tqdm import tqdm
-from tqdm.utils import CallbackIOWrapper
 
 # isort: split
 
+from bailo.core.archive import ZipStream, extract_zip
+from bailo.core.cache import DownloadCache
 from bailo.core.client import Client
-from bailo.core.exceptions import BailoException
-from bailo.core.utils import NO_COLOR
+from bailo.core.codec import ZSTD_CODEC, check_codec, codec_tag, compress_chunks, decompress_chunks, tagged_codec
+from bailo.core.delta import DELTA_BLOCK_SIZE, DELTA_TAG, DeltaReader, compute_delta, delta_chunks, literal_size
+from bailo.core.digest import FileIndex, digest_tag, sha256_data, sha256_file, tagged_digest
+from bailo.core.download import RANGE_THRESHOLD, STREAM_BLOCK_SIZE, BufferDownload, RangeDownload, RangeFile
+from bailo.core.exceptions import BailoException, RangesNotSupported, ResponseException
+from bailo.core.ratelimit import RateLimiter
+from bailo.core.upload import MULTIPART_THRESHOLD, Buffer, MultipartUpload, UploadJournal, stream_chunks, upload_body
+from bailo.core.utils import DEFAULT_CONCURRENCY, NO_COLOR, atomic_write_json, is_seekable, safe_join
 
 BLOCK_SIZE = 1024
+# Minimum size of the range requests made reading an archive's members.
+EXTRACT_BLOCK_SIZE = 8 * 1024**2
+# Name of the manifest of synced files kept in a directory synced with Release.sync.
+SYNC_MANIFEST = ".bailo-manifest.json"
 logger = logging.getLogger(__name__)
 
 
+def _remove_synced(path: str, name: str) -> None:
+    # Remove a synced file, and any directories left empty under path
+    local_path = safe_join(path, name)
+    try:
+        os.remove(local_path)
+    except FileNotFoundError:
+        pass
+
+    directory = os.path.dirname(local_path)
+    while os.path.abspath(directory) != os.path.abspath(path):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+def _name_matches(name: str, include: list | str = "", exclude: list | str = "") -> bool:
+    # An empty pattern means no filter
+    if isinstance(include, str):
+        include = [include] if include else []
+    if isinstance(exclude, str):
+        exclude = [exclude] if exclude else []
+
+    if include and not any(fnmatch.fnmatch(name, pattern) for pattern in include):
+        return False
+    return not any(fnmatch.fnmatch(name, pattern) for pattern in exclude)
+
+
 class Release:
     def __init__(
         self,
@@ -63,6 +110,8 @@ class Release:
         self.minor = minor
         self.notes = notes
         self.files = files
+        # SHA-256 digests of the files uploaded or downloaded, keyed by file name
+        self.digests: dict[str, str] = {}
         self.images = images
         self.draft = draft
 
@@ -135,40 +184,83 @@ class Release:
         """
         res = client.get_release(model_id, str(version))["release"]
 
-        model_card_version = res["modelCardVersion"]
-        notes = res["notes"]
-        files = res["fileIds"]
-        images = res["images"]
-        minor = res["minor"]
-        draft = res["draft"]
-
         logger.info(
             "Release %s of model ID %s successfully retrieved from server.",
             str(version),
             model_id,
         )
 
+        return cls.from_payload(client, model_id, res)
+
+    @classmethod
+    def from_payload(cls, client: Client, model_id: str, res: dict[str, Any]) -> Release:
+        """Return a release from a release object already returned by Bailo (e.g. by `Client.get_all_releases`).
+
+        :param client: A client object used to interact with Bailo
+        :param model_id: A Unique Model ID
+        :param res: Release object returned by Bailo
+        """
         return cls(
             client,
             model_id,
-            version,
-            model_card_version,
-            notes,
-            files,
-            images,
-            minor,
-            draft,
+            res["semver"],
+            res["modelCardVersion"],
+            res["notes"],
+            res["fileIds"],
+            res["images"],
+            res["minor"],
+            res["draft"],
         )
 
-    def download(self, filename: str, write: bool = True, path: str | None = None) -> Any:
+    def download(
+        self,
+        filename: str,
+        write: bool = True,
+        path: str | None = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        resume: bool = True,
+        cache: DownloadCache | None = None,
+        verify: bool = False,
+        decompress: bool = False,
+    ) -> Any:
         """Returns a response object given the file name and optionally writes file to disk.
 
         :param filename: The name of the file to retrieve
         :param write: Bool to determine if writing file to disk, defaults to True
         :param path: Local path to write file to (if write set to True)
-
-        :return: A JSON response object
+        :param concurrency: Number of byte ranges downloaded at once, where supported by the server, defaults to 8
+        :param resume: Continue an interrupted download of the same file at path, where supported by the server, defaults to True
+        :param cache: Local download cache to materialise the file from, or add it to (if write set to True), defaults to None
+        :param verify: Check the written file against the SHA-256 digest recorded when it was uploaded, if there is one, defaults to False
+        :param decompress: Decompress a file uploaded with compression, or reconstruct one uploaded as a delta, as it's written, defaults to False
+
+        :return: A JSON response object, or None if the file was materialised from the cache
+        :raises BailoException: If the written file doesn't match its recorded digest, or (if cache, verify or decompress are set) the release has no file named filename
+        ..note:: The cache, verify & decompress params need the file's metadata, which costs an extra request for the release. Release.download_all fetches it once for all files, so verifies & decompresses by default.
+        ..note:: The response body of a file uploaded with compression (or as a delta) is compressed (or the delta), even if the file is written decompressed (or reconstructed)
         """
+        if write and path is None:
+            path = safe_join(os.curdir, filename)
+
+        file_id = None
+        expected_digest = None
+        codec = None
+        delta = False
+        if write and (cache is not None or verify or decompress):
+            file_metadata = self._get_file_metadata(filename)
+            file_id = file_metadata["id"]
+            if verify:
+                expected_digest = tagged_digest(file_metadata.get("tags") or [])
+            if decompress:
+                codec = tagged_codec(file_metadata.get("tags") or [])
+                delta = DELTA_TAG in (file_metadata.get("tags") or [])
+
+        if write and cache is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)  # type: ignore[reportArgumentType]
+            decoded = codec is not None or delta
+            if cache.materialise(self.model_id, file_id, path, decoded):  # type: ignore[reportArgumentType]
+                return None
+
         res = self.client.get_download_by_filename(self.model_id, str(self.version), filename)
         logger.info(
             "Downloading file %s from version %s of %s...",
@@ -178,8 +270,6 @@ class Release:
         )
 
         if write:
-            if path is None:
-                path = filename
             total_size = int(res.headers.get("content-length", 0))
 
             if NO_COLOR:
@@ -195,10 +285,9 @@ class Release:
                 postfix=f"downloading {filename} as {path}",
                 colour=colour,
             ) as t:
-                with open(path, "wb") as f:
-                    for data in res.iter_content(BLOCK_SIZE):
-                        t.update(len(data))
-                        f.write(data)
+                res = self._download_file(
+                    filename, path, concurrency, resume, t.update, res, cache, file_id, expected_digest, codec, delta
+                )
 
             logger.info("File written to %s", path)
 
@@ -211,59 +300,616 @@ class Release:
 
         return res
 
+    def download_to_buffer(
+        self,
+        filename: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        range_threshold: int = RANGE_THRESHOLD,
+        verify: bool = False,
+        decompress: bool = False,
+    ) -> memoryview:
+        """Downloads a file into memory, without writing it to disk.
+
+        The file is read straight into a buffer preallocated from its size. Files of at least range_threshold bytes
+        are fetched in parallel byte ranges, where supported by the server.
+
+        :param filename: The name of the file to retrieve
+        :param concurrency: Number of byte ranges downloaded at once, where supported by the server, defaults to 8
+        :param range_threshold: Minimum size in bytes for a parallel range download, defaults to 64MiB
+        :param verify: Check the data against the SHA-256 digest recorded when it was uploaded, if there is one, defaults to False
+        :param decompress: Decompress a file uploaded with compression, defaults to False
+        :return: A memoryview of the file's contents (wrap it in BytesIO for a file object)
+        :raises BailoException: If the data doesn't match its recorded digest, or the file was uploaded as a delta (and decompress is set)
+        ..note:: The verify & decompress params need the file's metadata, which costs an extra request for the release.
+        """
+        tags = []
+        if verify or decompress:
+            tags = self._get_file_metadata(filename).get("tags") or []
+        if decompress and DELTA_TAG in tags:
+            raise BailoException(f"File {filename} was uploaded as a delta, so can only be downloaded to disk.")
+        codec = tagged_codec(tags) if decompress else None
+
+        res = self.client.get_download_by_filename(self.model_id, str(self.version), filename)
+        logger.info(
+            "Downloading file %s from version %s of %s into memory...",
+            filename,
+            str(self.version),
+            self.model_id,
+        )
+
+        if NO_COLOR:
+            colour = "white"
+        else:
+            colour = "green"
+
+        with tqdm(
+            total=int(res.headers.get("content-length", 0)),
+            unit="B",
+            unit_scale=True,
+            unit_divisor=BLOCK_SIZE,
+            postfix=f"downloading {filename} into memory",
+            colour=colour,
+        ) as t:
+            downloader = BufferDownload(
+                lambda byte_range: self.client.get_download_by_filename(
+                    self.model_id, str(self.version), filename, byte_range
+                ),
+                concurrency=concurrency,
+                callback=t.update,
+                range_threshold=range_threshold,
+                expected_digest=tagged_digest(tags) if verify else None,
+                limiter=self._rate_limiter,
+                decode=None if codec is None else functools.partial(decompress_chunks, codec=codec),
+            )
+            data = downloader.download(res)
+
+        self.digests[filename] = downloader.digest  # type: ignore[reportArgumentType]
+        logger.info(
+            "Downloading of file %s from version %s of %s completed.",
+            filename,
+            str(self.version),
+            self.model_id,
+        )
+
+        return data
+
     def download_all(
         self,
-        path: str = os.getcwd(),
+        path: str | None = None,
         include: list | str = "",
         exclude: list | str = "",
+        concurrency: int = DEFAULT_CONCURRENCY,
+        resume: bool = True,
+        cache: DownloadCache | None = None,
+        verify: bool = True,
+        decompress: bool = True,
     ):
         """Writes all files to disk given a local directory.
 
-        :param path: Local directory to write files to
+        Files are downloaded concurrently, with a single progress bar for the whole release. A failed file doesn't stop
+        the others from downloading.
+
+        :param path: Local directory to write files to, defaults to the current working directory
         :param include: List or string of fnmatch statements for file names to include, defaults to None
         :param exclude: List or string of fnmatch statements for file names to exclude, defaults to None
-        :raises BailoException: If the release has no files assigned to it
+        :param concurrency: Number of files (or byte ranges of a single file) downloaded at once, defaults to 8
+        :param resume: Continue interrupted downloads of the same files, where supported by the server, defaults to True
+        :param cache: Local download cache to materialise files from, and add downloaded files to, defaults to None
+        :param verify: Check each written file against the SHA-256 digest recorded when it was uploaded, if there is one, defaults to True
+        :param decompress: Decompress files uploaded with compression, and reconstruct those uploaded as deltas, as they're written, defaults to True
+        :raises BailoException: If the release has no files assigned to it, or any of the files failed to download or verify
         ..note:: Fnmatch statements support Unix shell-style wildcards.
         """
+        if path is None:
+            path = os.getcwd()
+
         files_metadata = self.client.get_release(self.model_id, str(self.version))["release"]["files"]
         if files_metadata == []:
             raise BailoException("Release has no associated files.")
-        file_names = [file_metadata["name"] for file_metadata in files_metadata]
-        orig_file_names = file_names
-
-        if isinstance(include, str):
-            include = [include]
-        if isinstance(exclude, str):
-            exclude = [exclude]
+        orig_file_names = [file_metadata["name"] for file_metadata in files_metadata]
+        file_names = [file for file in orig_file_names if _name_matches(file, include, exclude)]
 
-        if include is not None:
-            file_names = [file for file in file_names if any([fnmatch.fnmatch(file, pattern) for pattern in include])]
+        logger.info(
+            "Downloading %d of %d files for version %s of %s...",
+            len(file_names),
+            len(orig_file_names),
+            str(self.version),
+            self.model_id,
+        )
+        errors = self._download_files(files_metadata, file_names, path, concurrency, resume, cache, verify, decompress)
 
-        if exclude is not None:
-            file_names = [
-                file for file in file_names if not any([fnmatch.fnmatch(file, pattern) for pattern in exclude])
-            ]
+        if errors:
+            failures = "; ".join(f"{file} ({ex})" for file, ex in errors.items())
+            raise BailoException(f"Failed to download {len(errors)} of {len(file_names)} files: {failures}")
 
         logger.info(
-            "Downloading %d of %%d files for version %s of %s...",
+            "Downloaded %d files for version %s of %s to %s.",
             len(file_names),
-            len(orig_file_names),
             str(self.version),
-            {self.model_id},
+            self.model_id,
+            path,
         )
+
+    def sync(
+        self,
+        path: str,
+        include: list | str = "",
+        exclude: list | str = "",
+        concurrency: int = DEFAULT_CONCURRENCY,
+        delete: bool = True,
+        cache: DownloadCache | None = None,
+        verify: bool = True,
+        decompress: bool = True,
+    ) -> dict[str, list[str]]:
+        """Mirrors the release's files into a local directory, downloading only the files which are new or have changed.
+
+        The name, ID, size & SHA-256 digest of each synced file are recorded in a manifest in the directory
+        (`.bailo-manifest.json`). A file is downloaded again if its ID or digest differs from the manifest, or the local
+        copy is missing or has changed size. When nothing has changed, a sync makes a single metadata request.
+
+        :param path: Local directory to mirror the files into
+        :param include: List or string of fnmatch statements for file names to include, defaults to None
+        :param exclude: List or string of fnmatch statements for file names to exclude, defaults to None
+        :param concurrency: Number of files (or byte ranges of a single file) downloaded at once, defaults to 8
+        :param delete: Delete synced files which are no longer in the release (or no longer match the patterns), defaults to True
+        :param cache: Local download cache to materialise files from, and add downloaded files to, defaults to None
+        :param verify: Check each written file against the SHA-256 digest recorded when it was uploaded, if there is one, defaults to True
+        :param decompress: Decompress files uploaded with compression, and reconstruct those uploaded as deltas, as they're written, defaults to True
+        :return: Dictionary of the names of the files "downloaded" and "deleted"
+        :raises BailoException: If any of the files failed to download or verify
+        ..note:: Only files recorded in the manifest are ever deleted, so other files in the directory are left alone.
+        """
+        files_metadata = self.client.get_release(self.model_id, str(self.version))["release"]["files"]
+        files_metadata = [file for file in files_metadata if _name_matches(file["name"], include, exclude)]
         os.makedirs(path, exist_ok=True)
-        for file in file_names:
-            file_path = os.path.join(path, file)
-            self.download(filename=file, path=file_path)
 
-    def upload(self, path: str, data: BytesIO | None = None) -> str:  # type: ignore[reportRedeclaration]
+        manifest_path = os.path.join(path, SYNC_MANIFEST)
+        try:
+            with open(manifest_path) as f:
+                synced: dict[str, dict[str, Any]] = json.load(f)["files"]
+        except FileNotFoundError:
+            synced = {}
+        except (ValueError, KeyError):
+            logger.warning("Ignoring corrupt sync manifest %s.", manifest_path)
+            synced = {}
+
+        changed = []
+        for file_metadata in files_metadata:
+            name = file_metadata["name"]
+            entry = synced.get(name)
+            local_path = safe_join(path, name)
+            digest = tagged_digest(file_metadata.get("tags") or [])
+            if (
+                entry is None
+                or entry["id"] != file_metadata["id"]
+                or (digest is not None and entry["sha256"] != digest)
+                or not os.path.isfile(local_path)
+                or os.path.getsize(local_path) != entry["size"]
+            ):
+                changed.append(name)
+
+        names = {file_metadata["name"] for file_metadata in files_metadata}
+        removed = [name for name in synced if name not in names]
+        if not changed and not removed:
+            logger.info("%s is up to date with version %s of %s.", path, str(self.version), self.model_id)
+            return {"downloaded": [], "deleted": []}
+
+        logger.info(
+            "Syncing %s with version %s of %s: %d files to download, %d to delete...",
+            path,
+            str(self.version),
+            self.model_id,
+            len(changed),
+            len(removed) if delete else 0,
+        )
+
+        # Changed files are dropped from the manifest until they're downloaded, so a failed sync retries them
+        for name in changed:
+            synced.pop(name, None)
+        errors = self._download_files(files_metadata, changed, path, concurrency, False, cache, verify, decompress)
+
+        file_ids = {file_metadata["name"]: file_metadata["id"] for file_metadata in files_metadata}
+        # The recorded digest is of the file as uploaded (e.g. compressed, or the delta), so is compared like with like
+        tagged_digests = {
+            file_metadata["name"]: tagged_digest(file_metadata.get("tags") or []) for file_metadata in files_metadata
+        }
+        for name in changed:
+            if name in errors:
+                continue
+            local_path = safe_join(path, name)
+            digest = tagged_digests[name] or self.digests.get(name) or sha256_file(local_path)
+            synced[name] = {"id": file_ids[name], "size": os.path.getsize(local_path), "sha256": digest}
+
+        deleted = []
+        if delete:
+            for name in removed:
+                _remove_synced(path, name)
+                synced.pop(name)
+                deleted.append(name)
+
+        self._write_sync_manifest(manifest_path, synced)
+
+        if errors:
+            failures = "; ".join(f"{file} ({ex})" for file, ex in errors.items())
+            raise BailoException(f"Failed to sync {len(errors)} of {len(changed)} files: {failures}")
+
+        return {"downloaded": changed, "deleted": deleted}
+
+    def _write_sync_manifest(self, manifest_path: str, synced: dict[str, dict[str, Any]]) -> None:
+        manifest = {"modelId": self.model_id, "semver": str(self.version), "files": synced}
+        atomic_write_json(manifest_path, manifest, indent=2)
+
+    def _download_files(
+        self,
+        files_metadata: list[dict[str, Any]],
+        file_names: list[str],
+        path: str,
+        concurrency: int,
+        resume: bool,
+        cache: DownloadCache | None,
+        verify: bool,
+        decompress: bool,
+    ) -> dict[str, Exception]:
+        # Download files concurrently under path, collecting the errors of those which fail
+        os.makedirs(path, exist_ok=True)
+
+        # File names may contain directories (e.g. from upload_directory), which are recreated under path
+        local_paths = {file: safe_join(path, file) for file in file_names}
+
+        sizes = {file_metadata["name"]: file_metadata.get("size", 0) for file_metadata in files_metadata}
+        file_ids = {file_metadata["name"]: file_metadata.get("id") for file_metadata in files_metadata}
+        expected_digests = {
+            file_metadata["name"]: tagged_digest(file_metadata.get("tags") or []) if verify else None
+            for file_metadata in files_metadata
+        }
+        codecs = {
+            file_metadata["name"]: tagged_codec(file_metadata.get("tags") or []) if decompress else None
+            for file_metadata in files_metadata
+        }
+        deltas = {
+            file_metadata["name"]: decompress and DELTA_TAG in (file_metadata.get("tags") or [])
+            for file_metadata in files_metadata
+        }
+        # Split the workers between files, so that a single large file still downloads in parallel ranges
+        range_concurrency = max(1, concurrency // max(1, min(concurrency, len(file_names))))
+        errors: dict[str, Exception] = {}
+        if not file_names:
+            return errors
+
+        if NO_COLOR:
+            colour = "white"
+        else:
+            colour = "green"
+
+        with tqdm(
+            total=sum(sizes[file] for file in file_names),
+            unit="B",
+            unit_scale=True,
+            unit_divisor=BLOCK_SIZE,
+            postfix=f"0/{len(file_names)} files",
+            colour=colour,
+        ) as t:
+            progress_lock = threading.Lock()
+
+            def progress(nbytes: int) -> None:
+                with progress_lock:
+                    t.update(nbytes)
+
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bailo-download-all") as executor:
+                futures = {
+                    executor.submit(
+                        self._download_file,
+                        file,
+                        local_paths[file],
+                        range_concurrency,
+                        resume,
+                        progress,
+                        cache=cache,
+                        file_id=file_ids[file],
+                        expected_digest=expected_digests[file],
+                        codec=codecs[file],
+                        delta=deltas[file],
+                    ): file
+                    for file in file_names
+                }
+
+                for completed, future in enumerate(as_completed(futures), 1):
+                    file = futures[future]
+                    try:
+                        future.result()
+                    except (BailoException, ResponseException, OSError) as ex:
+                        logger.error("Failed to download file %s: %s", file, ex)
+                        errors[file] = ex
+
+                    with progress_lock:
+                        t.set_postfix_str(f"{completed}/{len(file_names)} files")
+
+        return errors
+
+    def extract(
+        self,
+        filename: str,
+        path: str | None = None,
+        include: list | str = "",
+        exclude: list | str = "",
+        concurrency: int = DEFAULT_CONCURRENCY,
+        verify: bool = True,
+        block_size: int = EXTRACT_BLOCK_SIZE,
+    ) -> list[str]:
+        """Extracts a zip archive file (e.g. one uploaded with upload_directory) into a local directory, without writing the archive to disk.
+
+        Where the server supports range requests, the archive's central directory is read from the end of the file,
+        then only the selected members are fetched and written straight into the directory. Otherwise (or if the file
+        was uploaded with compression, or as a delta) the archive is downloaded to a temporary file, and removed once
+        extracted.
+
+        :param filename: The name of the zip archive file to extract
+        :param path: Local directory to extract members into, defaults to the current working directory
+        :param include: List or string of fnmatch statements for member names to include, defaults to None
+        :param exclude: List or string of fnmatch statements for member names to exclude, defaults to None
+        :param concurrency: Number of byte ranges downloaded at once, when the archive is downloaded to a temporary file, defaults to 8
+        :param verify: Check an archive downloaded to a temporary file against the SHA-256 digest recorded when it was uploaded, if there is one, defaults to True
+        :param block_size: Minimum size of each range request in bytes, defaults to 8MiB
+        :return: The local paths of the extracted files
+        :raises BailoException: If a member's name would resolve outside of the directory, or the downloaded archive doesn't match its recorded digest
+        ..note:: Fnmatch statements support Unix shell-style wildcards. Members read with range requests are checked by
+                 their CRC-32, rather than the archive's digest.
+        """
+        if path is None:
+            path = os.getcwd()
+
+        file_metadata = self._get_file_metadata(filename)
+        tags = file_metadata.get("tags") or []
+        codec = tagged_codec(tags)
+        delta = DELTA_TAG in tags
+        size = file_metadata.get("size")
+
+        def select(name: str) -> bool:
+            return _name_matches(name, include, exclude)
+
+        def fetch(byte_range: tuple[int, int] | None) -> Response:
+            return self.client.get_download_by_filename(self.model_id, str(self.version), filename, byte_range)
+
+        ranged = False
+        if codec is None and not delta and size:
+            try:
+                probe = fetch((0, 0))
+            except (BailoException, ResponseException) as ex:
+                # Servers which don't support ranges may reject range requests outright
+                logger.info("Range request for %s was rejected (%s), downloading the archive instead.", filename, ex)
+            else:
+                ranged = probe.status_code == 206
+                probe.close()
+
+        logger.info(
+            "Extracting file %s from version %s of %s to %s...",
+            filename,
+            str(self.version),
+            self.model_id,
+            path,
+        )
+
+        if NO_COLOR:
+            colour = "white"
+        else:
+            colour = "green"
+
+        with tqdm(
+            unit="B",
+            unit_scale=True,
+            unit_divisor=BLOCK_SIZE,
+            postfix=f"extracting {filename} to {path}",
+            colour=colour,
+        ) as t:
+            extracted = None
+            if ranged:
+                raw = RangeFile(fetch, size, limiter=self._rate_limiter)  # type: ignore[reportArgumentType]
+                try:
+                    with BufferedReader(raw, buffer_size=block_size) as f:
+                        extracted = extract_zip(f, path, select, t.update)
+                except RangesNotSupported:
+                    # The probe was answered with a range, but a later request wasn't
+                    logger.info("Range request for %s was ignored, downloading the archive instead.", filename)
+                    t.reset()
+
+            if extracted is None:
+                with tempfile.TemporaryDirectory(prefix="bailo-extract-") as tmp_dir:
+                    archive_path = os.path.join(tmp_dir, "archive.zip")
+                    self._download_file(
+                        filename,
+                        archive_path,
+                        concurrency,
+                        False,
+                        lambda nbytes: None,
+                        expected_digest=tagged_digest(tags) if verify else None,
+                        codec=codec,
+                        delta=delta,
+                    )
+                    with open(archive_path, "rb") as f:
+                        extracted = extract_zip(f, path, select, t.update)
+
+        logger.info(
+            "Extracted %d files from %s of version %s of %s.",
+            len(extracted),
+            filename,
+            str(self.version),
+            self.model_id,
+        )
+
+        return extracted
+
+    def _download_file(
+        self,
+        filename: str,
+        path: str,
+        concurrency: int,
+        resume: bool,
+        callback: Callable[[int], Any],
+        res: Response | None = None,
+        cache: DownloadCache | None = None,
+        file_id: str | None = None,
+        expected_digest: str | None = None,
+        codec: str | None = None,
+        delta: bool = False,
+    ) -> Response | None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # Encoded files are cached separately as stored and decoded, so a hit is always in the encoding asked for
+        decoded = codec is not None or delta
+        if cache is not None and file_id is not None:
+            if cache.materialise(self.model_id, file_id, path, decoded):
+                callback(os.path.getsize(path))
+                if res is not None:
+                    res.close()
+                return None
+
+        if delta:
+            return self._download_delta(filename, path, callback, res, cache, file_id, expected_digest)
+
+        downloader = RangeDownload(
+            lambda byte_range: self.client.get_download_by_filename(
+                self.model_id, str(self.version), filename, byte_range
+            ),
+            path,
+            concurrency=concurrency,
+            callback=callback,
+            resume=resume,
+            expected_digest=expected_digest,
+            limiter=self._rate_limiter,
+            decode=None if codec is None else functools.partial(decompress_chunks, codec=codec),
+        )
+        res = downloader.download(res)
+        if downloader.digest is not None:
+            self.digests[filename] = downloader.digest
+
+        if cache is not None and file_id is not None:
+            # The digest computed during the download saves hashing the file again, unless it's of compressed data
+            cache.add(
+                self.model_id, file_id, path, digest=downloader.digest if codec is None else None, decoded=decoded
+            )
+
+        return res
+
+    def _download_delta(
+        self,
+        filename: str,
+        path: str,
+        callback: Callable[[int], Any],
+        res: Response | None = None,
+        cache: DownloadCache | None = None,
+        file_id: str | None = None,
+        expected_digest: str | None = None,
+    ) -> Response:
+        if res is None:
+            res = self.client.get_download_by_filename(self.model_id, str(self.version), filename)
+
+        chunks: Iterable[bytes] = res.iter_content(STREAM_BLOCK_SIZE)
+        if self._rate_limiter is not None:
+            chunks = self._rate_limiter.throttle(chunks)
+        # The delta as stored, which the file's digest tag is of
+        stored = hashlib.sha256()
+        stream = stream_chunks(chunks, callback, digest=stored)
+        reader = DeltaReader(stream)
+        base = reader.manifest["base"]
+        directory = os.path.dirname(os.path.abspath(path))
+        logger.info("Reconstructing %s from its delta against file %s of %s.", filename, base["fileId"], self.model_id)
+
+        with self._base_file(base["fileId"], base.get("digest"), directory, cache) as base_path:
+            # Written alongside the target, and only moved into place once verified
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".bailo-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    digest = reader.apply(base_path, f)
+
+                for _ in stream:
+                    # Any trailing bytes are part of the stored delta too
+                    pass
+                if expected_digest is not None and stored.hexdigest() != expected_digest:
+                    raise BailoException(
+                        f"Download of {path} failed verification (expected SHA-256 {expected_digest}, got {stored.hexdigest()})."
+                    )
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        self.digests[filename] = digest
+        if cache is not None and file_id is not None:
+            cache.add(self.model_id, file_id, path, digest=digest, decoded=True)
+
+        return res
+
+    @contextlib.contextmanager
+    def _base_file(
+        self,
+        file_id: str,
+        digest: str | None,
+        directory: str,
+        cache: DownloadCache | None = None,
+        base_path: str | None = None,
+    ) -> Iterator[str]:
+        # A local copy of a delta's base file: the given path, the cached file, or a temporary download
+        if base_path is not None:
+            yield base_path
+            return
+
+        if cache is not None:
+            # The decoded copy, if the base is itself encoded
+            blob_path = cache.get(self.model_id, file_id, decoded=True) or cache.get(self.model_id, file_id)
+            if blob_path is not None:
+                yield blob_path
+                return
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".bailo-base-", suffix=".tmp")
+        os.close(fd)
+        try:
+            logger.info("Downloading delta base file %s of %s...", file_id, self.model_id)
+            RangeDownload(
+                lambda byte_range: self.client.get_download_file(self.model_id, file_id, byte_range),
+                tmp_path,
+                resume=False,
+                expected_digest=digest,
+                limiter=self._rate_limiter,
+            ).download()
+            if cache is not None:
+                cache.add(self.model_id, file_id, tmp_path, digest=digest)
+            yield tmp_path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _get_file_metadata(self, filename: str) -> dict[str, Any]:
+        files_metadata = self.client.get_release(self.model_id, str(self.version))["release"]["files"]
+        for file_metadata in files_metadata:
+            if file_metadata["name"] == filename:
+                return file_metadata
+
+        raise BailoException(f"Release {self} has no file named {filename}.")
+
+    def upload(
+        self,
+        path: str,
+        data: BytesIO | Buffer | Iterable[bytes] | None = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        multipart_threshold: int | None = MULTIPART_THRESHOLD,
+        resume: bool = True,
+        deduplicate: bool = False,
+        compress: bool = False,
+    ) -> str:  # type: ignore[reportRedeclaration]
         """Upload a file to the release.
 
         :param path: The path, or name of file or directory to be uploaded
-        :param data: A BytesIO object if not loading from disk, defaults to None
+        :param data: A file object (seekable or not), bytes-like object or iterable of bytes if not loading from disk, defaults to None
+        :param concurrency: Number of chunks uploaded at once for multipart uploads, defaults to 8
+        :param multipart_threshold: Minimum size in bytes for a multipart upload, or None to never use one, defaults to 1GiB
+        :param resume: Resume an interrupted multipart upload of the same file from disk, defaults to True
+        :param deduplicate: Reuse a file already uploaded to the model with the same name & contents, rather than uploading it again, defaults to False
+        :param compress: Compress the file with zstd as it's uploaded, to be decompressed again on download, defaults to False
 
         :return: The unique file ID of the file uploaded
         ..note:: If path provided is a directory, it will be uploaded as a zip
+        ..note:: Compressed files are always sent in a single request, and are never deduplicated
         """
         logger.info(
             "Uploading file(s) to version %s of %s...",
@@ -271,34 +917,169 @@ class Release:
             self.model_id,
         )
 
-        to_close = False
-        # If no datastream object provided
-        name = os.path.split(path)[-1]
-        if data is None:
-            # If we haven't passed in a file object, we must create one from the path.
-            # Check if file exists, if it does the zip required
-            zip_required = not os.path.isfile(path)
+        if compress:
+            check_codec(ZSTD_CODEC)
+        name, data, size, to_close, journal_path = self._open_upload(path, data, resume)
+        index = FileIndex.for_model(self.client, self.model_id) if deduplicate else None
 
-            if zip_required:
-                logger.info(
-                    "Given path (%s) is a directory. This will be converted to a zip file for upload.",
-                    path,
+        if NO_COLOR:
+            colour = "white"
+        else:
+            colour = "blue"
+
+        try:
+            with tqdm(
+                total=size,
+                unit="B",
+                unit_scale=True,
+                unit_divisor=BLOCK_SIZE,
+                postfix=f"uploading {name}",
+                colour=colour,
+            ) as t:
+                file_id, _ = self._upload_data(
+                    name, data, size, concurrency, multipart_threshold, journal_path, t.update, index, compress  # type: ignore[reportArgumentType]
                 )
-                shutil.make_archive(name, "zip", path)
-                path = f"{name}.zip"
-                name = path
+        finally:
+            if to_close:
+                data.close()
 
-            data: BytesIO = open(path, "rb")  # type: ignore[reportAssignmentType]
-            to_close = True
+        if file_id not in self.files:
+            self.files.append(file_id)
+        self.update()
+        logger.info(
+            "Upload of file %s to version %s of %s complete.",
+            name,
+            str(self.version),
+            self.model_id,
+        )
 
-            if zip_required:
-                os.remove(path)
+        return file_id
 
-        # cache the current file position then move to the end and get the size before moving it back.
-        old_file_position = data.tell()
-        data.seek(0, os.SEEK_END)
-        size = data.tell()
-        data.seek(old_file_position, os.SEEK_SET)
+    def upload_many(
+        self,
+        paths: list[str],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        multipart_threshold: int | None = MULTIPART_THRESHOLD,
+        resume: bool = True,
+        deduplicate: bool = False,
+        compress: bool = False,
+    ) -> list[str]:
+        """Upload several files to the release concurrently, then attach them all with a single release update.
+
+        If any upload or the release update fails, the files already uploaded are deleted again, so none are left
+        unattached to the release.
+
+        :param paths: The paths of files or directories to be uploaded
+        :param concurrency: Number of files (or chunks, for multipart uploads) uploaded at once, defaults to 8
+        :param multipart_threshold: Minimum size in bytes for a multipart upload, or None to never use one, defaults to 1GiB
+        :param resume: Resume interrupted multipart uploads of the same files from disk, defaults to True
+        :param deduplicate: Reuse files already uploaded to the model with the same names & contents, rather than uploading them again, defaults to False
+        :param compress: Compress the files with zstd as they're uploaded, to be decompressed again on download, defaults to False
+        :raises BailoException: If any of the files fail to upload
+        :return: The unique file IDs of the files uploaded, in the order of paths
+
+        ..note:: Directories are uploaded as zips
+        """
+        return self._upload_many(
+            [(path, None) for path in paths], concurrency, multipart_threshold, resume, deduplicate, compress
+        )
+
+    def upload_directory(
+        self,
+        path: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        multipart_threshold: int | None = MULTIPART_THRESHOLD,
+        resume: bool = True,
+        deduplicate: bool = False,
+        compress: bool = False,
+    ) -> list[str]:
+        """Upload a directory to the release as individual files, rather than as a zip.
+
+        Each file is named by its path within the directory, prefixed by the directory's name and separated by `/`
+        (e.g. `weights/layers/0.bin`), so `download_all` recreates the directory tree and single files can be
+        downloaded on their own. Files are uploaded concurrently then attached with a single release update, as with
+        `upload_many`.
+
+        :param path: The path of the directory to be uploaded
+        :param concurrency: Number of files (or chunks, for multipart uploads) uploaded at once, defaults to 8
+        :param multipart_threshold: Minimum size in bytes for a multipart upload, or None to never use one, defaults to 1GiB
+        :param resume: Resume interrupted multipart uploads of the same files from disk, defaults to True
+        :param deduplicate: Reuse files already uploaded to the model with the same names & contents, rather than uploading them again, defaults to False
+        :param compress: Compress the files with zstd as they're uploaded, to be decompressed again on download, defaults to False
+        :raises BailoException: If path isn't a directory, or any of the files fail to upload
+        :return: The unique file IDs of the files uploaded
+        """
+        if not os.path.isdir(path):
+            raise BailoException(f"{path} is not a directory.")
+
+        prefix = os.path.basename(os.path.normpath(path))
+        files = []
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            for name in sorted(names):
+                file_path = os.path.join(root, name)
+                relative_path = os.path.relpath(file_path, path).replace(os.sep, "/")
+                files.append((file_path, f"{prefix}/{relative_path}"))
+
+        return self._upload_many(files, concurrency, multipart_threshold, resume, deduplicate, compress)
+
+    def upload_delta(
+        self,
+        path: str,
+        base: Release,
+        base_name: str | None = None,
+        base_path: str | None = None,
+        block_size: int = DELTA_BLOCK_SIZE,
+        cache: DownloadCache | None = None,
+    ) -> str:
+        """Upload a file as a block-level delta against a file of an earlier release of the same model.
+
+        Only the blocks which differ from the base file are uploaded, along with a manifest of where the rest are in
+        the base file. The file is tagged `bailo-delta`, and `download` & `download_all` reconstruct it from the base
+        file (taken from the cache, if given, or downloaded) as the delta is streamed.
+
+        :param path: The path of the file to be uploaded
+        :param base: An earlier release of the model containing the base file
+        :param base_name: Name of the base file in the base release, defaults to the name of the file
+        :param base_path: Path of a local copy of the base file, otherwise it's taken from the cache or downloaded, defaults to None
+        :param block_size: Size of the blocks compared with the base file, defaults to 4MiB
+        :param cache: Local download cache to take the base file from, or add it to, defaults to None
+        :raises BailoException: If the base release is of a different model, or the base file is itself a delta or compressed
+        :return: The unique file ID of the file uploaded
+        """
+        if base.model_id != self.model_id:
+            raise BailoException("The delta base must be a release of the same model.")
+
+        name = os.path.split(path)[-1]
+        base_file = base._get_file_metadata(base_name or name)
+        base_tags = base_file.get("tags") or []
+        if DELTA_TAG in base_tags or tagged_codec(base_tags) is not None:
+            raise BailoException(f"{base_file['name']} is a delta or compressed, so can't be used as a delta base.")
+
+        base_digest = tagged_digest(base_tags)
+        directory = os.path.dirname(os.path.abspath(path))
+        with self._base_file(base_file["id"], base_digest, directory, cache, base_path) as local_base:
+            manifest = compute_delta(
+                path,
+                local_base,
+                block_size,
+                base={
+                    "fileId": base_file["id"],
+                    "name": base_file["name"],
+                    "release": str(base.version),
+                    "digest": base_digest,
+                },
+            )
+
+        delta_size = literal_size(manifest)
+        logger.info(
+            "Uploading delta of %s against %s from version %s (%d of %d bytes changed)...",
+            name,
+            base_file["name"],
+            str(base.version),
+            delta_size,
+            manifest["size"],
+        )
 
         if NO_COLOR:
             colour = "white"
@@ -306,28 +1087,303 @@ class Release:
             colour = "blue"
 
         with tqdm(
-            total=size,
+            total=delta_size,
             unit="B",
             unit_scale=True,
             unit_divisor=BLOCK_SIZE,
-            postfix=f"uploading {name}",
+            postfix=f"uploading delta of {name}",
             colour=colour,
         ) as t:
-            wrapped_buffer = CallbackIOWrapper(t.update, data, "read")
-            res: dict[str, Any] = self.client.simple_upload(self.model_id, name, wrapped_buffer).json()  # type: ignore[reportArgumentType]
+            file_id, _ = self._upload_data(
+                name, delta_chunks(path, manifest), None, 1, None, None, t.update, tags=[DELTA_TAG]
+            )
+        self.digests[name] = manifest["digest"]
 
-        self.files.append(res["file"]["id"])
+        if file_id not in self.files:
+            self.files.append(file_id)
         self.update()
-        if to_close:
-            data.close()
         logger.info(
-            "Upload of file %s to version %s of %s complete.",
+            "Upload of delta of %s to version %s of %s complete.",
             name,
             str(self.version),
             self.model_id,
         )
 
-        return res["file"]["id"]
+        return file_id
+
+    def _upload_many(
+        self,
+        files: list[tuple[str, str | None]],
+        concurrency: int,
+        multipart_threshold: int | None,
+        resume: bool,
+        deduplicate: bool,
+        compress: bool = False,
+    ) -> list[str]:
+        if compress:
+            check_codec(ZSTD_CODEC)
+
+        logger.info(
+            "Uploading %d files to version %s of %s...",
+            len(files),
+            str(self.version),
+            self.model_id,
+        )
+
+        uploads = []
+        futures: dict[Future[tuple[str, bool]], int] = {}
+        try:
+            for path, name in files:
+                uploads.append(self._open_upload(path, None, resume, name))
+
+            index = FileIndex.for_model(self.client, self.model_id) if deduplicate else None
+            # Split the workers between files, so that a single large file still uploads in parallel chunks
+            chunk_concurrency = max(1, concurrency // max(1, min(concurrency, len(uploads))))
+            file_ids: dict[int, tuple[str, bool]] = {}
+            errors: dict[int, Exception] = {}
+
+            if NO_COLOR:
+                colour = "white"
+            else:
+                colour = "blue"
+
+            with tqdm(
+                total=sum(size or 0 for _, _, size, _, _ in uploads),
+                unit="B",
+                unit_scale=True,
+                unit_divisor=BLOCK_SIZE,
+                postfix=f"0/{len(uploads)} files",
+                colour=colour,
+            ) as t:
+                progress_lock = threading.Lock()
+
+                def progress(nbytes: int) -> None:
+                    with progress_lock:
+                        t.update(nbytes)
+
+                with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bailo-upload-many") as executor:
+                    futures = {
+                        executor.submit(
+                            self._upload_data,
+                            name,
+                            data,
+                            size,
+                            chunk_concurrency,
+                            multipart_threshold,
+                            journal_path,
+                            progress,
+                            index,
+                            compress,
+                        ): i
+                        for i, (name, data, size, _, journal_path) in enumerate(uploads)
+                    }
+
+                    try:
+                        for completed, future in enumerate(as_completed(futures), 1):
+                            i = futures[future]
+                            try:
+                                file_ids[i] = future.result()
+                            except (BailoException, ResponseException, OSError) as ex:
+                                logger.error("Failed to upload file %s: %s", uploads[i][0], ex)
+                                errors[i] = ex
+
+                            with progress_lock:
+                                t.set_postfix_str(f"{completed}/{len(uploads)} files")
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+        except BaseException:
+            # The executor has waited for any running uploads by now, so every file created so far can be removed
+            finished = [f.result() for f in futures if f.done() and not f.cancelled() and f.exception() is None]
+            self._delete_orphans([file_id for file_id, reused in finished if not reused])
+            raise
+        finally:
+            for _, data, _, to_close, _ in uploads:
+                if to_close:
+                    data.close()
+
+        uploaded = [file_ids[i][0] for i in sorted(file_ids)]
+        # Reused files belong to other releases too, so are never deleted
+        new_files = [file_ids[i][0] for i in sorted(file_ids) if not file_ids[i][1]]
+
+        if errors:
+            self._delete_orphans(new_files)
+            failures = "; ".join(f"{uploads[i][0]} ({ex})" for i, ex in sorted(errors.items()))
+            raise BailoException(f"Failed to upload {len(errors)} of {len(uploads)} files: {failures}")
+
+        previous_files = self.files
+        self.files = previous_files + [file_id for file_id in dict.fromkeys(uploaded) if file_id not in previous_files]
+        try:
+            self.update()
+        except BaseException:
+            self.files = previous_files
+            self._delete_orphans(new_files)
+            raise
+
+        logger.info(
+            "Upload of %d files to version %s of %s complete.",
+            len(uploaded),
+            str(self.version),
+            self.model_id,
+        )
+
+        return uploaded
+
+    def _open_upload(
+        self, path: str, data: BytesIO | Buffer | Iterable[bytes] | None, resume: bool, name: str | None = None
+    ) -> tuple[str, BytesIO | Buffer | Iterable[bytes] | ZipStream, int | None, bool, str | None]:
+        if name is None:
+            name = os.path.split(path)[-1]
+
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = memoryview(data).cast("B")
+            return name, data, len(data), False, None
+        if data is None and os.path.isdir(path):
+            logger.info(
+                "Given path (%s) is a directory. This will be streamed as a zip file for upload.",
+                path,
+            )
+            stream = ZipStream(path)
+            return f"{name}.zip", stream, stream.size, False, None
+
+        to_close = False
+        journal_path = None
+        # If no datastream object provided
+        if data is None:
+            # If we haven't passed in a file object, we must create one from the path.
+            data: BytesIO = open(path, "rb")  # type: ignore[reportAssignmentType]
+            to_close = True
+
+            if resume:
+                journal_path = path
+
+        if not is_seekable(data):
+            # Pipes, sockets & iterators are streamed, as their size isn't known up front
+            return name, data, None, to_close, None
+
+        # cache the current file position then move to the end and get the size before moving it back.
+        old_file_position = data.tell()
+        data.seek(0, os.SEEK_END)
+        size = data.tell()
+        data.seek(old_file_position, os.SEEK_SET)
+
+        return name, data, size - old_file_position, to_close, journal_path
+
+    def _upload_data(
+        self,
+        name: str,
+        data: BytesIO | Buffer | Iterable[bytes] | ZipStream,
+        size: int | None,
+        concurrency: int,
+        multipart_threshold: int | None,
+        journal_path: str | None,
+        callback: Callable[[int], Any],
+        index: FileIndex | None = None,
+        compress: bool = False,
+        tags: list[str] | None = None,
+    ) -> tuple[str, bool]:
+        if compress or isinstance(data, ZipStream) or size is None:
+            # Archives, streams & compressed files have no size up front (which multipart uploads need), so use chunked
+            # transfer encoding
+            if isinstance(data, ZipStream):
+                chunks = data.stream(callback)
+            else:
+                chunks = stream_chunks(data, callback)  # type: ignore[reportArgumentType]
+
+            if compress:
+                chunks = compress_chunks(chunks)
+                # Tagged up front, so that the file is never mistaken for uncompressed data
+                tags = (tags or []) + [codec_tag(ZSTD_CODEC)]
+
+            sha256 = hashlib.sha256()
+            chunks = stream_chunks(chunks, digest=sha256, limiter=self._rate_limiter)
+            res: dict[str, Any] = self.client.simple_upload(self.model_id, name, chunks, tags).json()  # type: ignore[reportArgumentType]
+            file_id = res["file"]["id"]
+            self._record_digest(name, file_id, sha256.hexdigest(), tags)
+            return file_id, False
+
+        digest = None
+        multipart = multipart_threshold is not None and size >= multipart_threshold
+        if not multipart or (index is not None and index.has_candidate(name, size)):
+            # Simple uploads are hashed up front so they can be tagged with their digest as they're sent. Multipart
+            # uploads are only hashed up front if there's a file they could match, otherwise the digest comes from the
+            # chunks as they're sent, and is recorded once the upload finishes
+            digest = sha256_data(data)  # type: ignore[reportArgumentType]
+            file_id = None if index is None else index.find(digest, name, size)
+            if file_id is not None:
+                logger.info("File %s is unchanged, reusing existing file %s.", name, file_id)
+                callback(size)
+                self.digests[name] = digest
+                return file_id, True
+
+        file_id, sent_digest = self._send_data(name, data, size, concurrency, multipart_threshold, journal_path, callback, digest)  # type: ignore[reportArgumentType]
+
+        if sent_digest is not None and sent_digest != digest:
+            # The data wasn't hashed up front, or changed since it was
+            self._record_digest(name, file_id, sent_digest)
+            digest = sent_digest
+        elif digest is not None:
+            self.digests[name] = digest
+
+        if index is not None and digest is not None:
+            index.add(digest, name, size, file_id)
+        return file_id, False
+
+    def _send_data(
+        self,
+        name: str,
+        data: BytesIO | Buffer,
+        size: int,
+        concurrency: int,
+        multipart_threshold: int | None,
+        journal_path: str | None,
+        callback: Callable[[int], Any],
+        digest: str | None = None,
+    ) -> tuple[str, str | None]:
+        tags = None if digest is None else [digest_tag(digest)]
+
+        if multipart_threshold is not None and size >= multipart_threshold:
+            journal = None
+            if journal_path is not None:
+                journal = UploadJournal.for_file(journal_path, self.model_id, str(self.version), name)
+
+            upload = MultipartUpload(
+                self.client,
+                self.model_id,
+                name,
+                data,
+                size,
+                concurrency=concurrency,
+                callback=callback,
+                journal=journal,
+            )
+            file_id = upload.upload()
+
+            if tags is not None:
+                self.client.patch_file(self.model_id, file_id, tags=tags)
+            return file_id, upload.digest
+
+        with upload_body(data, callback, self._rate_limiter) as body:
+            res = self.client.simple_upload(self.model_id, name, body, tags).json()  # type: ignore[reportArgumentType]
+        return res["file"]["id"], body.digest
+
+    @property
+    def _rate_limiter(self) -> RateLimiter | None:
+        # Transfers share the rate limiter of the client's agent, if it has one
+        return getattr(self.client.agent, "rate_limiter", None)
+
+    def _record_digest(self, name: str, file_id: str, digest: str, tags: list[str] | None = None) -> None:
+        self.client.patch_file(self.model_id, file_id, tags=[digest_tag(digest)] + (tags or []))
+        self.digests[name] = digest
+
+    def _delete_orphans(self, file_ids: list[str]) -> None:
+        for file_id in file_ids:
+            try:
+                self.client.delete_file(self.model_id, file_id)
+                logger.info("Deleted unattached file %s of %s.", file_id, self.model_id)
+            except (BailoException, ResponseException, OSError) as ex:
+                logger.warning("Failed to delete unattached file %s of %s: %s", file_id, self.model_id, ex)
 
     def update(self) -> Any:
         """Update the any changes to this release on Bailo.
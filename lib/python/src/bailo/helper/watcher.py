@@ -0,0 +1,232 @@
+"""Continuous deployment of a model's releases to a local serving directory.
+
+A `ReleaseWatcher` polls a model's releases with conditional requests, so that an unchanged listing costs a single
+`304 Not Modified` response. When a release newer than the one deployed matches the version policy, its files are
+downloaded (and verified against their recorded digests) into a staging directory, which is then moved into place
+alongside earlier releases. A symlink pointing at the deployed release is swapped atomically, so serving processes only
+ever see a complete release.
+
+>>> watcher = ReleaseWatcher(client, "yolov4-abc123", "/srv/models/yolov4", policy=">=1.0.0,<2.0.0")
+>>> watcher.run()
+
+The serving directory `/srv/models/yolov4` is a symlink to `/srv/models/yolov4.releases/<semver>`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+from typing import Any, Callable
+
+from requests import RequestException
+from semantic_version import SimpleSpec, Version
+
+# isort: split
+
+from bailo.core.cache import DownloadCache
+from bailo.core.client import Client
+from bailo.core.exceptions import BailoException, ResponseException
+from bailo.core.utils import DEFAULT_CONCURRENCY
+from bailo.helper.release import Release
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls.
+DEFAULT_INTERVAL = 60.0
+# Maximum seconds between polls when backing off after failures.
+MAX_INTERVAL = 900.0
+# Fraction of the interval by which each poll is randomly offset, so that many watchers don't poll in step.
+DEFAULT_JITTER = 0.1
+RELEASES_SUFFIX = ".releases"
+
+
+class ReleaseWatcher:
+    """Watch a model for new releases, deploying each to a serving directory with an atomic symlink swap.
+
+    :param client: A client object used to interact with Bailo
+    :param model_id: Unique model ID
+    :param path: Path of the serving directory symlink. Releases are kept in the `<path>.releases` directory
+    :param policy: Version specification (e.g. ">=1.0.0,<2.0.0") or callable given each release's version, returning
+        whether it may be deployed, defaults to deploying every release
+    :param include_drafts: Deploy draft releases which match the policy too, defaults to False
+    :param interval: Seconds between polls, defaults to 60
+    :param max_interval: Maximum seconds between polls when backing off after failures, defaults to 900
+    :param jitter: Fraction of the interval by which each poll is randomly offset, defaults to 0.1
+    :param keep: Number of deployed releases kept on disk (including the current one), defaults to 2
+    :param include: List or string of fnmatch statements for file names to include, defaults to None
+    :param exclude: List or string of fnmatch statements for file names to exclude, defaults to None
+    :param concurrency: Number of files (or byte ranges of a single file) downloaded at once, defaults to 8
+    :param cache: Local download cache to materialise files from, and add downloaded files to, defaults to None
+    :param on_deploy: Callable given each deployed release and the path of its directory, defaults to None
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        model_id: str,
+        path: str,
+        policy: str | Callable[[Version], bool] | None = None,
+        include_drafts: bool = False,
+        interval: float = DEFAULT_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        jitter: float = DEFAULT_JITTER,
+        keep: int = 2,
+        include: list | str = "",
+        exclude: list | str = "",
+        concurrency: int = DEFAULT_CONCURRENCY,
+        cache: DownloadCache | None = None,
+        on_deploy: Callable[[Release, str], Any] | None = None,
+    ) -> None:
+        self.client = client
+        self.model_id = model_id
+        self.path = os.path.abspath(path)
+        self.releases_path = self.path + RELEASES_SUFFIX
+        self.include_drafts = include_drafts
+        self.interval = interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.keep = max(1, keep)
+        self.include = include
+        self.exclude = exclude
+        self.concurrency = concurrency
+        self.cache = cache
+        self.on_deploy = on_deploy
+
+        if policy is None:
+            self.policy: Callable[[Version], bool] = lambda version: True
+        elif isinstance(policy, str):
+            self.policy = SimpleSpec(policy).match
+        else:
+            self.policy = policy
+
+        self.etag: str | None = None
+        self.failures = 0
+        self._stop = threading.Event()
+
+    @property
+    def deployed(self) -> Version | None:
+        """Version of the currently deployed release, or None if no release is deployed."""
+        if not os.path.islink(self.path):
+            return None
+        return Version(os.path.basename(os.readlink(self.path)))
+
+    def poll(self) -> Release | None:
+        """Check for a new release once, deploying it if it matches the policy and is newer than the deployed release.
+
+        :return: The deployed release, or None if there was nothing to deploy
+        :raises BailoException: If the release fails to download or verify
+        """
+        etag, res = self.client.get_all_releases_if_changed(self.model_id, self.etag)
+        if res is None:
+            logger.debug("Releases of %s are unchanged.", self.model_id)
+            return None
+
+        keyed = [(Version.coerce(release["semver"]), release) for release in res["releases"]]
+        candidates = [
+            (version, release)
+            for version, release in keyed
+            if self.policy(version) and (self.include_drafts or not release.get("draft", False))
+        ]
+        deployed = self.deployed
+        if not candidates or (deployed is not None and max(candidates, key=lambda item: item[0])[0] <= deployed):
+            # Only remembered once handled, so that a failed deployment is retried on the next poll
+            self.etag = etag
+            return None
+
+        _, latest = max(candidates, key=lambda item: item[0])
+        release = Release.from_payload(self.client, self.model_id, latest)
+        self.deploy(release)
+        self.etag = etag
+        return release
+
+    def deploy(self, release: Release) -> str:
+        """Download a release into a staging directory, move it into place and point the serving symlink at it.
+
+        :param release: Release to deploy
+        :return: Path of the release's directory
+        :raises BailoException: If the release fails to download or verify, or the serving path isn't a symlink
+        """
+        if os.path.lexists(self.path) and not os.path.islink(self.path):
+            raise BailoException(f"Refusing to replace {self.path}, which isn't a symlink.")
+
+        os.makedirs(self.releases_path, exist_ok=True)
+        release_path = os.path.join(self.releases_path, str(release.version))
+        logger.info("Deploying version %s of %s to %s...", str(release.version), self.model_id, self.path)
+
+        if not os.path.isdir(release_path):
+            staging_path = tempfile.mkdtemp(dir=self.releases_path, prefix=".staging-")
+            try:
+                # Files are verified against their recorded digests as they're downloaded
+                release.download_all(
+                    staging_path, self.include, self.exclude, concurrency=self.concurrency, cache=self.cache
+                )
+                os.rename(staging_path, release_path)
+            except BaseException:
+                shutil.rmtree(staging_path, ignore_errors=True)
+                raise
+
+        # Swap the symlink with a rename, which atomically replaces the old link
+        link_path = os.path.join(os.path.dirname(self.path), f".{os.path.basename(self.path)}.{os.getpid()}.tmp")
+        if os.path.lexists(link_path):
+            os.remove(link_path)
+        os.symlink(os.path.relpath(release_path, os.path.dirname(self.path)), link_path)
+        os.replace(link_path, self.path)
+        logger.info("Deployed version %s of %s to %s.", str(release.version), self.model_id, self.path)
+
+        self._prune()
+        if self.on_deploy is not None:
+            self.on_deploy(release, release_path)
+
+        return release_path
+
+    def run(self, max_polls: int | None = None) -> None:
+        """Poll for new releases until stopped, backing off exponentially (with jitter) after failed polls.
+
+        :param max_polls: Number of polls to make before returning, defaults to polling until `stop` is called
+        """
+        self._stop.clear()
+        polls = 0
+
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.failures = 0
+            except (BailoException, ResponseException, RequestException, OSError) as ex:
+                self.failures += 1
+                logger.warning("Polling releases of %s failed (%s), backing off.", self.model_id, ex)
+
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                return
+            self._stop.wait(self.next_interval())
+
+    def stop(self) -> None:
+        """Stop a running watcher after its current poll."""
+        self._stop.set()
+
+    def next_interval(self) -> float:
+        """Seconds to wait before the next poll, backing off exponentially after consecutive failures.
+
+        :return: Jittered interval in seconds
+        """
+        interval = min(self.max_interval, self.interval * 2**self.failures)
+        return max(0.0, interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def _prune(self) -> None:
+        deployed = self.deployed
+        versions = []
+        for name in os.listdir(self.releases_path):
+            try:
+                versions.append(Version(name))
+            except ValueError:
+                continue
+
+        # Keep the newest releases, and always the deployed one
+        for version in sorted(versions, reverse=True)[self.keep :]:
+            if version != deployed:
+                logger.info("Removing old release %s of %s.", str(version), self.model_id)
+                shutil.rmtree(os.path.join(self.releases_path, str(version)), ignore_errors=True)
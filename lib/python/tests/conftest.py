@@ -10,7 +10,9 @@ In VSCode, Code Coverage is recorded in config.xml. Delete this file to reset re
 
 from __future__ import annotations
 
+import json
 import random
+import re
 
 import mlflow
 import pytest
@@ -83,6 +85,39 @@ def local_model():
     return model
 
 
+@pytest.fixture
+def serve_file(requests_mock):
+    """Mock a file download, answering `Range` requests as Bailo and its storage would.
+
+    Returns a function taking the URL (string or compiled regex) and contents of the file, and whether ranges are
+    accepted (advertised with `Accept-Ranges` and answered with partial content), ignored (answered with the whole
+    file) or rejected (answered with Bailo's "Ranges are not supported" error). It returns the requests_mock matcher.
+    """
+
+    def serve(url, data: bytes, accept_ranges=True, ignore_ranges=False, reject_ranges=False, etag='"v1"'):
+        def content(request, context):
+            match = re.fullmatch(r"bytes=(\d+)-(\d+)", request.headers.get("Range", ""))
+            if reject_ranges and match:
+                context.status_code = 400
+                return json.dumps({"error": {"message": "Ranges are not supported"}}).encode()
+
+            context.headers["ETag"] = etag
+            if accept_ranges:
+                context.headers["Accept-Ranges"] = "bytes"
+            if accept_ranges and not ignore_ranges and match:
+                start, end = int(match.group(1)), int(match.group(2))
+                context.status_code = 206
+                context.headers["Content-Length"] = str(end + 1 - start)
+                return data[start : end + 1]
+
+            context.headers["Content-Length"] = str(len(data))
+            return data
+
+        return requests_mock.get(url, content=content)
+
+    return serve
+
+
 @pytest.fixture(scope="session")
 def test_path(tmpdir_factory):
     weights = "Test"
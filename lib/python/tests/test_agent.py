@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import pickle
+
+import pytest
+
+# isort: split
+
+from bailo import Agent, Client, PkiAgent, TokenAgent
+from bailo.core.exceptions import BailoException
+
+
+def test_agent_reuses_session(requests_mock):
+    requests_mock.get("https://example.com/api/v2/model/test_id", json={"success": True})
+
+    agent = Agent()
+    session = agent.session
+    client = Client("https://example.com", agent)
+    client.get_model(model_id="test_id")
+    client.get_model(model_id="test_id")
+
+    assert agent.session is session
+    assert requests_mock.call_count == 2
+
+
+def test_agent_pool_sizing():
+    agent = Agent(pool_connections=2, pool_maxsize=32, pool_block=True)
+    adapter = agent.session.get_adapter("https://example.com")
+
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block
+
+
+def test_agent_context_manager_closes_session():
+    with Agent() as agent:
+        session = agent.session
+
+    assert agent._session is None
+    # A closed agent transparently opens a new session
+    assert agent.session is not session
+
+
+def test_client_context_manager_closes_agent():
+    agent = Agent()
+    with Client("https://example.com", agent) as client:
+        client.agent.session
+
+    assert agent._session is None
+
+
+def test_agent_is_picklable():
+    agent = Agent(verify=False)
+    agent.session
+
+    restored = pickle.loads(pickle.dumps(agent))
+
+    assert restored.verify is False
+    assert restored._session is None
+
+
+def test_agent_error_mapping(requests_mock):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id",
+        status_code=404,
+        json={"error": {"message": "Not found"}},
+    )
+
+    client = Client("https://example.com", Agent())
+    with pytest.raises(BailoException, match="Not found"):
+        client.get_model(model_id="test_id")
+
+
+def test_token_agent_session_auth(requests_mock):
+    requests_mock.get("https://example.com/api/v2/model/test_id", json={"success": True})
+
+    agent = TokenAgent(access_key="access", secret_key="secret")
+    Client("https://example.com", agent).get_model(model_id="test_id")
+
+    assert requests_mock.last_request.headers["Authorization"].startswith("Basic ")
+
+
+def test_pki_agent_session_cert():
+    agent = PkiAgent(cert="cert.pem", key="key.pem", auth="ca.pem")
+
+    assert agent.session.cert == ("cert.pem", "key.pem")
+    assert agent.session.verify == "ca.pem"
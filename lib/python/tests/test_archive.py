@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import io
+import os
+import re
+import zipfile
+
+import pytest
+
+# isort: split
+
+from bailo import Client, Release
+from bailo.core.archive import ZipStream, compression_for, extract_zip
+from bailo.core.exceptions import BailoException
+
+
+@pytest.fixture
+def directory(tmp_path):
+    root = tmp_path / "weights"
+    (root / "nested" / "deeper").mkdir(parents=True)
+    (root / "empty").mkdir()
+    (root / "config.json").write_bytes(b'{"layers": 12}' * 1000)
+    (root / "nested" / "random.bin").write_bytes(os.urandom(3 * 1024**2 + 17))
+    (root / "nested" / "deeper" / "archive.zip").write_bytes(b"a" * 5000)
+    return root
+
+
+def test_compression_for(directory):
+    assert compression_for(str(directory / "config.json")) == zipfile.ZIP_DEFLATED
+    assert compression_for(str(directory / "nested" / "random.bin")) == zipfile.ZIP_STORED
+    # Already compressed formats are stored without sampling
+    assert compression_for(str(directory / "nested" / "deeper" / "archive.zip")) == zipfile.ZIP_STORED
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_zip_stream(directory, threaded):
+    read = []
+    stream = ZipStream(str(directory), threaded=threaded)
+
+    archive = b"".join(stream.stream(read.append))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == [
+            "config.json",
+            "empty/",
+            "nested/",
+            "nested/deeper/",
+            "nested/deeper/archive.zip",
+            "nested/random.bin",
+        ]
+        assert zf.getinfo("config.json").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo("nested/random.bin").compress_type == zipfile.ZIP_STORED
+        assert zf.read("nested/random.bin") == (directory / "nested" / "random.bin").read_bytes()
+
+    assert sum(read) == stream.size
+
+
+def test_zip_stream_closed_early(directory):
+    chunks = ZipStream(str(directory)).stream()
+    next(chunks)
+
+    # Closing the consumer stops the producer thread
+    chunks.close()
+
+
+def test_upload_directory_streams_zip(requests_mock, directory, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bodies = []
+
+    def simple_upload(request, context):
+        bodies.append(b"".join(request.body))
+        return {"file": {"id": "file_id"}}
+
+    requests_mock.post("https://example.com/api/v2/model/test/files/upload/simple", json=simple_upload)
+    requests_mock.patch("https://example.com/api/v2/model/test/file/file_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test/release/1.0.0", json={"release": {}})
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    assert release.upload(str(directory)) == "file_id"
+
+    assert requests_mock.request_history[0].qs["name"] == ["weights.zip"]
+    with zipfile.ZipFile(io.BytesIO(bodies[0])) as zf:
+        assert zf.read("config.json") == (directory / "config.json").read_bytes()
+    # No intermediate archive is written
+    assert sorted(os.listdir(tmp_path)) == ["weights"]
+
+
+def serve_archive(requests_mock, serve_file, archive, **kwargs):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/release/1.0.0",
+        json={"release": {"files": [{"id": "file_id", "name": "weights.zip", "size": len(archive), "tags": []}]}},
+    )
+    return serve_file(
+        "https://example.com/api/v2/model/test/release/1.0.0/file/weights.zip/download", archive, **kwargs
+    )
+
+
+def test_extract_zip_rejects_unsafe_names(tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("../escape.txt", b"nope")
+
+    with pytest.raises(BailoException):
+        extract_zip(archive, str(tmp_path / "out"))
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def test_release_extract_reads_ranges(requests_mock, serve_file, directory, tmp_path):
+    archive = b"".join(ZipStream(str(directory)).stream())
+    download = serve_archive(requests_mock, serve_file, archive)
+    out = tmp_path / "out"
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    extracted = release.extract("weights.zip", str(out), include="*.json", block_size=64 * 1024)
+
+    assert extracted == [str(out / "config.json")]
+    assert (out / "config.json").read_bytes() == (directory / "config.json").read_bytes()
+    assert not (out / "nested").exists()
+    # Only the central directory and the selected member are read, not the 3MiB of the other members
+    ranges = [re.findall(r"\d+", request.headers["Range"]) for request in download.request_history]
+    assert sum(int(end) + 1 - int(start) for start, end in ranges) <= 3 * 64 * 1024
+
+
+def test_release_extract_without_ranges(requests_mock, serve_file, directory, tmp_path):
+    archive = b"".join(ZipStream(str(directory)).stream())
+    serve_archive(requests_mock, serve_file, archive, accept_ranges=False)
+    out = tmp_path / "out"
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    extracted = release.extract("weights.zip", str(out))
+
+    assert len(extracted) == 3
+    assert (out / "config.json").read_bytes() == (directory / "config.json").read_bytes()
+    assert (out / "empty").is_dir()
+    assert sorted(os.listdir(tmp_path)) == ["out", "weights"]
+
+
+def test_release_extract_ranges_rejected(requests_mock, serve_file, directory, tmp_path):
+    archive = b"".join(ZipStream(str(directory)).stream())
+    download = serve_archive(requests_mock, serve_file, archive, reject_ranges=True)
+    out = tmp_path / "out"
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    release.extract("weights.zip", str(out), include="*.json")
+
+    assert (out / "config.json").read_bytes() == (directory / "config.json").read_bytes()
+    # The archive is downloaded in full once the range probe is rejected
+    assert "Range" not in download.last_request.headers
+
+
+def test_release_extract_ranges_ignored_after_probe(requests_mock, serve_file, directory, tmp_path, monkeypatch):
+    archive = b"".join(ZipStream(str(directory)).stream())
+    serve_archive(requests_mock, serve_file, archive)
+    # Only the probe is answered with a range, later range requests get the whole archive
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/release/1.0.0/file/weights.zip/download",
+        [{"status_code": 206, "content": archive[:1]}, {"content": archive}],
+    )
+    (tmp_path / "out").mkdir()
+    monkeypatch.chdir(tmp_path / "out")
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    extracted = release.extract("weights.zip", include="*.json")
+
+    assert extracted == [str(tmp_path / "out" / "config.json")]
+    assert (tmp_path / "out" / "config.json").read_bytes() == (directory / "config.json").read_bytes()
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import inspect
+import json
+
+import pytest
+
+# isort: split
+
+from bailo import Agent, AsyncAgent, AsyncClient, AsyncModel, AsyncRelease, Client, TokenAgent
+from bailo.core.async_client import TRANSFER_ENDPOINTS, _DeferredRequest
+from bailo.core.exceptions import BailoException, ResponseException
+
+httpx = pytest.importorskip("httpx")
+
+
+def mock_client(client: AsyncClient, handler) -> list:
+    """Send the client's native requests to a handler, returning the list of requests it's given."""
+    requests = []
+
+    def record(request):
+        requests.append(request)
+        return handler(request)
+
+    client.agent._client = httpx.AsyncClient(transport=httpx.MockTransport(record))
+    return requests
+
+
+def test_async_client_covers_client_endpoints():
+    endpoints = [name for name in vars(Client) if not name.startswith("_")]
+
+    for endpoint in endpoints:
+        assert asyncio.iscoroutinefunction(getattr(AsyncClient, endpoint)) or endpoint == "close"
+
+
+def test_async_client_endpoints_send_natively():
+    client = AsyncClient("https://example.com")
+
+    for name, func in inspect.getmembers(Client, inspect.isfunction):
+        if name.startswith("_") or name in TRANSFER_ENDPOINTS or name in vars(AsyncClient):
+            continue
+
+        args = [f"test_{param}" for param in list(inspect.signature(func).parameters)[1:]]
+        request = func(client._recorder, *args)
+        assert isinstance(request, _DeferredRequest), name
+        assert request.decode, name
+
+
+def test_async_client_get_model():
+    async def main():
+        async with AsyncClient("https://example.com") as client:
+            requests = mock_client(client, lambda request: httpx.Response(200, json={"success": True}))
+            results = await asyncio.gather(*(client.get_model(model_id="test_id") for _ in range(20)))
+            assert client.agent._executor is None
+            return results, requests
+
+    results, requests = asyncio.run(main())
+
+    assert results == [{"success": True}] * 20
+    assert {str(request.url) for request in requests} == {"https://example.com/api/v2/model/test_id"}
+
+
+def test_async_client_sends_params_and_json():
+    async def main():
+        async with AsyncClient("https://example.com") as client:
+            requests = mock_client(client, lambda request: httpx.Response(200, json={"success": True}))
+            await client.get_models(task="classification", libraries=["torch", "onnx"])
+            await client.post_access_request("test_id", metadata={"overview": {}}, schema_id="test_schema")
+            return requests
+
+    search, post = asyncio.run(main())
+
+    assert search.url.params.get_list("libraries") == ["torch", "onnx"]
+    assert "filters" not in search.url.params
+    assert post.method == "POST"
+    assert json.loads(post.content) == {"schemaId": "test_schema", "metadata": {"overview": {}}}
+
+
+def test_async_client_errors():
+    def handler(request):
+        if request.url.path.endswith("missing"):
+            return httpx.Response(404, json={"error": {"message": "Model not found"}})
+        return httpx.Response(500, text="Internal Server Error")
+
+    async def main():
+        async with AsyncClient("https://example.com") as client:
+            mock_client(client, handler)
+            with pytest.raises(BailoException, match="Model not found"):
+                await client.get_model("missing")
+            with pytest.raises(ResponseException, match="500 Cannot GET"):
+                await client.get_model("broken")
+
+    asyncio.run(main())
+
+
+def test_async_client_releases_if_changed():
+    def handler(request):
+        if request.headers.get("If-None-Match") == "v1":
+            return httpx.Response(304)
+        return httpx.Response(200, json={"releases": []}, headers={"ETag": "v1"})
+
+    async def main():
+        async with AsyncClient("https://example.com") as client:
+            mock_client(client, handler)
+            return await client.get_all_releases_if_changed("test_id"), await client.get_all_releases_if_changed(
+                "test_id", "v1"
+            )
+
+    changed, unchanged = asyncio.run(main())
+
+    assert changed == ("v1", {"releases": []})
+    assert unchanged == ("v1", None)
+
+
+def test_async_agent_uses_token_credentials():
+    agent = AsyncAgent(TokenAgent(access_key="access", secret_key="secret"))
+    request = agent.client.build_request("GET", "https://example.com")
+
+    assert agent.client.auth is not None
+    flow = agent.client.auth.auth_flow(request)
+    assert next(flow).headers["Authorization"] == "Basic " + base64.b64encode(b"access:secret").decode()
+
+
+def test_async_client_transfer_reads_body(requests_mock):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/release/1.0.0/file/test.bin/download", content=b"weights"
+    )
+
+    async def main():
+        async with AsyncClient("https://example.com") as client:
+            return await client.get_download_by_filename("test_id", "1.0.0", "test.bin")
+
+    res = asyncio.run(main())
+
+    # The streamed body was read on the transfer pool, rather than being left to block the event loop
+    assert res.raw.read() == b""
+    assert res.content == b"weights"
+
+
+def test_async_client_wraps_agent():
+    agent = Agent()
+    client = AsyncClient("https://example.com", agent)
+
+    assert isinstance(client.agent, AsyncAgent)
+    assert client.agent.agent is agent
+    assert client.client.agent is agent
+
+
+def test_async_agent_bounded_pools():
+    agent = AsyncAgent(max_concurrency=4, max_transfers=2)
+
+    assert agent.agent.pool_maxsize == 6
+    assert agent._get_executor(transfer=False)._max_workers == 4
+    assert agent._get_executor(transfer=True)._max_workers == 2
+
+    agent.close()
+    assert agent._executor is None
+
+
+def test_async_model_and_releases(requests_mock):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id",
+        json={
+            "model": {
+                "id": "test_id",
+                "name": "test",
+                "description": "test",
+                "kind": "model",
+                "visibility": "public",
+            }
+        },
+    )
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/releases",
+        json={
+            "releases": [
+                {
+                    "semver": "1.0.0",
+                    "modelCardVersion": 1,
+                    "notes": "test",
+                    "fileIds": [],
+                    "images": [],
+                    "minor": False,
+                    "draft": False,
+                }
+            ]
+        },
+    )
+
+    async def main():
+        async with AsyncClient("https://example.com") as client:
+            model = await AsyncModel.from_id(client, "test_id")
+            model.description = "updated"
+            return model, await model.get_latest_release()
+
+    model, release = asyncio.run(main())
+
+    assert isinstance(model, AsyncModel)
+    assert model.wrapped.description == "updated"
+    assert isinstance(release, AsyncRelease)
+    assert str(release.version) == "1.0.0"
+
+
+def test_async_model_search_hydrated(requests_mock):
+    requests_mock.get(
+        "https://example.com/api/v2/models/search",
+        json={"models": [{"id": f"model-{i}", "name": f"Model {i}", "description": "test"} for i in range(3)]},
+    )
+    for i in range(3):
+        requests_mock.get(
+            f"https://example.com/api/v2/model/model-{i}",
+            json={
+                "model": {
+                    "id": f"model-{i}",
+                    "name": f"Model {i}",
+                    "description": "test",
+                    "visibility": "public",
+                    "state": "Development",
+                    "card": {"version": 1, "schemaId": "minimal-general-v10", "metadata": {}},
+                }
+            },
+        )
+
+    async def main():
+        async with AsyncClient("https://example.com") as client:
+            return await AsyncModel.search(client)
+
+    models = asyncio.run(main())
+    assert requests_mock.call_count == 4
+
+    # Fetched on the worker pool before being returned, so reading them doesn't block the event loop
+    assert [model.state for model in models] == ["Development"] * 3
+    assert requests_mock.call_count == 4
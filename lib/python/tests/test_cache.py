@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import os
+
+# isort: split
+
+from bailo import Client, DownloadCache, Release
+from bailo.core import cache as cache_module
+from bailo.core.cache import clone_or_copy
+
+
+def test_clone_or_copy(tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"data")
+    dst = tmp_path / "dst.bin"
+    dst.write_bytes(b"old")
+
+    assert clone_or_copy(str(src), str(dst)) in ("reflink", "copy")
+    assert dst.read_bytes() == b"data"
+    assert sorted(os.listdir(tmp_path)) == ["dst.bin", "src.bin"]
+
+
+def test_cache_add_and_materialise(tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"))
+    src = tmp_path / "weights.bin"
+    src.write_bytes(b"weights")
+
+    assert not cache.materialise("model", "file", str(tmp_path / "miss.bin"))
+
+    blob_path = cache.add("model", "file", str(src))
+    assert os.path.basename(blob_path) == hashlib.sha256(b"weights").hexdigest()
+
+    # The same content under another file is stored once
+    assert cache.add("other-model", "other-file", str(src)) == blob_path
+    assert len(os.listdir(cache.blobs_dir)) == 1
+
+    target = tmp_path / "target.bin"
+    assert cache.materialise("other-model", "other-file", str(target))
+    assert target.read_bytes() == b"weights"
+
+
+def test_cache_copies_independent_of_blob(tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"))
+    src = tmp_path / "weights.bin"
+    src.write_bytes(b"weights")
+    blob_path = cache.add("model", "file", str(src))
+    target = tmp_path / "target.bin"
+    cache.materialise("model", "file", str(target))
+
+    # Writing to either file in place leaves the cached blob untouched
+    for path in (src, target):
+        with open(path, "r+b") as f:
+            f.write(b"WEIGHTS")
+    with open(blob_path, "rb") as f:
+        assert f.read() == b"weights"
+    assert os.stat(blob_path).st_nlink == 1
+
+
+def test_cache_copies_without_lock(tmp_path, monkeypatch):
+    cache = DownloadCache(str(tmp_path / "cache"), max_size=1024)
+    src = tmp_path / "weights.bin"
+    src.write_bytes(b"weights")
+    clone_to_temp = cache_module._clone_to_temp
+
+    def unlocked_clone_to_temp(src, directory):
+        # Other threads & processes can use the cache while a file is copied
+        assert cache._lock._thread_lock.acquire(blocking=False)
+        cache._lock._thread_lock.release()
+        return clone_to_temp(src, directory)
+
+    monkeypatch.setattr(cache_module, "_clone_to_temp", unlocked_clone_to_temp)
+
+    blob_path = cache.add("model", "file", str(src))
+    assert cache.materialise("model", "file", str(tmp_path / "target.bin"))
+    assert (tmp_path / "target.bin").read_bytes() == b"weights"
+    # No temporary copies are left behind, or counted towards the cache size
+    assert os.listdir(cache.blobs_dir) == [os.path.basename(blob_path)]
+    assert cache.size() == len(b"weights")
+
+
+def test_cache_materialise_evicted_blob(tmp_path, monkeypatch):
+    cache = DownloadCache(str(tmp_path / "cache"))
+    src = tmp_path / "weights.bin"
+    src.write_bytes(b"weights")
+    blob_path = cache.add("model", "file", str(src))
+    get = cache.get
+
+    def get_then_evict(*args, **kwargs):
+        path = get(*args, **kwargs)
+        os.remove(blob_path)
+        return path
+
+    monkeypatch.setattr(cache, "get", get_then_evict)
+
+    assert not cache.materialise("model", "file", str(tmp_path / "target.bin"))
+    assert sorted(os.listdir(tmp_path)) == ["cache", "weights.bin"]
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"), max_size=35)
+
+    for i in range(3):
+        src = tmp_path / f"{i}.bin"
+        src.write_bytes(str(i).encode() * 10)
+        cache.add("model", f"file-{i}", str(src))
+        os.utime(cache.get("model", f"file-{i}"), (i, i))
+
+    # Touching file-0 makes file-1 the least recently used
+    cache.get("model", "file-0")
+    src = tmp_path / "3.bin"
+    src.write_bytes(b"3" * 10)
+    cache.add("model", "file-3", str(src))
+
+    assert cache.size() <= 35
+    assert cache.get("model", "file-0") is not None
+    assert cache.get("model", "file-1") is None
+    assert cache.get("model", "file-3") is not None
+    assert not os.path.exists(cache.ref_path("model", "file-1"))
+
+
+def test_release_download_uses_cache(requests_mock, tmp_path):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/release/1.0.0",
+        json={"release": {"files": [{"id": "file-id", "name": "test.bin", "size": 4}]}},
+    )
+    download = requests_mock.get(
+        "https://example.com/api/v2/model/test/release/1.0.0/file/test.bin/download",
+        content=b"data",
+        headers={"Content-Length": "4"},
+    )
+    cache = DownloadCache(str(tmp_path / "cache"))
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    release.download("test.bin", path=str(tmp_path / "first.bin"), cache=cache)
+    assert release.download("test.bin", path=str(tmp_path / "second.bin"), cache=cache) is None
+    release.download_all(path=str(tmp_path / "all"), cache=cache)
+
+    assert download.call_count == 1
+    assert (tmp_path / "second.bin").read_bytes() == b"data"
+    assert (tmp_path / "all" / "test.bin").read_bytes() == b"data"
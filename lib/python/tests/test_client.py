@@ -138,6 +138,19 @@ def test_get_all_releases(requests_mock):
     assert result == {"success": True}
 
 
+def test_get_all_releases_if_changed(requests_mock):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/releases",
+        [{"json": {"success": True}, "headers": {"ETag": '"v1"'}}, {"status_code": 304}],
+    )
+
+    client = Client("https://example.com")
+
+    assert client.get_all_releases_if_changed("test_id") == ('"v1"', {"success": True})
+    assert client.get_all_releases_if_changed("test_id", '"v1"') == ('"v1"', None)
+    assert requests_mock.last_request.headers["If-None-Match"] == '"v1"'
+
+
 def test_get_release(requests_mock):
     requests_mock.get("https://example.com/api/v2/model/test_id/release/v1", json={"success": True})
 
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import hashlib
+from io import BytesIO
+
+import pytest
+
+# isort: split
+
+from bailo import Client, Release
+from bailo.core import codec
+from bailo.core.cache import DownloadCache
+from bailo.core.codec import codec_tag, compress_chunks, decompress_chunks, tagged_codec
+from bailo.core.digest import digest_tag
+from bailo.core.download import RangeDownload
+from bailo.core.exceptions import BailoException
+
+pytest.importorskip("zstandard")
+
+DATA = b'{"vocab": ["weights", "biases"]}\n' * 10_000
+URL = "https://example.com/api/v2/model/test_id/release/1.0.0/file/test.json/download"
+
+
+def test_codec_tags():
+    assert tagged_codec(["sha256:abc", codec_tag("zstd")]) == "zstd"
+    assert tagged_codec(["sha256:abc"]) is None
+
+
+def test_compress_round_trip():
+    compressed = list(compress_chunks([DATA[:1000], memoryview(DATA)[1000:]]))
+
+    assert len(b"".join(compressed)) < len(DATA) // 10
+    assert b"".join(decompress_chunks(compressed)) == DATA
+
+
+def test_unsupported_codec():
+    with pytest.raises(BailoException, match="Unsupported codec"):
+        decompress_chunks([], codec="lz4")
+
+
+def test_missing_codec_dependency(monkeypatch):
+    monkeypatch.setattr(codec, "ZSTD", False)
+
+    with pytest.raises(ImportError):
+        Release(Client("https://example.com"), "test_id", "1.0.0", 1).upload("test.json", DATA, compress=True)
+
+
+@pytest.mark.parametrize("data", [DATA, BytesIO(DATA), iter([DATA])], ids=["buffer", "file", "iterator"])
+def test_release_upload_compressed(requests_mock, data):
+    bodies = []
+
+    def simple_upload(request, context):
+        bodies.append(b"".join(request.body))
+        return {"file": {"id": "file_id"}}
+
+    upload = requests_mock.post("https://example.com/api/v2/model/test_id/files/upload/simple", json=simple_upload)
+    patch = requests_mock.patch("https://example.com/api/v2/model/test_id/file/file_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test_id/release/1.0.0", json={"release": {}})
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+
+    assert release.upload("test.json", data, compress=True) == "file_id"
+
+    assert b"".join(decompress_chunks(bodies)) == DATA
+    assert upload.last_request.qs["tags"] == [codec_tag("zstd")]
+    digest = hashlib.sha256(bodies[0]).hexdigest()
+    assert patch.last_request.json() == {"tags": [digest_tag(digest), codec_tag("zstd")]}
+    assert release.digests == {"test.json": digest}
+
+
+def mock_compressed_file(requests_mock, tags):
+    compressed = b"".join(compress_chunks([DATA]))
+    requests_mock.get(URL, content=compressed)
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/release/1.0.0",
+        json={
+            "release": {
+                "files": [
+                    {
+                        "id": "file_id",
+                        "name": "test.json",
+                        "tags": tags + [digest_tag(hashlib.sha256(compressed).hexdigest())],
+                    }
+                ]
+            }
+        },
+    )
+    return compressed
+
+
+def test_release_download_decompresses(requests_mock, tmp_path):
+    mock_compressed_file(requests_mock, [codec_tag("zstd")])
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+
+    release.download("test.json", path=str(tmp_path / "test.json"), decompress=True)
+    release.download_all(path=str(tmp_path / "all"))
+
+    assert (tmp_path / "test.json").read_bytes() == DATA
+    assert (tmp_path / "all" / "test.json").read_bytes() == DATA
+
+
+def test_release_download_without_decompressing(requests_mock, tmp_path):
+    compressed = mock_compressed_file(requests_mock, [codec_tag("zstd")])
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+
+    release.download("test.json", path=str(tmp_path / "test.json"), decompress=False)
+
+    assert (tmp_path / "test.json").read_bytes() == compressed
+
+
+def test_cache_keeps_encoded_and_decoded_files_apart(requests_mock, tmp_path):
+    compressed = mock_compressed_file(requests_mock, [codec_tag("zstd")])
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+    cache = DownloadCache(str(tmp_path / "cache"))
+
+    release.download("test.json", path=str(tmp_path / "raw.json"), cache=cache)
+    release.download_all(path=str(tmp_path / "all"), cache=cache)
+    release.download("test.json", path=str(tmp_path / "raw-cached.json"), cache=cache)
+    release.download("test.json", path=str(tmp_path / "decoded-cached.json"), cache=cache, decompress=True)
+
+    assert (tmp_path / "raw.json").read_bytes() == compressed
+    assert (tmp_path / "all" / "test.json").read_bytes() == DATA
+    assert (tmp_path / "raw-cached.json").read_bytes() == compressed
+    assert (tmp_path / "decoded-cached.json").read_bytes() == DATA
+    # Only the first download of each encoding fetches the file
+    assert [req.url for req in requests_mock.request_history].count(URL) == 2
+
+
+def test_interrupted_decompressing_download_leaves_no_file(requests_mock, tmp_path):
+    mock_compressed_file(requests_mock, [codec_tag("zstd")])
+    client = Client("https://example.com")
+    path = tmp_path / "test.json"
+
+    def interrupted(chunks):
+        yield from decompress_chunks(chunks)
+        raise ConnectionError("connection dropped")
+
+    with pytest.raises(ConnectionError):
+        RangeDownload(
+            lambda byte_range: client.get_download_by_filename("test_id", "1.0.0", "test.json", byte_range),
+            str(path),
+            decode=interrupted,
+        ).download()
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import hashlib
+import os
+
+import pytest
+
+# isort: split
+
+from bailo import Client, Release
+from bailo.core.delta import DELTA_TAG, DeltaReader, compute_delta, delta_chunks, literal_size
+from bailo.core.digest import digest_tag
+from bailo.core.exceptions import BailoException
+
+BLOCK_SIZE = 1024
+BASE = os.urandom(BLOCK_SIZE * 16)
+# One changed block, and one moved block
+TARGET = BASE[: BLOCK_SIZE * 4] + os.urandom(BLOCK_SIZE) + BASE[BLOCK_SIZE * 5 : BLOCK_SIZE * 15] + BASE[:BLOCK_SIZE]
+
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / "base.bin").write_bytes(BASE)
+    (tmp_path / "model.bin").write_bytes(TARGET)
+    return str(tmp_path / "base.bin"), str(tmp_path / "model.bin")
+
+
+def test_delta_round_trip(files, tmp_path):
+    base_path, path = files
+    manifest = compute_delta(path, base_path, BLOCK_SIZE)
+
+    assert manifest["ops"] == [
+        ["base", 0, BLOCK_SIZE * 4],
+        ["data", BLOCK_SIZE],
+        ["base", BLOCK_SIZE * 5, BLOCK_SIZE * 10],
+        ["base", 0, BLOCK_SIZE],
+    ]
+    assert literal_size(manifest) == BLOCK_SIZE
+
+    reader = DeltaReader(delta_chunks(path, manifest, block_size=100))
+    with open(tmp_path / "out.bin", "wb") as f:
+        assert reader.apply(base_path, f) == hashlib.sha256(TARGET).hexdigest()
+    assert (tmp_path / "out.bin").read_bytes() == TARGET
+
+
+def test_delta_truncated(files, tmp_path):
+    base_path, path = files
+    delta = b"".join(delta_chunks(path, compute_delta(path, base_path, BLOCK_SIZE)))
+
+    with pytest.raises(BailoException, match="ended early"):
+        with open(tmp_path / "out.bin", "wb") as f:
+            DeltaReader([delta[:-1]]).apply(base_path, f)
+
+
+def test_delta_wrong_base(files, tmp_path):
+    base_path, path = files
+    delta = b"".join(delta_chunks(path, compute_delta(path, base_path, BLOCK_SIZE)))
+    (tmp_path / "other.bin").write_bytes(os.urandom(len(BASE)))
+
+    with pytest.raises(BailoException, match="failed verification"):
+        with open(tmp_path / "out.bin", "wb") as f:
+            DeltaReader([delta]).apply(str(tmp_path / "other.bin"), f)
+
+
+def test_not_a_delta():
+    with pytest.raises(BailoException, match="not a delta"):
+        DeltaReader([b"x" * 100])
+
+
+def test_release_upload_and_download_delta(requests_mock, files, tmp_path):
+    _, path = files
+    base_digest = hashlib.sha256(BASE).hexdigest()
+    bodies = []
+
+    def simple_upload(request, context):
+        bodies.append(b"".join(request.body))
+        return {"file": {"id": "delta_id"}}
+
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/release/1.0.0",
+        json={"release": {"files": [{"id": "base_id", "name": "model.bin", "tags": [digest_tag(base_digest)]}]}},
+    )
+    upload = requests_mock.post("https://example.com/api/v2/model/test_id/files/upload/simple", json=simple_upload)
+    requests_mock.patch("https://example.com/api/v2/model/test_id/file/delta_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test_id/release/1.1.0", json={"release": {}})
+    # The base file is downloaded by ID, to compute the delta and to reconstruct the file
+    requests_mock.get("https://example.com/api/v2/model/test_id/file/base_id/download", content=BASE)
+    base = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+    release = Release(Client("https://example.com"), "test_id", "1.1.0", 1)
+
+    assert release.upload_delta(path, base, block_size=BLOCK_SIZE) == "delta_id"
+
+    assert upload.last_request.qs["tags"] == [DELTA_TAG]
+    assert len(bodies[0]) < BLOCK_SIZE * 2
+    assert release.files == ["delta_id"]
+
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/release/1.1.0",
+        json={"release": {"files": [{"id": "delta_id", "name": "model.bin", "tags": [DELTA_TAG]}]}},
+    )
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/release/1.1.0/file/model.bin/download", content=bodies[0]
+    )
+
+    release.download("model.bin", path=str(tmp_path / "out" / "model.bin"), decompress=True)
+
+    assert (tmp_path / "out" / "model.bin").read_bytes() == TARGET
+    assert os.listdir(tmp_path / "out") == ["model.bin"]
+    assert release.digests["model.bin"] == hashlib.sha256(TARGET).hexdigest()
+
+    # The delta as stored is verified against its digest tag
+    def tag_digest(digest):
+        requests_mock.get(
+            "https://example.com/api/v2/model/test_id/release/1.1.0",
+            json={
+                "release": {"files": [{"id": "delta_id", "name": "model.bin", "tags": [DELTA_TAG, digest_tag(digest)]}]}
+            },
+        )
+
+    tag_digest(hashlib.sha256(bodies[0]).hexdigest())
+    release.download("model.bin", path=str(tmp_path / "good" / "model.bin"), decompress=True, verify=True)
+    assert (tmp_path / "good" / "model.bin").read_bytes() == TARGET
+
+    tag_digest("0" * 64)
+    with pytest.raises(BailoException, match="failed verification"):
+        release.download("model.bin", path=str(tmp_path / "bad" / "model.bin"), decompress=True, verify=True)
+    assert os.listdir(tmp_path / "bad") == []
+
+
+def test_release_upload_delta_other_model():
+    base = Release(Client("https://example.com"), "other_id", "1.0.0", 1)
+    release = Release(Client("https://example.com"), "test_id", "1.1.0", 1)
+
+    with pytest.raises(BailoException, match="same model"):
+        release.upload_delta("model.bin", base)
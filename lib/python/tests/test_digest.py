@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hashlib
+from io import BytesIO
+
+import pytest
+
+# isort: split
+
+from bailo import Client, Release
+from bailo.core.digest import FileIndex, OrderedHasher, digest_tag, sha256_data, sha256_file, tagged_digest
+
+DATA = b"weights" * 1000
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+def test_digest_tags():
+    assert tagged_digest(["other", digest_tag(DIGEST)]) == DIGEST
+    assert tagged_digest(["other"]) is None
+
+
+@pytest.mark.parametrize("data", [DATA, bytearray(DATA), memoryview(DATA)])
+def test_sha256_data_buffer(data):
+    assert sha256_data(data) == DIGEST
+
+
+def test_sha256_data_file_position(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"header" + DATA)
+
+    with open(path, "rb") as f:
+        f.seek(6)
+        assert sha256_data(f) == DIGEST
+        assert f.tell() == 6
+
+    data = BytesIO(b"header" + DATA)
+    data.seek(6)
+    assert sha256_data(data) == DIGEST
+    assert data.tell() == 6
+
+    assert sha256_file(str(path)) == hashlib.sha256(b"header" + DATA).hexdigest()
+
+
+def test_ordered_hasher():
+    hasher = OrderedHasher()
+    blocks = [(offset, DATA[offset : offset + 1000]) for offset in range(0, len(DATA), 1000)]
+
+    for offset, block in reversed(blocks[1:]):
+        hasher.add(offset, block)
+    assert hasher.offset == 0
+
+    hasher.add(*blocks[0])
+    # Retried blocks are ignored
+    hasher.add(*blocks[0])
+
+    assert hasher.offset == len(DATA)
+    assert hasher.hexdigest() == DIGEST
+
+
+def test_release_upload_records_digest(requests_mock):
+    def simple_upload(request, context):
+        b"".join(request.body)
+        return {"file": {"id": "file_id"}}
+
+    upload = requests_mock.post("https://example.com/api/v2/model/test/files/upload/simple", json=simple_upload)
+    patch = requests_mock.patch("https://example.com/api/v2/model/test/file/file_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test/release/1.0.0", json={"release": {}})
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    release.upload("data.bin", BytesIO(DATA))
+
+    # Simple uploads are tagged as they're sent, rather than with another request
+    assert upload.last_request.qs["tags"] == [digest_tag(DIGEST)]
+    assert not patch.called
+    assert release.digests == {"data.bin": DIGEST}
+
+
+def test_release_upload_stream_records_digest(requests_mock):
+    def simple_upload(request, context):
+        # The digest of a stream is computed as the body is sent
+        b"".join(request.body)
+        return {"file": {"id": "file_id"}}
+
+    requests_mock.post("https://example.com/api/v2/model/test/files/upload/simple", json=simple_upload)
+    patch = requests_mock.patch("https://example.com/api/v2/model/test/file/file_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test/release/1.0.0", json={"release": {}})
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    release.upload("data.bin", iter([DATA[:100], DATA[100:]]))
+
+    assert patch.last_request.json() == {"tags": [digest_tag(DIGEST)]}
+    assert release.digests == {"data.bin": DIGEST}
+
+
+def test_file_index():
+    index = FileIndex(
+        [
+            {"id": "a", "name": "a.bin", "size": len(DATA), "tags": [digest_tag(DIGEST)], "complete": True},
+            {"id": "b", "name": "b.bin", "size": len(DATA), "tags": [digest_tag(DIGEST)], "complete": False},
+            {"id": "c", "name": "c.bin", "size": len(DATA), "tags": []},
+        ]
+    )
+
+    assert index.find(DIGEST, "a.bin", len(DATA)) == "a"
+    # Names must match, and incomplete uploads are never reused
+    assert index.find(DIGEST, "c.bin", len(DATA)) is None
+    assert index.find(DIGEST, "b.bin", len(DATA)) is None
+
+    index.add(DIGEST, "c.bin", len(DATA), "d")
+    assert index.find(DIGEST, "c.bin", len(DATA)) == "d"
+
+
+def test_upload_many_deduplicate(requests_mock, tmp_path, monkeypatch):
+    shards = {f"shard-{i}.bin": str(i).encode() * 100 for i in range(3)}
+    paths = []
+    for name, data in shards.items():
+        (tmp_path / name).write_bytes(data)
+        paths.append(str(tmp_path / name))
+
+    # The first two shards are unchanged since the last release
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/files",
+        json={
+            "files": [
+                {
+                    "id": f"old-{name}",
+                    "name": name,
+                    "size": len(data),
+                    "tags": [digest_tag(hashlib.sha256(data).hexdigest())],
+                }
+                for name, data in list(shards.items())[:2]
+            ]
+        },
+    )
+    requests_mock.post(
+        "https://example.com/api/v2/model/test/files/upload/multipart/start",
+        json={
+            "fileId": "new-shard-2.bin",
+            "chunks": [{"presignedUrl": "https://s3.example.com/1", "startByte": 0, "endByte": 100}],
+        },
+    )
+    requests_mock.put("https://s3.example.com/1", headers={"ETag": '"etag"'})
+    requests_mock.post("https://example.com/api/v2/model/test/files/upload/multipart/finish", json={})
+    patch = requests_mock.patch("https://example.com/api/v2/model/test/file/new-shard-2.bin", json={"file": {}})
+    put = requests_mock.put("https://example.com/api/v2/model/test/release/1.0.0", json={"release": {}})
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    hashed = []
+    monkeypatch.setattr(
+        "bailo.helper.release.sha256_data", lambda data: hashed.append(sha256_data(data)) or hashed[-1]  # type: ignore
+    )
+
+    file_ids = release.upload_many(paths, multipart_threshold=1, deduplicate=True)
+
+    assert file_ids == ["old-shard-0.bin", "old-shard-1.bin", "new-shard-2.bin"]
+    # Only files with a candidate of the same name & size are hashed up front, the rest are hashed as they're sent
+    assert hashed == [hashlib.sha256(data).hexdigest() for data in list(shards.values())[:2]]
+    assert patch.last_request.json()["tags"] == [digest_tag(hashlib.sha256(shards["shard-2.bin"]).hexdigest())]
+    assert put.last_request.json()["fileIds"] == file_ids
+
+
+def test_file_index_candidates():
+    index = FileIndex([{"id": "file_id", "name": "model.bin", "size": len(DATA), "tags": [digest_tag(DIGEST)]}])
+
+    assert index.has_candidate("model.bin", len(DATA))
+    assert not index.has_candidate("model.bin", len(DATA) + 1)
+    assert not index.has_candidate("other.bin", len(DATA))
+
+    index.add(DIGEST, "other.bin", len(DATA), "other_id")
+    assert index.has_candidate("other.bin", len(DATA))
+
+
+def test_upload_deduplicate_multipart_tags(requests_mock):
+    requests_mock.get("https://example.com/api/v2/model/test/files", json={"files": []})
+    requests_mock.post(
+        "https://example.com/api/v2/model/test/files/upload/multipart/start",
+        json={
+            "fileId": "file_id",
+            "chunks": [{"presignedUrl": "https://s3.example.com/1", "startByte": 0, "endByte": len(DATA)}],
+        },
+    )
+    requests_mock.put("https://s3.example.com/1", headers={"ETag": '"etag"'})
+    requests_mock.post("https://example.com/api/v2/model/test/files/upload/multipart/finish", json={})
+    patch = requests_mock.patch("https://example.com/api/v2/model/test/file/file_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test/release/1.0.0", json={"release": {}})
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    assert release.upload("data.bin", DATA, multipart_threshold=1024, deduplicate=True) == "file_id"
+    assert patch.last_request.json() == {"tags": [digest_tag(DIGEST)]}
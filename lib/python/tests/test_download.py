@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+
+# isort: split
+
+from bailo import Client, Release
+from bailo.core import download
+from bailo.core.digest import digest_tag
+from bailo.core.download import BufferDownload, PartialDownload, PositionalWriter, RangeDownload
+from bailo.core.exceptions import BailoException
+
+URL = "https://example.com/api/v2/model/test_id/release/1.0.0/file/test.bin/download"
+DATA = bytes(range(256)) * 4096
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(download, "MIN_CHUNK_SIZE", 64 * 1024)
+    monkeypatch.setattr(download, "MAX_CHUNK_SIZE", 128 * 1024)
+    monkeypatch.setattr(download, "RETRY_BACKOFF", 0)
+
+
+def serve(serve_file, data=DATA, **kwargs):
+    return serve_file(URL, data, **kwargs)
+
+
+def fetcher(client):
+    return lambda byte_range: client.get_download_by_filename("test_id", "1.0.0", "test.bin", byte_range)
+
+
+def test_positional_writer(tmp_path):
+    path = tmp_path / "out.bin"
+    with open(path, "wb") as f:
+        writer = PositionalWriter(f)
+        writer.write_at(4, b"5678")
+        writer.write_at(0, b"1234")
+
+    assert path.read_bytes() == b"12345678"
+
+
+def test_range_download(serve_file, tmp_path):
+    mock = serve(serve_file)
+    path = str(tmp_path / "test.bin")
+    progress = []
+
+    RangeDownload(fetcher(Client("https://example.com")), path, callback=progress.append, range_threshold=1).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert sum(progress) == len(DATA)
+    assert sum("Range" in req.headers for req in mock.request_history) >= len(DATA) // download.MAX_CHUNK_SIZE
+
+
+@pytest.mark.parametrize("range_threshold", [1, len(DATA) + 1])
+def test_range_download_digest(serve_file, tmp_path, range_threshold):
+    serve(serve_file)
+
+    engine = RangeDownload(
+        fetcher(Client("https://example.com")),
+        str(tmp_path / "test.bin"),
+        range_threshold=range_threshold,
+        expected_digest=DIGEST,
+    )
+    engine.download()
+
+    assert engine.digest == DIGEST
+
+
+def test_range_download_digest_mismatch(serve_file, tmp_path):
+    serve(serve_file)
+    path = str(tmp_path / "test.bin")
+
+    engine = RangeDownload(fetcher(Client("https://example.com")), path, range_threshold=1, expected_digest="0" * 64)
+    with pytest.raises(BailoException, match="failed verification"):
+        engine.download()
+
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + ".partial")
+
+
+def test_range_download_single_stream_without_accept_ranges(serve_file, tmp_path):
+    mock = serve(serve_file, accept_ranges=False)
+    path = str(tmp_path / "test.bin")
+
+    RangeDownload(fetcher(Client("https://example.com")), path, range_threshold=1).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert mock.call_count == 1
+
+
+def test_range_download_falls_back_when_ranges_ignored(serve_file, tmp_path):
+    serve(serve_file, ignore_ranges=True)
+    path = str(tmp_path / "test.bin")
+
+    RangeDownload(fetcher(Client("https://example.com")), path, range_threshold=1).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_range_download_failed_range(requests_mock, serve_file, tmp_path):
+    serve(serve_file)
+    requests_mock.get(
+        URL, [{"headers": {"Accept-Ranges": "bytes", "Content-Length": str(len(DATA))}}] + [{"status_code": 500}] * 100
+    )
+
+    with pytest.raises(BailoException):
+        RangeDownload(fetcher(Client("https://example.com")), str(tmp_path / "test.bin"), range_threshold=1).download()
+
+
+@pytest.mark.parametrize("range_threshold", [1, len(DATA) + 1])
+def test_buffer_download(serve_file, range_threshold):
+    mock = serve(serve_file)
+    progress = []
+
+    engine = BufferDownload(
+        fetcher(Client("https://example.com")),
+        callback=progress.append,
+        range_threshold=range_threshold,
+        expected_digest=DIGEST,
+    )
+    data = engine.download()
+
+    assert data == DATA
+    assert engine.digest == DIGEST
+    assert sum(progress) == len(DATA)
+    assert any("Range" in req.headers for req in mock.request_history) == (range_threshold == 1)
+
+
+def test_buffer_download_falls_back_when_ranges_ignored(serve_file):
+    serve(serve_file, ignore_ranges=True)
+
+    assert BufferDownload(fetcher(Client("https://example.com")), range_threshold=1).download() == DATA
+
+
+def test_buffer_download_digest_mismatch(serve_file):
+    serve(serve_file)
+
+    with pytest.raises(BailoException, match="failed verification"):
+        BufferDownload(fetcher(Client("https://example.com")), expected_digest="0" * 64).download()
+
+
+@pytest.mark.parametrize("range_threshold", [1, download.RANGE_THRESHOLD])
+def test_buffer_download_content_encoded(requests_mock, range_threshold):
+    encoded = gzip.compress(DATA)
+    headers = {"Content-Encoding": "gzip", "Content-Length": str(len(encoded)), "Accept-Ranges": "bytes"}
+    mock = requests_mock.get(URL, content=encoded, headers=headers)
+
+    engine = BufferDownload(
+        fetcher(Client("https://example.com")), range_threshold=range_threshold, expected_digest=DIGEST
+    )
+
+    assert engine.download() == DATA
+    assert not any("Range" in req.headers for req in mock.request_history)
+
+
+def test_range_download_content_encoded(requests_mock, tmp_path):
+    encoded = gzip.compress(DATA)
+    headers = {"Content-Encoding": "gzip", "Content-Length": str(len(encoded)), "Accept-Ranges": "bytes"}
+    requests_mock.get(URL, content=encoded, headers=headers)
+    path = tmp_path / "test.bin"
+
+    RangeDownload(fetcher(Client("https://example.com")), str(path), range_threshold=1).download()
+
+    assert path.read_bytes() == DATA
+
+
+def test_adaptive_chunk_size():
+    engine = RangeDownload(lambda byte_range: None, "test.bin")
+
+    engine.report(download.MIN_CHUNK_SIZE, 100)
+    assert engine.chunk_size == download.MIN_CHUNK_SIZE
+
+    engine.report(download.MIN_CHUNK_SIZE, 0.001)
+    assert engine.chunk_size == download.MAX_CHUNK_SIZE
+
+
+def serve_release(requests_mock, digest=DIGEST):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/release/1.0.0",
+        json={"release": {"files": [{"id": "file_id", "name": "test.bin", "tags": [digest_tag(digest)]}]}},
+    )
+
+
+def test_release_download_writes_file(requests_mock, serve_file, tmp_path):
+    serve(serve_file)
+    serve_release(requests_mock)
+    path = str(tmp_path / "test.bin")
+
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+    release.download("test.bin", path=path)
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert release.digests == {"test.bin": DIGEST}
+
+
+def test_release_download_verify(requests_mock, serve_file, tmp_path):
+    serve(serve_file)
+    serve_release(requests_mock, digest="0" * 64)
+    path = str(tmp_path / "test.bin")
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+
+    with pytest.raises(BailoException, match="failed verification"):
+        release.download("test.bin", path=path, verify=True)
+    assert not os.path.exists(path)
+
+    requests_mock.reset_mock()
+    release.download("test.bin", path=path)
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    # Without verify, the release's file metadata isn't fetched
+    assert [request.url for request in requests_mock.request_history] == [URL]
+
+
+def interrupted_download(path, etag='"v1"', completed=((0, 300_000), (500_000, 700_000))):
+    with open(path + ".partial", "wb") as f:
+        f.truncate(len(DATA))
+        for start, end in completed:
+            f.seek(start)
+            f.write(DATA[start:end])
+    with open(path + ".partial.json", "w") as f:
+        json.dump({"size": len(DATA), "etag": etag, "lastModified": None, "ranges": [list(r) for r in completed]}, f)
+
+
+def test_partial_download_ranges(tmp_path):
+    partial = PartialDownload(str(tmp_path / "test.bin"))
+    partial.size = 100
+    partial.add_range(50, 60)
+    partial.add_range(0, 10)
+    partial.add_range(10, 20)
+
+    assert partial.ranges == [[0, 20], [50, 60]]
+    assert partial.missing() == [(20, 50), (60, 100)]
+    assert partial.completed == 30
+
+
+def test_resume_download_fetches_missing_ranges(serve_file, tmp_path):
+    mock = serve(serve_file)
+    path = str(tmp_path / "test.bin")
+    interrupted_download(path)
+    progress = []
+
+    RangeDownload(fetcher(Client("https://example.com")), path, callback=progress.append).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert sum(progress) == len(DATA)
+    assert not os.path.exists(path + ".partial")
+    assert not os.path.exists(path + ".partial.json")
+
+    requested = [req.headers["Range"] for req in mock.request_history if "Range" in req.headers]
+    starts = [int(header[len("bytes=") :].split("-")[0]) for header in requested]
+    assert all(not (0 <= start < 300_000 or 500_000 <= start < 700_000) for start in starts)
+    assert 300_000 in starts and 700_000 in starts
+
+
+def test_resume_interrupted_stream_download(requests_mock, serve_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(download, "STREAM_BLOCK_SIZE", 16 * 1024)
+    mock = serve(serve_file)
+    path = str(tmp_path / "test.bin")
+    iter_content = RangeDownload._iter_content
+
+    def interrupted(self, res):
+        for offset, data in enumerate(iter_content(self, res)):
+            if offset == 5:
+                raise ConnectionError("connection dropped")
+            yield data
+
+    monkeypatch.setattr(RangeDownload, "_iter_content", interrupted)
+    with pytest.raises(ConnectionError):
+        RangeDownload(fetcher(Client("https://example.com")), path, concurrency=1).download()
+
+    assert PartialDownload(path).ranges == [[0, 5 * 16 * 1024]]
+    assert os.path.getsize(path + ".partial") == 5 * 16 * 1024
+
+    monkeypatch.setattr(RangeDownload, "_iter_content", iter_content)
+    requests_mock.reset_mock()
+    RangeDownload(fetcher(Client("https://example.com")), path, concurrency=1, expected_digest=DIGEST).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert mock.request_history[1].headers["Range"].startswith(f"bytes={5 * 16 * 1024}-")
+    assert not any(req.headers.get("Range", "").startswith("bytes=0-") for req in mock.request_history)
+
+
+def test_resume_download_restarts_when_changed(serve_file, tmp_path):
+    mock = serve(serve_file, etag='"v2"')
+    path = str(tmp_path / "test.bin")
+    interrupted_download(path, completed=((0, len(DATA)),))
+    with open(path + ".partial", "wb") as f:
+        f.write(b"\0" * len(DATA))
+
+    RangeDownload(fetcher(Client("https://example.com")), path).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert mock.call_count == 1
+
+
+def test_interrupted_download_leaves_partial(requests_mock, serve_file, tmp_path):
+    serve(serve_file)
+    path = str(tmp_path / "test.bin")
+    requests_mock.get(
+        URL,
+        [{"headers": {"Accept-Ranges": "bytes", "Content-Length": str(len(DATA)), "ETag": '"v1"'}}]
+        + [{"status_code": 500}] * 100,
+    )
+
+    with pytest.raises(BailoException):
+        RangeDownload(fetcher(Client("https://example.com")), path, range_threshold=1).download()
+
+    assert not os.path.exists(path)
+    assert PartialDownload(path).size == len(DATA)
+
+
+def test_release_download_to_buffer(requests_mock, serve_file, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    serve(serve_file)
+    serve_release(requests_mock)
+
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+    data = release.download_to_buffer("test.bin", range_threshold=1)
+
+    assert data == DATA
+    assert release.digests == {"test.bin": DIGEST}
+    # Nothing is written to disk
+    assert os.listdir(tmp_path) == []
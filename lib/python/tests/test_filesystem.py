@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+# isort: split
+
+from bailo import Client
+from bailo.core.exceptions import BailoException, ResponseException
+from bailo.helper.filesystem import BailoFileSystem, LRUBlockCache
+
+pytest.importorskip("fsspec")
+
+DATA = bytes(range(256)) * 64
+URL = "https://example.com/api/v2/model/test_id/release/1.0.0/file/weights%2Fmodel.bin/download"
+
+
+def serve(requests_mock, serve_file, **kwargs):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test_id/release/1.0.0",
+        json={
+            "release": {
+                "files": [
+                    {"id": "file_id", "name": "weights/model.bin", "size": len(DATA), "tags": []},
+                    {"id": "other_id", "name": "config.json", "size": 2, "tags": []},
+                ]
+            }
+        },
+    )
+    return serve_file(re.compile(re.escape(URL)), DATA, **kwargs)
+
+
+@pytest.fixture
+def fs():
+    return BailoFileSystem(
+        Client("https://example.com"), block_size=1024, cache_blocks=4, readahead=2, skip_instance_cache=True
+    )
+
+
+def test_lru_block_cache():
+    fetched = []
+
+    def fetcher(start, end):
+        fetched.append((start, end))
+        return DATA[start:end]
+
+    cache = LRUBlockCache(100, fetcher, len(DATA), maxblocks=3, readahead=2)
+
+    assert cache._fetch(150, 250) == DATA[150:250]
+    assert fetched == [(100, 300)]
+    # Sequential reads fetch ahead
+    assert cache._fetch(300, 310) == DATA[300:310]
+    assert fetched[-1] == (300, 600)
+    assert cache._fetch(400, 420) == DATA[400:420]
+    assert len(fetched) == 2
+    # Least recently used blocks are evicted
+    assert cache._fetch(100, 110) == DATA[100:110]
+    assert fetched[-1] == (100, 200)
+    assert cache._fetch(len(DATA) - 10, None) == DATA[-10:]
+    assert cache._fetch(len(DATA), len(DATA) + 10) == b""
+
+
+def test_filesystem_random_access(requests_mock, serve_file, fs):
+    mock = serve(requests_mock, serve_file)
+
+    with fs.open("bailo://test_id/1.0.0/weights/model.bin") as f:
+        assert f.read(8) == DATA[:8]
+        f.seek(10_000)
+        assert f.read(100) == DATA[10_000:10_100]
+        f.seek(4)
+        assert f.read(4) == DATA[4:8]
+
+    ranges = [req.headers["Range"] for req in mock.request_history]
+    assert ranges == ["bytes=0-1023", "bytes=9216-10239"]
+
+
+@pytest.mark.parametrize("accept_ranges, reject_ranges", [(False, False), (True, True)])
+def test_filesystem_ranges_unsupported(requests_mock, serve_file, fs, accept_ranges, reject_ranges):
+    mock = serve(requests_mock, serve_file, accept_ranges=accept_ranges, reject_ranges=reject_ranges)
+
+    with fs.open("bailo://test_id/1.0.0/weights/model.bin") as f:
+        f.seek(5000)
+        assert f.read(100) == DATA[5000:5100]
+        f.seek(100)
+        assert f.read(100) == DATA[100:200]
+        f.seek(15000)
+        assert f.read(100) == DATA[15000:15100]
+    # The file is downloaded once, then read locally
+    assert mock.call_count == (1 if accept_ranges is False else 2)
+
+    # Later files skip the range request
+    assert fs.cat_file("bailo://test_id/1.0.0/weights/model.bin", 0, 10) == DATA[:10]
+    assert "Range" not in mock.last_request.headers
+
+
+def test_filesystem_transient_range_error(requests_mock, serve_file, fs):
+    serve(requests_mock, serve_file)
+    requests_mock.get(re.compile(re.escape(URL)), status_code=503, json={"error": {"message": "Service unavailable"}})
+
+    with pytest.raises(BailoException, match="Service unavailable"):
+        fs.cat_file("bailo://test_id/1.0.0/weights/model.bin", 0, 100)
+    assert fs.ranges is None
+
+    # Later reads still use range requests
+    mock = serve(requests_mock, serve_file)
+    assert fs.cat_file("bailo://test_id/1.0.0/weights/model.bin", 0, 100) == DATA[:100]
+    assert "Range" in mock.last_request.headers
+    assert fs.ranges is True
+
+
+def test_filesystem_short_range(requests_mock, serve_file, fs):
+    serve(requests_mock, serve_file)
+    requests_mock.get(re.compile(re.escape(URL)), content=DATA[:10], status_code=206)
+
+    with pytest.raises(ResponseException, match="returned 10 of"):
+        fs.cat_file("bailo://test_id/1.0.0/weights/model.bin", 0, 100)
+
+
+def test_filesystem_ls(requests_mock, serve_file, fs):
+    serve(requests_mock, serve_file)
+    requests_mock.get("https://example.com/api/v2/models/search", json={"models": [{"id": "test_id"}]})
+    requests_mock.get("https://example.com/api/v2/model/test_id/releases", json={"releases": [{"semver": "1.0.0"}]})
+
+    assert fs.ls("", detail=False) == ["test_id"]
+    assert fs.ls("bailo://test_id", detail=False) == ["test_id/1.0.0"]
+    assert sorted(fs.ls("bailo://test_id/1.0.0", detail=False)) == [
+        "test_id/1.0.0/config.json",
+        "test_id/1.0.0/weights",
+    ]
+    assert fs.info("bailo://test_id/1.0.0/weights/model.bin")["size"] == len(DATA)
+    assert fs.isdir("bailo://test_id/1.0.0/weights")
+
+    with pytest.raises(FileNotFoundError):
+        fs.open("bailo://test_id/1.0.0/missing.bin")
+
+
+def test_filesystem_read_only(fs):
+    with pytest.raises(NotImplementedError):
+        fs.open("bailo://test_id/1.0.0/model.bin", "wb")
@@ -60,10 +60,106 @@ def test_create_get_from_id_and_update(
     assert model.model_id == get_model.model_id
 
 
+def mock_search(requests_mock, count: int):
+    requests_mock.get(
+        "https://example.com/api/v2/models/search",
+        json={
+            "models": [
+                {"id": f"model-{i}", "name": f"Model {i}", "description": "test", "tags": [], "kind": "model"}
+                for i in range(count)
+            ]
+        },
+    )
+    for i in range(count):
+        requests_mock.get(
+            f"https://example.com/api/v2/model/model-{i}",
+            json={
+                "model": {
+                    "id": f"model-{i}",
+                    "name": f"Model {i}",
+                    "description": "test",
+                    "visibility": "private",
+                    "organisation": "Example Organisation",
+                    "state": "Development",
+                    "card": {"version": 2, "schemaId": "minimal-general-v10", "metadata": {"overview": {}}},
+                }
+            },
+        )
+
+
+def test_search_models_single_request(requests_mock):
+    mock_search(requests_mock, 5)
+    client = Client("https://example.com")
+
+    models = Model.search(client=client)
+
+    assert [model.model_id for model in models] == [f"model-{i}" for i in range(5)]
+    assert [model.name for model in models] == [f"Model {i}" for i in range(5)]
+    assert requests_mock.call_count == 1
+
+
+def test_search_models_hydrate_on_access(requests_mock):
+    mock_search(requests_mock, 3)
+    client = Client("https://example.com")
+
+    models = Model.search(client=client)
+
+    assert models[1].visibility == ModelVisibility.PRIVATE
+    assert models[1].organisation == "Example Organisation"
+    assert models[1].model_card_version == 2
+    assert models[1].model_card_schema == "minimal-general-v10"
+    # Only the accessed model is fetched, and only once
+    assert requests_mock.call_count == 2
+
+
+def test_search_models_set_without_fetching(requests_mock):
+    mock_search(requests_mock, 1)
+    client = Client("https://example.com")
+
+    model = Model.search(client=client)[0]
+    model.organisation = "Other Organisation"
+    assert requests_mock.call_count == 1
+
+    # Assigned values are kept when the rest of the details are fetched
+    assert model.organisation == "Other Organisation"
+    assert model.state == "Development"
+    assert requests_mock.call_count == 2
+
+
+def test_search_models_prefetch(requests_mock):
+    mock_search(requests_mock, 10)
+    client = Client("https://example.com")
+
+    models = Model.search(client=client, prefetch=True, concurrency=4)
+    assert requests_mock.call_count == 11
+
+    assert all(model.state == "Development" for model in models)
+    assert requests_mock.call_count == 11
+
+
+def test_search_models_update_card_hydrates(requests_mock):
+    mock_search(requests_mock, 1)
+    put = requests_mock.put(
+        "https://example.com/api/v2/model/model-0/model-cards",
+        json={"card": {"version": 3, "schemaId": "minimal-general-v10", "metadata": {"overview": {}}}},
+    )
+    client = Client("https://example.com")
+
+    model = Model.search(client=client)[0]
+    model.update_model_card()
+
+    # The stored card is sent back, rather than wiping it
+    assert put.last_request.json() == {"metadata": {"overview": {}}}
+    assert model.model_card_version == 3
+
+
 @pytest.mark.integration
 def test_search_models(integration_client):
     with pytest.warns(UserWarning):
         models = Model.search(client=integration_client)
+        # Results are hydrated on first access, warning for models without a card
+        for model in models:
+            _ = model.model_card
 
     assert all(isinstance(model, Model) for model in models)
 
@@ -276,3 +372,52 @@ def test_publish_experiment_without_runs(standard_experiment):
 
     with pytest.raises(BailoException):
         standard_experiment.publish(mc_loc="performance.performanceMetrics", run_id=run_id)
+
+
+def mock_releases(requests_mock, versions: list[str]):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/releases",
+        json={
+            "releases": [
+                {
+                    "modelId": "test",
+                    "semver": version,
+                    "modelCardVersion": 1,
+                    "notes": "",
+                    "fileIds": [],
+                    "images": [],
+                    "minor": False,
+                    "draft": False,
+                }
+                for version in versions
+            ]
+        },
+    )
+
+
+def test_get_releases_single_request(requests_mock):
+    mock_releases(requests_mock, ["1.0.0", "1.2.0", "0.1.0"])
+    model = Model(client=Client("https://example.com"), model_id="test", name="test", description="test")
+
+    releases = model.get_releases()
+
+    assert [str(release.version) for release in releases] == ["1.0.0", "1.2.0", "0.1.0"]
+    assert requests_mock.call_count == 1
+
+
+def test_get_latest_release_single_request(requests_mock):
+    mock_releases(requests_mock, ["1.0.0", "1.10.0", "1.9.0", "1.10.0-rc.1"])
+    model = Model(client=Client("https://example.com"), model_id="test", name="test", description="test")
+
+    latest = model.get_latest_release()
+
+    assert str(latest.version) == "1.10.0"
+    assert requests_mock.call_count == 1
+
+
+def test_get_latest_release_no_releases(requests_mock):
+    mock_releases(requests_mock, [])
+    model = Model(client=Client("https://example.com"), model_id="test", name="test", description="test")
+
+    with pytest.raises(BailoException):
+        model.get_latest_release()
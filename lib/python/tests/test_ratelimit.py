@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import pickle
+import threading
+import time
+from io import BytesIO
+
+import pytest
+
+# isort: split
+
+from bailo import Agent, Client, RateLimiter, Release
+from bailo.core.download import RangeDownload
+from bailo.core.ratelimit import Priority
+
+DATA = bytes(range(256)) * 400
+
+
+class RecordingLimiter(RateLimiter):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.acquired: list[tuple[int, Priority]] = []
+
+    def acquire(self, nbytes: int, priority: Priority = Priority.BULK) -> None:
+        self.acquired.append((nbytes, priority))
+        super().acquire(nbytes, priority)
+
+
+def test_rate_limiter_caps_rate():
+    limiter = RateLimiter(200_000, burst=20_000)
+
+    started = time.monotonic()
+    # The first burst is granted immediately, the rest at the sustained rate
+    limiter.acquire(20_000)
+    limiter.acquire(40_000)
+
+    assert time.monotonic() - started >= 0.18
+
+
+def test_rate_limiter_throttle():
+    limiter = RateLimiter(10**9)
+
+    assert list(limiter.throttle([b"a", b"bc"])) == [b"a", b"bc"]
+
+
+def test_rate_limiter_priority():
+    limiter = RateLimiter(10_000, burst=1000)
+    limiter.acquire(1000)
+    served = []
+
+    bulk = threading.Thread(target=lambda: (limiter.acquire(1000), served.append("bulk")))
+    bulk.start()
+    time.sleep(0.02)
+
+    # Queued behind the bulk request, but served first
+    limiter.acquire(500, Priority.INTERACTIVE)
+    served.append("interactive")
+    bulk.join()
+
+    assert served == ["interactive", "bulk"]
+
+
+def test_rate_limiter_invalid_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+def test_rate_limiter_pickle():
+    limiter = pickle.loads(pickle.dumps(RateLimiter(1000, burst=100)))
+
+    assert (limiter.rate, limiter.burst) == (1000, 100)
+    limiter.acquire(100)
+
+
+def test_release_upload_rate_limited(requests_mock):
+    def simple_upload(request, context):
+        b"".join(request.body)
+        return {"file": {"id": "file_id"}}
+
+    requests_mock.post("https://example.com/api/v2/model/test_id/files/upload/simple", json=simple_upload)
+    requests_mock.patch("https://example.com/api/v2/model/test_id/file/file_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test_id/release/1.0.0", json={"release": {}})
+    limiter = RecordingLimiter(10**9, burst=10_000)
+
+    release = Release(Client("https://example.com", Agent(rate_limiter=limiter)), "test_id", "1.0.0", 1)
+    release.upload("test", BytesIO(DATA))
+
+    bulk = [nbytes for nbytes, priority in limiter.acquired if priority == Priority.BULK]
+    assert sum(bulk) == len(DATA)
+    # Bodies are sliced to the limiter's burst
+    assert max(bulk) == 10_000
+    assert any(priority == Priority.INTERACTIVE for _, priority in limiter.acquired)
+
+
+def test_range_download_rate_limited(requests_mock, tmp_path):
+    requests_mock.get("https://example.com/api/v2/model/test_id/release/1.0.0/file/test.bin/download", content=DATA)
+    limiter = RecordingLimiter(10**9)
+    client = Client("https://example.com")
+
+    RangeDownload(
+        lambda byte_range: client.get_download_by_filename("test_id", "1.0.0", "test.bin", byte_range),
+        str(tmp_path / "test.bin"),
+        limiter=limiter,
+    ).download()
+
+    assert sum(nbytes for nbytes, _ in limiter.acquired) == len(DATA)
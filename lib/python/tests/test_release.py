@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import os
+import re
+from urllib.parse import quote
+
 import pytest
 from bailo import Client, Release
 from bailo.core.exceptions import BailoException
@@ -20,6 +24,188 @@ def test_release():
     assert isinstance(release, Release)
 
 
+def mock_release_files(requests_mock, files: dict[str, bytes]):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/release/1.0.0",
+        json={"release": {"files": [{"name": name, "size": len(data)} for name, data in files.items()]}},
+    )
+    for name, data in files.items():
+        requests_mock.get(
+            f"https://example.com/api/v2/model/test/release/1.0.0/file/{name}/download",
+            content=data,
+            headers={"Content-Length": str(len(data))},
+        )
+
+
+def test_download_all_concurrent(requests_mock, tmp_path):
+    files = {f"shard-{i}.bin": str(i).encode() * 100 for i in range(20)}
+    mock_release_files(requests_mock, files)
+
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+    release.download_all(path=str(tmp_path), exclude="shard-1?.bin", concurrency=4)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(f"shard-{i}.bin" for i in range(10))
+    for i in range(10):
+        assert (tmp_path / f"shard-{i}.bin").read_bytes() == files[f"shard-{i}.bin"]
+
+
+def test_download_all_collects_errors(requests_mock, tmp_path):
+    files = {f"shard-{i}.bin": b"data" for i in range(5)}
+    mock_release_files(requests_mock, files)
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/release/1.0.0/file/shard-2.bin/download",
+        status_code=404,
+        json={"error": {"message": "File not found"}},
+    )
+
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+    with pytest.raises(BailoException, match=r"1 of 5 files: shard-2.bin \(File not found\)"):
+        release.download_all(path=str(tmp_path))
+
+    assert len(os.listdir(tmp_path)) == 4
+
+
+def mock_upload_many(requests_mock, put_status=200, fail=()):
+    def simple_upload(request, context):
+        name = request.qs["name"][0]
+        if name in fail:
+            context.status_code = 500
+            return {"error": {"message": "upload failed"}}
+        return {"file": {"id": f"id-{name}"}}
+
+    requests_mock.post("https://example.com/api/v2/model/test/files/upload/simple", json=simple_upload)
+    requests_mock.patch(re.compile(r"https://example.com/api/v2/model/test/file/.*"), json={"file": {}})
+    requests_mock.put(
+        "https://example.com/api/v2/model/test/release/1.0.0",
+        status_code=put_status,
+        json={"release": {}} if put_status == 200 else {"error": {"message": "update failed"}},
+    )
+    return requests_mock.delete(
+        re.compile(r"https://example.com/api/v2/model/test/file/.*"), json={"message": "deleted"}
+    )
+
+
+def write_files(tmp_path, count: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"file-{i}.bin"
+        path.write_bytes(str(i).encode() * 100)
+        paths.append(str(path))
+    return paths
+
+
+def test_upload_many_single_update(requests_mock, tmp_path):
+    mock_upload_many(requests_mock)
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1, files=["existing"])
+
+    file_ids = release.upload_many(write_files(tmp_path, 10), concurrency=4)
+
+    assert file_ids == [f"id-file-{i}.bin" for i in range(10)]
+    assert release.files == ["existing"] + file_ids
+    puts = [request for request in requests_mock.request_history if request.method == "PUT"]
+    assert len(puts) == 1
+    assert puts[0].json()["fileIds"] == ["existing"] + file_ids
+
+
+def test_upload_many_update_failure_deletes_files(requests_mock, tmp_path):
+    delete = mock_upload_many(requests_mock, put_status=500)
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1, files=["existing"])
+
+    with pytest.raises(BailoException, match="update failed"):
+        release.upload_many(write_files(tmp_path, 3))
+
+    assert release.files == ["existing"]
+    assert sorted(request.url.rsplit("/", 1)[-1] for request in delete.request_history) == [
+        f"id-file-{i}.bin" for i in range(3)
+    ]
+
+
+def test_upload_many_upload_failure_deletes_files(requests_mock, tmp_path):
+    delete = mock_upload_many(requests_mock, fail=("file-1.bin",))
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    with pytest.raises(BailoException, match="file-1.bin"):
+        release.upload_many(write_files(tmp_path, 3))
+
+    assert release.files == []
+    assert not any(request.method == "PUT" for request in requests_mock.request_history)
+    assert sorted(request.url.rsplit("/", 1)[-1] for request in delete.request_history) == [
+        "id-file-0.bin",
+        "id-file-2.bin",
+    ]
+
+
+def test_upload_many_unexpected_error_deletes_files(requests_mock, tmp_path, monkeypatch):
+    delete = mock_upload_many(requests_mock)
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+    upload_data = release._upload_data
+    uploaded = []
+
+    def interrupted(name, *args):
+        if name == "file-1.bin":
+            raise KeyboardInterrupt
+        file_id = upload_data(name, *args)
+        uploaded.append(file_id[0])
+        return file_id
+
+    monkeypatch.setattr(release, "_upload_data", interrupted)
+
+    with pytest.raises(KeyboardInterrupt):
+        release.upload_many(write_files(tmp_path, 3), concurrency=1)
+
+    assert "id-file-0.bin" in uploaded
+    assert sorted(request.url.rsplit("/", 1)[-1] for request in delete.request_history) == sorted(uploaded)
+    assert not any(request.method == "PUT" for request in requests_mock.request_history)
+
+
+def test_upload_directory(requests_mock, tmp_path):
+    mock_upload_many(requests_mock)
+    root = tmp_path / "weights"
+    (root / "layers").mkdir(parents=True)
+    (root / "config.json").write_bytes(b"{}")
+    (root / "layers" / "0.bin").write_bytes(b"0" * 100)
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    file_ids = release.upload_directory(str(root))
+
+    assert file_ids == ["id-weights/config.json", "id-weights/layers/0.bin"]
+    assert len([request for request in requests_mock.request_history if request.method == "PUT"]) == 1
+
+
+def test_download_all_recreates_tree(requests_mock, tmp_path):
+    files = {"weights/config.json": b"{}", "weights/layers/0.bin": b"0" * 100}
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/release/1.0.0",
+        json={"release": {"files": [{"name": name, "size": len(data)} for name, data in files.items()]}},
+    )
+    for name, data in files.items():
+        requests_mock.get(
+            f"https://example.com/api/v2/model/test/release/1.0.0/file/{quote(name, safe='')}/download",
+            content=data,
+            headers={"Content-Length": str(len(data))},
+        )
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    release.download_all(path=str(tmp_path / "out"))
+
+    assert (tmp_path / "out" / "weights" / "config.json").read_bytes() == b"{}"
+    assert (tmp_path / "out" / "weights" / "layers" / "0.bin").read_bytes() == b"0" * 100
+
+
+@pytest.mark.parametrize("name", ["../escape.bin", "weights/../../escape.bin", "/etc/escape.bin", "a//b"])
+def test_download_all_rejects_traversal(requests_mock, tmp_path, name):
+    requests_mock.get(
+        "https://example.com/api/v2/model/test/release/1.0.0",
+        json={"release": {"files": [{"name": name, "size": 1}]}},
+    )
+    release = Release(Client("https://example.com"), "test", "1.0.0", 1)
+
+    with pytest.raises(BailoException):
+        release.download_all(path=str(tmp_path / "out"))
+
+    assert requests_mock.call_count == 1
+
+
 @pytest.mark.integration
 @pytest.mark.parametrize(
     ("version", "model_card_version", "notes", "files", "images", "minor", "draft"),
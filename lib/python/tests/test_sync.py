@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+
+import pytest
+
+# isort: split
+
+from bailo import Client, DownloadCache, Release
+from bailo.core.delta import DELTA_TAG, compute_delta, delta_chunks
+from bailo.core.digest import digest_tag
+from bailo.core.exceptions import BailoException
+from bailo.helper.release import SYNC_MANIFEST
+
+RELEASE_URL = "https://example.com/api/v2/model/test_id/release/1.0.0"
+
+
+def download_url(name):
+    return f"{RELEASE_URL}/file/{name.replace('/', '%2F')}/download"
+
+
+def serve_files(requests_mock, files):
+    requests_mock.get(
+        RELEASE_URL,
+        json={
+            "release": {
+                "files": [
+                    {
+                        "id": file_id,
+                        "name": name,
+                        "size": len(data),
+                        "tags": [digest_tag(hashlib.sha256(data).hexdigest())],
+                    }
+                    for name, (file_id, data) in files.items()
+                ]
+            }
+        },
+    )
+    return {name: requests_mock.get(download_url(name), content=data) for name, (_, data) in files.items()}
+
+
+@pytest.fixture
+def release():
+    return Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+
+
+def test_sync_downloads_new_files(requests_mock, release, tmp_path):
+    serve_files(requests_mock, {"a.bin": ("a1", b"aaa"), "nested/b.bin": ("b1", b"bbbb")})
+
+    result = release.sync(str(tmp_path))
+
+    assert sorted(result["downloaded"]) == ["a.bin", "nested/b.bin"]
+    assert (tmp_path / "nested" / "b.bin").read_bytes() == b"bbbb"
+    manifest = json.loads((tmp_path / SYNC_MANIFEST).read_text())
+    assert manifest["files"]["a.bin"] == {"id": "a1", "size": 3, "sha256": hashlib.sha256(b"aaa").hexdigest()}
+
+
+def test_sync_unchanged_makes_one_request(requests_mock, release, tmp_path):
+    serve_files(requests_mock, {"a.bin": ("a1", b"aaa")})
+    release.sync(str(tmp_path))
+    requests_mock.reset_mock()
+
+    assert release.sync(str(tmp_path)) == {"downloaded": [], "deleted": []}
+    assert requests_mock.call_count == 1
+
+
+def test_sync_changed_and_removed_files(requests_mock, release, tmp_path):
+    serve_files(requests_mock, {"a.bin": ("a1", b"aaa"), "b.bin": ("b1", b"bbb"), "old/c.bin": ("c1", b"ccc")})
+    release.sync(str(tmp_path))
+    (tmp_path / "other.txt").write_text("not synced")
+
+    mocks = serve_files(requests_mock, {"a.bin": ("a2", b"aaaa"), "b.bin": ("b1", b"bbb")})
+    result = release.sync(str(tmp_path))
+
+    assert result == {"downloaded": ["a.bin"], "deleted": ["old/c.bin"]}
+    assert not mocks["b.bin"].called
+    assert (tmp_path / "a.bin").read_bytes() == b"aaaa"
+    # Directories left empty are removed, and files not synced are left alone
+    assert not (tmp_path / "old").exists()
+    assert (tmp_path / "other.txt").exists()
+
+
+def test_sync_redownloads_modified_local_file(requests_mock, release, tmp_path):
+    serve_files(requests_mock, {"a.bin": ("a1", b"aaa")})
+    release.sync(str(tmp_path))
+    (tmp_path / "a.bin").write_bytes(b"truncated")
+
+    assert release.sync(str(tmp_path))["downloaded"] == ["a.bin"]
+    assert (tmp_path / "a.bin").read_bytes() == b"aaa"
+
+
+def test_sync_failed_file_retried(requests_mock, release, tmp_path):
+    serve_files(requests_mock, {"a.bin": ("a1", b"aaa"), "b.bin": ("b1", b"bbb")})
+    requests_mock.get(download_url("b.bin"), status_code=500, json={"error": {"message": "nope"}})
+
+    with pytest.raises(BailoException):
+        release.sync(str(tmp_path))
+    manifest = json.loads((tmp_path / SYNC_MANIFEST).read_text())
+    assert list(manifest["files"]) == ["a.bin"]
+
+    serve_files(requests_mock, {"a.bin": ("a1", b"aaa"), "b.bin": ("b1", b"bbb")})
+    assert release.sync(str(tmp_path))["downloaded"] == ["b.bin"]
+
+
+def test_sync_changed_file_never_written_in_place(requests_mock, release, tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"))
+    serve_files(requests_mock, {"a.bin": ("a1", b"aaa")})
+    release.sync(str(tmp_path / "first"), cache=cache)
+    # Materialised from the cache, so may share the blob's inode
+    release.sync(str(tmp_path / "second"), cache=cache)
+
+    serve_files(requests_mock, {"a.bin": ("a2", b"changed")})
+    release.sync(str(tmp_path / "second"), cache=cache)
+
+    assert (tmp_path / "second" / "a.bin").read_bytes() == b"changed"
+    assert (tmp_path / "first" / "a.bin").read_bytes() == b"aaa"
+    with open(cache.get("test_id", "a1"), "rb") as f:
+        assert f.read() == b"aaa"
+
+
+def test_sync_unchanged_delta_not_downloaded(requests_mock, release, tmp_path):
+    base, target = os.urandom(4096), os.urandom(1024)
+    (tmp_path / "base.bin").write_bytes(base)
+    (tmp_path / "model.bin").write_bytes(base[:3072] + target)
+    manifest = compute_delta(str(tmp_path / "model.bin"), str(tmp_path / "base.bin"), 1024, {"fileId": "base_id"})
+    delta = b"".join(delta_chunks(str(tmp_path / "model.bin"), manifest))
+    requests_mock.get(
+        RELEASE_URL,
+        json={
+            "release": {
+                "files": [
+                    {
+                        "id": "delta_id",
+                        "name": "model.bin",
+                        "size": len(delta),
+                        "tags": [DELTA_TAG, digest_tag(hashlib.sha256(delta).hexdigest())],
+                    }
+                ]
+            }
+        },
+    )
+    download = requests_mock.get(download_url("model.bin"), content=delta)
+    requests_mock.get("https://example.com/api/v2/model/test_id/file/base_id/download", content=base)
+
+    release.sync(str(tmp_path / "out"))
+    assert (tmp_path / "out" / "model.bin").read_bytes() == base[:3072] + target
+    downloads = download.call_count
+
+    assert release.sync(str(tmp_path / "out")) == {"downloaded": [], "deleted": []}
+    assert download.call_count == downloads
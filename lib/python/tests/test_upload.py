@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from io import BytesIO
+
+import pytest
+
+# isort: split
+
+from bailo import Client, Release
+from bailo.core import upload
+from bailo.core.exceptions import BailoException
+from bailo.core.upload import ChunkReader, MultipartUpload, UploadBody, UploadJournal
+
+DATA = bytes(range(256)) * 40
+
+
+def mock_multipart(requests_mock, chunk_size=1000, size=len(DATA)):
+    chunks = [
+        {
+            "presignedUrl": f"https://s3.example.com/part/{i}?sig=abc",
+            "startByte": start,
+            "endByte": min(start + chunk_size, size),
+        }
+        for i, start in enumerate(range(0, size, chunk_size), 1)
+    ]
+    requests_mock.post(
+        "https://example.com/api/v2/model/test_id/files/upload/multipart/start",
+        json={"fileId": "file_id", "chunks": chunks},
+    )
+    for i in range(1, len(chunks) + 1):
+        requests_mock.put(f"https://s3.example.com/part/{i}", headers={"ETag": f'"etag-{i}"'})
+    requests_mock.patch("https://example.com/api/v2/model/test_id/file/file_id", json={"file": {}})
+    return requests_mock.post(
+        "https://example.com/api/v2/model/test_id/files/upload/multipart/finish",
+        json={"message": "Successfully finished multipart upload."},
+    )
+
+
+def test_chunk_reader_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+
+    with open(path, "rb") as f:
+        assert ChunkReader(f).read(10, 20) == DATA[10:20]
+
+
+def test_chunk_reader_buffer():
+    data = BytesIO(DATA)
+    data.seek(5)
+
+    assert ChunkReader(data).read(100, 300) == DATA[100:300]
+    assert data.tell() == 5
+
+
+def test_chunk_reader_bytes():
+    assert ChunkReader(bytearray(DATA)).read(100, 300) == DATA[100:300]
+
+
+def test_upload_body():
+    progress = []
+    body = UploadBody(DATA, progress.append, block_size=1000, progress_interval=3000)
+
+    blocks = list(body)
+
+    assert len(body) == len(DATA)
+    assert all(isinstance(block, memoryview) for block in blocks)
+    assert b"".join(blocks) == DATA
+    # Progress is batched, with the remainder reported at the end
+    assert progress == [3000, 3000, 3000, 1240]
+    # Bodies can be sent again if a request is retried
+    assert b"".join(body) == DATA
+    assert body.digest == hashlib.sha256(DATA).hexdigest()
+
+
+def test_upload_body_from_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+
+    with open(path, "rb") as f:
+        f.seek(100)
+        with UploadBody.from_file(f) as body:  # type: ignore[reportOptionalContextManager]
+            assert len(body) == len(DATA) - 100
+            assert b"".join(body) == DATA[100:]
+
+
+def test_upload_body_from_file_empty(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+
+    with open(path, "rb") as f:
+        assert len(UploadBody.from_file(f)) == 0  # type: ignore[reportArgumentType]
+
+
+def test_upload_body_from_unmappable_file():
+    assert UploadBody.from_file(BytesIO(DATA)) is None  # type: ignore[reportArgumentType]
+
+
+@pytest.mark.parametrize("data", [DATA, bytearray(DATA), memoryview(DATA), BytesIO(DATA)])
+def test_release_upload_buffer(requests_mock, data):
+    bodies = []
+
+    def simple_upload(request, context):
+        bodies.append(b"".join(request.body))
+        return {"file": {"id": "file_id"}}
+
+    requests_mock.post("https://example.com/api/v2/model/test_id/files/upload/simple", json=simple_upload)
+    requests_mock.patch("https://example.com/api/v2/model/test_id/file/file_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test_id/release/1.0.0", json={"release": {}})
+
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+    assert release.upload("test", data) == "file_id"
+
+    assert bodies == [DATA]
+    assert requests_mock.request_history[0].headers["Content-Length"] == str(len(DATA))
+
+
+def test_multipart_upload(requests_mock):
+    finish = mock_multipart(requests_mock)
+    uploaded = []
+
+    client = Client("https://example.com")
+    multipart = MultipartUpload(client, "test_id", "test", BytesIO(DATA), len(DATA), callback=uploaded.append)
+
+    assert multipart.upload() == "file_id"
+    assert multipart.digest == hashlib.sha256(DATA).hexdigest()
+    assert sum(uploaded) == len(DATA)
+    assert finish.last_request.json()["parts"] == [{"ETag": f'"etag-{i}"', "PartNumber": i} for i in range(1, 12)]
+
+    chunk_requests = [req for req in requests_mock.request_history if req.hostname == "s3.example.com"]
+    chunk_requests.sort(key=lambda req: int(req.path.rsplit("/", 1)[-1]))
+    assert b"".join(req.body for req in chunk_requests) == DATA
+    assert "Authorization" not in chunk_requests[0].headers
+
+
+def test_multipart_upload_retries_chunk(requests_mock, monkeypatch):
+    monkeypatch.setattr(upload, "RETRY_BACKOFF", 0)
+    mock_multipart(requests_mock)
+    requests_mock.put(
+        "https://s3.example.com/part/3",
+        [{"status_code": 500}, {"status_code": 200, "headers": {"ETag": '"etag-3"'}}],
+    )
+
+    client = Client("https://example.com")
+    assert MultipartUpload(client, "test_id", "test", BytesIO(DATA), len(DATA)).upload() == "file_id"
+
+
+def test_multipart_upload_failed_chunk(requests_mock, monkeypatch):
+    monkeypatch.setattr(upload, "RETRY_BACKOFF", 0)
+    finish = mock_multipart(requests_mock)
+    requests_mock.put("https://s3.example.com/part/3", status_code=500)
+
+    client = Client("https://example.com")
+    with pytest.raises(BailoException, match="part 3"):
+        MultipartUpload(client, "test_id", "test", BytesIO(DATA), len(DATA)).upload()
+
+    assert not finish.called
+
+
+def test_release_upload_selects_multipart(requests_mock):
+    mock_multipart(requests_mock)
+    requests_mock.put("https://example.com/api/v2/model/test_id/release/1.0.0", json={"release": {}})
+
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+    file_id = release.upload("test", BytesIO(DATA), multipart_threshold=1024)
+
+    assert file_id == "file_id"
+    assert release.files == ["file_id"]
+    assert release.digests == {"test": hashlib.sha256(DATA).hexdigest()}
+
+
+def test_release_upload_buffer_multipart(requests_mock):
+    mock_multipart(requests_mock)
+    requests_mock.put("https://example.com/api/v2/model/test_id/release/1.0.0", json={"release": {}})
+
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+    file_id = release.upload("test", bytearray(DATA), multipart_threshold=1024)
+
+    assert file_id == "file_id"
+    assert release.files == ["file_id"]
+
+
+def test_upload_journal_for_file_identity(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+
+    journal = UploadJournal.for_file(str(path), "test_id", "1.0.0", "data.bin", directory=str(tmp_path))
+
+    assert journal.path == UploadJournal.for_file(str(path), "test_id", "1.0.0", "data.bin", str(tmp_path)).path
+    assert journal.path != UploadJournal.for_file(str(path), "test_id", "1.0.1", "data.bin", str(tmp_path)).path
+
+    path.write_bytes(DATA[::-1])
+    os.utime(path, ns=(0, 0))
+    assert journal.path != UploadJournal.for_file(str(path), "test_id", "1.0.0", "data.bin", str(tmp_path)).path
+
+
+def test_multipart_upload_resumes_from_journal(requests_mock, monkeypatch, tmp_path):
+    monkeypatch.setattr(upload, "RETRY_BACKOFF", 0)
+    finish = mock_multipart(requests_mock)
+    requests_mock.put("https://s3.example.com/part/3", status_code=500)
+    journal_path = str(tmp_path / "journal.json")
+
+    client = Client("https://example.com")
+    with pytest.raises(BailoException):
+        MultipartUpload(
+            client, "test_id", "test", BytesIO(DATA), len(DATA), journal=UploadJournal(journal_path)
+        ).upload()
+
+    journal = UploadJournal(journal_path)
+    assert journal.file_id == "file_id"
+    assert set(journal.parts) == set(range(1, 12)) - {3}
+
+    # Only the missing chunk is sent when resuming
+    requests_mock.reset_mock()
+    requests_mock.put("https://s3.example.com/part/3", headers={"ETag": '"etag-3"'})
+    uploaded = []
+    file_id = MultipartUpload(
+        client, "test_id", "test", BytesIO(DATA), len(DATA), callback=uploaded.append, journal=journal
+    ).upload()
+
+    assert file_id == "file_id"
+    assert sum(uploaded) == len(DATA)
+    assert [req.path for req in requests_mock.request_history if req.hostname == "s3.example.com"] == ["/part/3"]
+    assert len(finish.last_request.json()["parts"]) == 11
+    assert not os.path.exists(journal_path)
+
+
+def test_multipart_upload_resume_restarts_when_urls_expired(requests_mock, monkeypatch, tmp_path):
+    monkeypatch.setattr(upload, "RETRY_BACKOFF", 0)
+    finish = mock_multipart(requests_mock)
+    expired = requests_mock.put(re.compile(r"https://s3\.example\.com/expired/\d+"), status_code=403)
+    delete = requests_mock.delete("https://example.com/api/v2/model/test_id/file/old_file_id", json={})
+    journal_path = str(tmp_path / "journal.json")
+
+    # Journal of an earlier upload, whose presigned URLs have since expired
+    journal = UploadJournal(journal_path)
+    chunks = [
+        {
+            "presignedUrl": f"https://s3.example.com/expired/{i}",
+            "startByte": start,
+            "endByte": min(start + 1000, len(DATA)),
+        }
+        for i, start in enumerate(range(0, len(DATA), 1000), 1)
+    ]
+    journal.begin("old_file_id", chunks)
+    journal.add_part(1, '"old-etag-1"')
+
+    client = Client("https://example.com")
+    uploaded = []
+    multipart = MultipartUpload(
+        client, "test_id", "test", BytesIO(DATA), len(DATA), callback=uploaded.append, journal=journal
+    )
+
+    assert multipart.upload() == "file_id"
+    assert multipart.digest == hashlib.sha256(DATA).hexdigest()
+    # Each expired URL is tried once, without retrying
+    assert expired.call_count == 10
+    # The abandoned upload is deleted, and its progress wound back
+    assert delete.call_count == 1
+    assert sum(uploaded) == len(DATA)
+    assert finish.last_request.json()["fileId"] == "file_id"
+    assert finish.last_request.json()["parts"] == [{"ETag": f'"etag-{i}"', "PartNumber": i} for i in range(1, 12)]
+    assert not os.path.exists(journal_path)
+
+
+def test_multipart_upload_resume_hash_failure(requests_mock, tmp_path):
+    finish = mock_multipart(requests_mock)
+    journal = UploadJournal(str(tmp_path / "journal.json"))
+    journal.begin("file_id", [{"presignedUrl": "https://s3.example.com/part/1", "startByte": 0, "endByte": len(DATA)}])
+    journal.add_part(1, '"etag-1"')
+
+    class FailingFile(BytesIO):
+        def read(self, *args):
+            raise OSError("Disk error")
+
+    client = Client("https://example.com")
+    with pytest.raises(BailoException, match="Disk error"):
+        MultipartUpload(client, "test_id", "test", FailingFile(DATA), len(DATA), journal=journal).upload()
+    assert not finish.called
+
+
+def mock_simple_upload(requests_mock):
+    bodies = []
+
+    def simple_upload(request, context):
+        bodies.append(b"".join(request.body))
+        return {"file": {"id": "file_id"}}
+
+    requests_mock.post("https://example.com/api/v2/model/test_id/files/upload/simple", json=simple_upload)
+    requests_mock.patch("https://example.com/api/v2/model/test_id/file/file_id", json={"file": {}})
+    requests_mock.put("https://example.com/api/v2/model/test_id/release/1.0.0", json={"release": {}})
+    return bodies
+
+
+def test_release_upload_iterator(requests_mock):
+    bodies = mock_simple_upload(requests_mock)
+
+    def checkpoint():
+        for i in range(0, len(DATA), 1000):
+            yield DATA[i : i + 1000]
+
+    release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+    # Streams of unknown size are never sent as multipart uploads
+    assert release.upload("checkpoint.bin", checkpoint(), multipart_threshold=1024) == "file_id"
+
+    assert bodies == [DATA]
+    assert requests_mock.request_history[0].headers["Transfer-Encoding"] == "chunked"
+
+
+def test_release_upload_pipe(requests_mock):
+    bodies = mock_simple_upload(requests_mock)
+    read_fd, write_fd = os.pipe()
+
+    def write():
+        with os.fdopen(write_fd, "wb") as f:
+            f.write(DATA)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    with os.fdopen(read_fd, "rb") as pipe:
+        release = Release(Client("https://example.com"), "test_id", "1.0.0", 1)
+        assert release.upload("checkpoint.bin", pipe) == "file_id"
+    writer.join()
+
+    assert bodies == [DATA]
+
+
+def test_stream_chunks_bounded():
+    progress = []
+    chunks = upload.stream_chunks(BytesIO(DATA), progress.append, block_size=4096)
+
+    assert [len(chunk) for chunk in chunks] == [4096, 4096, 2048]
+    assert progress == [4096, 4096, 2048]
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import os
+
+import pytest
+
+# isort: split
+
+from bailo import Client, ReleaseWatcher
+from bailo.core.digest import digest_tag
+from bailo.core.exceptions import BailoException
+
+MODEL_URL = "https://example.com/api/v2/model/test_id"
+
+
+def release_payload(semver, draft=False):
+    return {
+        "semver": semver,
+        "modelCardVersion": 1,
+        "notes": "",
+        "fileIds": [],
+        "images": [],
+        "minor": False,
+        "draft": draft,
+    }
+
+
+def serve_releases(requests_mock, semvers, etag='W/"v1"', drafts=()):
+    def releases(request, context):
+        if request.headers.get("If-None-Match") == etag:
+            context.status_code = 304
+            return None
+        context.headers["ETag"] = etag
+        return {"releases": [release_payload(semver, semver in drafts) for semver in semvers]}
+
+    requests_mock.get(f"{MODEL_URL}/releases", json=releases)
+
+    for semver in semvers:
+        data = f"weights {semver}".encode()
+        requests_mock.get(
+            f"{MODEL_URL}/release/{semver}",
+            json={
+                "release": {
+                    "files": [
+                        {
+                            "id": f"file_{semver}",
+                            "name": "model.bin",
+                            "size": len(data),
+                            "tags": [digest_tag(hashlib.sha256(data).hexdigest())],
+                        }
+                    ]
+                }
+            },
+        )
+        requests_mock.get(f"{MODEL_URL}/release/{semver}/file/model.bin/download", content=data)
+
+
+def test_watcher_deploys_latest_matching_release(requests_mock, tmp_path):
+    serve_releases(requests_mock, ["1.0.0", "1.1.0", "2.0.0"])
+    path = tmp_path / "serving"
+    watcher = ReleaseWatcher(Client("https://example.com"), "test_id", str(path), policy="<2.0.0")
+
+    release = watcher.poll()
+
+    assert str(release.version) == "1.1.0"
+    assert os.path.islink(path)
+    assert (path / "model.bin").read_bytes() == b"weights 1.1.0"
+    assert str(watcher.deployed) == "1.1.0"
+
+
+@pytest.mark.parametrize("include_drafts, expected", [(False, "1.1.0"), (True, "1.2.0")])
+def test_watcher_skips_drafts(requests_mock, tmp_path, include_drafts, expected):
+    serve_releases(requests_mock, ["1.0.0", "1.1.0", "1.2.0"], drafts=["1.2.0"])
+    path = tmp_path / "serving"
+    watcher = ReleaseWatcher(Client("https://example.com"), "test_id", str(path), include_drafts=include_drafts)
+
+    assert str(watcher.poll().version) == expected
+    assert (path / "model.bin").read_bytes() == f"weights {expected}".encode()
+
+
+def test_watcher_unchanged_poll_is_conditional(requests_mock, tmp_path):
+    serve_releases(requests_mock, ["1.0.0"])
+    watcher = ReleaseWatcher(Client("https://example.com"), "test_id", str(tmp_path / "serving"))
+    watcher.poll()
+    requests_mock.reset_mock()
+
+    assert watcher.poll() is None
+    assert requests_mock.call_count == 1
+    assert requests_mock.last_request.headers["If-None-Match"] == 'W/"v1"'
+
+
+def test_watcher_swaps_and_prunes(requests_mock, tmp_path):
+    path = tmp_path / "serving"
+    watcher = ReleaseWatcher(Client("https://example.com"), "test_id", str(path), keep=2)
+    for i, semvers in enumerate([["1.0.0"], ["1.0.0", "1.1.0"], ["1.0.0", "1.1.0", "1.2.0"]]):
+        serve_releases(requests_mock, semvers, etag=f'W/"v{i}"')
+        watcher.poll()
+
+    assert (path / "model.bin").read_bytes() == b"weights 1.2.0"
+    assert sorted(os.listdir(str(path) + ".releases")) == ["1.1.0", "1.2.0"]
+
+
+def test_watcher_failed_verification_keeps_deployed(requests_mock, tmp_path):
+    path = tmp_path / "serving"
+    serve_releases(requests_mock, ["1.0.0"])
+    watcher = ReleaseWatcher(Client("https://example.com"), "test_id", str(path))
+    watcher.poll()
+
+    serve_releases(requests_mock, ["1.0.0", "1.1.0"], etag='W/"v2"')
+    requests_mock.get(f"{MODEL_URL}/release/1.1.0/file/model.bin/download", content=b"corrupt")
+    with pytest.raises(BailoException):
+        watcher.poll()
+
+    assert (path / "model.bin").read_bytes() == b"weights 1.0.0"
+    assert sorted(os.listdir(str(path) + ".releases")) == ["1.0.0"]
+    # The change is retried on the next poll
+    assert watcher.etag == 'W/"v1"'
+
+
+def test_watcher_refuses_to_replace_directory(requests_mock, tmp_path):
+    serve_releases(requests_mock, ["1.0.0"])
+    (tmp_path / "serving").mkdir()
+
+    with pytest.raises(BailoException):
+        ReleaseWatcher(Client("https://example.com"), "test_id", str(tmp_path / "serving")).poll()
+
+
+def test_watcher_backoff(requests_mock, tmp_path):
+    requests_mock.get(f"{MODEL_URL}/releases", status_code=500, json={"error": {"message": "unavailable"}})
+    watcher = ReleaseWatcher(
+        Client("https://example.com"), "test_id", str(tmp_path / "serving"), interval=0.01, max_interval=0.04
+    )
+
+    watcher.run(max_polls=4)
+
+    assert watcher.failures == 4
+    assert 0.036 <= watcher.next_interval() <= 0.044